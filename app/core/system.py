@@ -1,21 +1,68 @@
+from autoop.core.async_storage import ThreadedStorage, run
 from autoop.core.storage import LocalStorage
 from autoop.core.database import Database
-from autoop.core.ml.dataset import Dataset
+from autoop.core.cache import LRUCache
 from autoop.core.ml.artifact import Artifact
-from autoop.core.storage import Storage
-from typing import List
+from autoop.core.storage import NotFoundError, Storage
+from typing import TYPE_CHECKING, Callable, List
+import hashlib
+
+# Every page imports this module before drawing anything, so pandas,
+# scikit-learn and the ML modules are only imported once they are used.
+if TYPE_CHECKING:
+    from autoop.core.ml.preprocessing_cache import PreprocessingCache
+    from autoop.core.ml.serving import PredictionService
 
 
 class ArtifactRegistry():
+    # fields of the artifact entries that `list` can filter on directly
+    _INDEXED_FIELDS = ["type", "name", "version", "tags"]
+
     def __init__(self, 
                  database: Database,
-                 storage: Storage):
+                 storage: Storage,
+                 cache_size: int = 256 * 1024 * 1024,
+                 max_concurrency: int = 32,
+                 on_change: Callable[[str], None] = None):
         self._database = database
         self._storage = storage
+        # called with the id of every artifact registered or deleted, so
+        # that caches derived from its data can drop their entries
+        self._on_change = on_change
+        # for reading the data of many artifacts at once
+        self._async_storage = ThreadedStorage(storage, max_concurrency)
+        for field in self._INDEXED_FIELDS:
+            database.create_index("artifacts", field)
+        # loaded payloads keyed by artifact id, which encodes the version
+        self._cache = LRUCache(cache_size)
 
     def register(self, artifact: Artifact):
+        from autoop.core.ml.dataset import Dataset
+        from autoop.core.ml.statistics import (
+            compute_statistics,
+            statistics_path,
+        )
+        from autoop.functional.feature import profile_columns
+        is_dataset = isinstance(artifact, Dataset)
+        if is_dataset and "profile" not in artifact.metadata:
+            # profiled once here, from a sample, so that pages and
+            # pipelines do not have to scan the data to detect feature types
+            artifact.metadata["profile"] = profile_columns(artifact)
+        if is_dataset:
+            # summaries and zone maps are stored next to the dataset so
+            # that pages and filters do not have to scan it
+            path = statistics_path(artifact.asset_path)
+            self._storage.save(compute_statistics(artifact), path)
+            artifact.metadata["statistics"] = path
+            # hashed once here, so that caches keyed by the content of
+            # the dataset do not have to hash it again
+            artifact.metadata["fingerprint"] = hashlib.blake2b(
+                artifact.data, digest_size=16).hexdigest()
         # save the artifact in the storage
         self._storage.save(artifact.data, artifact.asset_path)
+        self._cache.invalidate(artifact.id)
+        if self._on_change is not None:
+            self._on_change(artifact.id)
         # save the metadata in the database
         entry = {
             "name": artifact.name,
@@ -27,49 +74,132 @@ class ArtifactRegistry():
         }
         self._database.set(f"artifacts", artifact.id, entry)
     
-    def list(self, type: str=None) -> List[Artifact]:
-        entries = self._database.list("artifacts")
+    def list(self, type: str=None, load: bool = False, name: str = None,
+             version: str = None, tag: str = None) -> List[Artifact]:
+        """List the registered artifacts, optionally filtered.
+
+        Filters are answered from the indexes of the database, so only
+        the matching entries are touched. Only metadata is read unless
+        `load` is set; the data of each artifact is otherwise fetched
+        from storage the first time its `data` is accessed.
+        Args:
+            type (str): Only list artifacts of this type
+            load (bool): Fetch the data of all listed artifacts up front,
+                concurrently, see `load`
+            name (str): Only list artifacts with this name
+            version (str): Only list artifacts of this version
+            tag (str): Only list artifacts with this tag
+        Returns:
+            List[Artifact]: The artifacts
+        """
+        conditions = {"type": type, "name": name, "version": version,
+                      "tags": tag}
+        conditions = {field: value for field, value in conditions.items()
+                      if value is not None}
         artifacts = []
-        for id, data in entries:
-            if type is not None and data["type"] != type:
-                continue
-            artifact = Artifact(
-                name=data["name"],
-                version=data["version"],
-                asset_path=data["asset_path"],
-                tags=data["tags"],
-                metadata=data["metadata"],
-                data=self._storage.load(data["asset_path"]),
-                type=data["type"],
-            )
-            artifacts.append(artifact)
+        for id in self._database.query("artifacts", **conditions):
+            artifacts.append(
+                self._handle(id, self._database.get("artifacts", id)))
+        if load:
+            self.load(artifacts)
         return artifacts
+
+    def load(self, artifacts: List[Artifact]) -> None:
+        """Fetch the data of several artifacts concurrently.
+
+        Artifacts whose data is loaded or cached already are not read
+        again. Reads overlap, so with a remote storage this takes about
+        as long as a few round trips rather than one per artifact.
+        Datasets are skipped: they are memory-mapped when first read.
+        Args:
+            artifacts (List[Artifact]): Artifacts handed out by the registry
+        """
+        missing = []
+        for artifact in artifacts:
+            if artifact.is_loaded or artifact.type == "dataset":
+                continue
+            payload = self._cache.get(artifact.id)
+            if payload is None:
+                missing.append(artifact)
+            else:
+                artifact.data = payload
+        payloads = run(self._async_storage.load_many(
+            [artifact.asset_path for artifact in missing]))
+        for artifact, payload in zip(missing, payloads):
+            self._cache.put(artifact.id, payload)
+            artifact.data = payload
     
     def get(self, artifact_id: str) -> Artifact:
         data = self._database.get("artifacts", artifact_id)
-        return Artifact(
-            name=data["name"],
-            version=data["version"],
-            asset_path=data["asset_path"],
-            tags=data["tags"],
-            metadata=data["metadata"],
-            data=self._storage.load(data["asset_path"]),
-            type=data["type"],
-        )
+        if data is None:
+            raise KeyError(f"Artifact not found: {artifact_id}")
+        return self._handle(artifact_id, data)
     
     def delete(self, artifact_id: str):
         data = self._database.get("artifacts", artifact_id)
         self._storage.delete(data["asset_path"])
+        if "statistics" in data["metadata"]:
+            try:
+                self._storage.delete(data["metadata"]["statistics"])
+            except NotFoundError:
+                pass
+        self._cache.invalidate(artifact_id)
+        if self._on_change is not None:
+            self._on_change(artifact_id)
         self._database.delete("artifacts", artifact_id)
+
+    def _handle(self, artifact_id: str, data: dict) -> Artifact:
+        """Build an artifact whose data is loaded on first access.
+
+        Datasets are returned as `Dataset` so they can be read directly.
+        Like `Dataset.from_storage`, they are memory-mapped instead of
+        loaded into the cache, so only the columns read are paged in.
+        """
+        asset_path = data["asset_path"]
+        fields = {
+            "name": data["name"],
+            "version": data["version"],
+            "asset_path": asset_path,
+            "tags": data["tags"],
+            "metadata": data["metadata"],
+            "loader": lambda: self._load(artifact_id, asset_path),
+        }
+        if data["type"] == "dataset":
+            # `data` is only read, as a copy, if it is accessed directly
+            fields["loader"] = lambda: self._storage.load(asset_path)
+            fields["buffer_loader"] = (
+                lambda: self._storage.load_buffer(asset_path))
+            path = data["metadata"].get("statistics")
+            if path is not None:
+                fields["statistics_loader"] = (
+                    lambda: self._storage.load_buffer(path))
+            from autoop.core.ml.dataset import Dataset
+            return Dataset(**fields)
+        return Artifact(type=data["type"], **fields)
+
+    def _load(self, artifact_id: str, asset_path: str) -> bytes:
+        """Load the data of an artifact through the cache."""
+        payload = self._cache.get(artifact_id)
+        if payload is None:
+            payload = self._storage.load(asset_path)
+            self._cache.put(artifact_id, payload)
+        return payload
     
 
 class AutoMLSystem:
     _instance = None
 
-    def __init__(self, storage: LocalStorage, database: Database):
+    def __init__(self, storage: LocalStorage, database: Database,
+                 preprocessing_cache: "PreprocessingCache" = None,
+                 cache_storage: Storage = None):
         self._storage = storage
         self._database = database
-        self._registry = ArtifactRegistry(database, storage)
+        self._registry = ArtifactRegistry(
+            database, storage, on_change=self._invalidate_cache)
+        # built on first use unless given, backed by `cache_storage`
+        self._preprocessing_cache = preprocessing_cache
+        self._cache_storage = cache_storage
+        self._prediction_service = None
 
     @staticmethod
     def get_instance():
@@ -78,11 +208,36 @@ class AutoMLSystem:
                 LocalStorage("./assets/objects"), 
                 Database(
                     LocalStorage("./assets/dbo")
-                )
+                ),
+                cache_storage=LocalStorage("./assets/cache"),
             )
+        # cheap when nothing changed: only the generation counter is read
         AutoMLSystem._instance._database.refresh()
         return AutoMLSystem._instance
     
     @property
     def registry(self):
-        return self._registry
\ No newline at end of file
+        return self._registry
+
+    @property
+    def preprocessing_cache(self) -> "PreprocessingCache":
+        """Cache of encoded features, to pass to every `Pipeline`"""
+        if self._preprocessing_cache is None:
+            from autoop.core.ml.preprocessing_cache import PreprocessingCache
+            self._preprocessing_cache = PreprocessingCache(
+                storage=self._cache_storage)
+        return self._preprocessing_cache
+
+    def _invalidate_cache(self, artifact_id: str) -> None:
+        """Drop the cached encodings of an artifact whose data changed"""
+        if (self._preprocessing_cache is not None
+                or self._cache_storage is not None):
+            self.preprocessing_cache.invalidate(artifact_id)
+
+    @property
+    def prediction_service(self) -> "PredictionService":
+        """Serves registered pipelines, kept warm between requests"""
+        if self._prediction_service is None:
+            from autoop.core.ml.serving import PredictionService
+            self._prediction_service = PredictionService(self._registry.get)
+        return self._prediction_service
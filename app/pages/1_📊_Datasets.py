@@ -8,4 +8,17 @@ automl = AutoMLSystem.get_instance()
 
 datasets = automl.registry.list(type="dataset")
 
+# summaries computed at registration, so the data itself is not read
+for dataset in datasets:
+    statistics = dataset.statistics
+    if statistics is None:
+        continue
+    with st.expander(f"{dataset.name} ({statistics.num_rows} rows)"):
+        st.dataframe(pd.DataFrame([
+            {"column": name, **{
+                key: value for key, value in statistics.summary(name).items()
+                if key in ("kind", "nulls", "distinct", "min", "max")}}
+            for name in statistics.columns
+        ]))
+
 # your code here
@@ -3,6 +3,15 @@ import pandas as pd
 
 from app.core.system import AutoMLSystem
 from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.metric import METRICS, get_metric
+from autoop.core.ml.model import (
+    CLASSIFICATION_MODELS,
+    REGRESSION_MODELS,
+    get_model,
+)
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.profiling import Profiler
+from autoop.functional.feature import detect_feature_types
 
 
 st.set_page_config(page_title="Modelling", page_icon="📈")
@@ -10,6 +19,22 @@ st.set_page_config(page_title="Modelling", page_icon="📈")
 def write_helper_text(text: str):
     st.write(f"<p style=\"color: #888;\">{text}</p>", unsafe_allow_html=True)
 
+
+def profile_table(profile: list) -> pd.DataFrame:
+    """One row per stage of a run: its time, memory and I/O."""
+    return pd.DataFrame([{
+        "stage": record["stage"],
+        "wall time (s)": record["wall_time"],
+        "CPU time (s)": record["cpu_time"],
+        "peak memory (MiB)": (None if record["peak_memory"] is None
+                              else record["peak_memory"] / 2**20),
+        "I/O time (s)": sum(io["seconds"] for kind, io in
+                            record["io"].items()
+                            if kind.startswith("storage.")),
+        "arrays (MiB)": sum(array["nbytes"] for array in
+                            record["arrays"].values()) / 2**20,
+    } for record in profile]).set_index("stage")
+
 st.write("# ⚙ Modelling")
 write_helper_text("In this section, you can design a machine learning pipeline to train a model on a dataset.")
 
@@ -17,5 +42,41 @@ automl = AutoMLSystem.get_instance()
 
 datasets = automl.registry.list(type="dataset")
 
-# your code here
+if not datasets:
+    st.info("Register a dataset first.")
+    st.stop()
+
+dataset = st.selectbox("Dataset", datasets,
+                       format_func=lambda d: f"{d.name} ({d.version})")
+features = {feature.name: feature
+            for feature in detect_feature_types(dataset)}
+target = st.selectbox("Target feature", list(features))
+inputs = st.multiselect("Input features",
+                        [name for name in features if name != target])
+task = ("classification" if features[target].type == "categorical"
+        else "regression")
+model_name = st.selectbox("Model", CLASSIFICATION_MODELS
+                          if task == "classification" else REGRESSION_MODELS)
+metric_names = st.multiselect(
+    "Metrics", [name for name in METRICS if get_metric(name).type == task])
+split = st.slider("Training split", 0.1, 0.9, 0.8)
+trace_memory = st.checkbox("Record peak memory (slows down the run)")
+
+if st.button("Train", disabled=not inputs or not metric_names):
+    pipeline = Pipeline(
+        [get_metric(name) for name in metric_names], dataset,
+        get_model(model_name), [features[name] for name in inputs],
+        features[target], split=split, cache=automl.preprocessing_cache,
+        profiler=Profiler(trace_memory=trace_memory))
+    result = pipeline.execute()
+    st.write("## Results")
+    st.table(pd.DataFrame([{"metric": str(metric), "value": value}
+                           for metric, value in result["metrics"]]))
+    st.write("## Timing breakdown")
+    write_helper_text("Where the time of this run went, per pipeline stage; "
+                      "I/O is the time spent in storage while the stage "
+                      "ran.")
+    breakdown = profile_table(result["profile"])
+    st.bar_chart(breakdown["wall time (s)"])
+    st.dataframe(breakdown)
 
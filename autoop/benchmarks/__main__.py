@@ -0,0 +1,60 @@
+r"""Run the benchmark suite from the command line.
+
+Example:
+    python -m autoop.benchmarks --scales small medium \
+        --output results.json --baseline previous.json
+"""
+import argparse
+import sys
+
+from autoop.benchmarks.suite import (
+    BENCHMARKS,
+    SCALES,
+    compare,
+    read_results,
+    run_suite,
+    write_results,
+)
+
+
+def main(argv: list = None) -> int:
+    """Run the suite, write the results and report regressions.
+    Args:
+        argv (list): Command line arguments, by default `sys.argv`
+    Returns:
+        int: The exit code, 1 if a regression was found
+    """
+    parser = argparse.ArgumentParser(prog="python -m autoop.benchmarks")
+    parser.add_argument("--scales", nargs="+", default=["small"],
+                        choices=list(SCALES))
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline",
+                        help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        args.scales, args.benchmarks, args.repeat, args.seed,
+        progress=lambda scale, name: print(f"{scale:>8} {name}",
+                                           file=sys.stderr))
+    write_results(results, args.output)
+    for result in results["results"]:
+        print(f"{result['scale']:>8} {result['benchmark']:<24} "
+              f"{result['seconds']['min']:10.4f}s "
+              f"{result['peak_bytes'] / 2**20:10.1f} MiB")
+    if args.baseline is None:
+        return 0
+    regressions = compare(read_results(args.baseline), results,
+                          args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression['scale']} {regression['benchmark']} "
+              f"{regression['measure']}: {regression['baseline']:.4g} -> "
+              f"{regression['current']:.4g} ({regression['ratio']:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.feature import Feature
+
+
+def synthetic_table(rows: int, numerical: int = 8, categorical: int = 4,
+                    cardinality: int = 16, seed: int = 0) -> pd.DataFrame:
+    """Generate a table with numerical and categorical features.
+
+    Numerical columns `x0, x1, ...` are standard normal and categorical
+    columns `c0, c1, ...` are uniform over `cardinality` labels. The
+    regression target `y` is a linear function of the numerical columns
+    and the first categorical column plus noise; the classification
+    target `label` splits `y` into three classes of equal size.
+    Args:
+        rows (int): Number of rows
+        numerical (int): Number of numerical features
+        categorical (int): Number of categorical features
+        cardinality (int): Number of distinct labels per categorical
+            feature
+        seed (int): Seed of the generator
+    Returns:
+        pd.DataFrame: The table
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"v{i}" for i in range(cardinality)], dtype=object)
+    columns = {}
+    y = rng.normal(scale=0.1, size=rows)
+    for i in range(numerical):
+        columns[f"x{i}"] = rng.normal(size=rows)
+        y += rng.uniform(-1, 1) * columns[f"x{i}"]
+    effects = rng.normal(size=cardinality)
+    for i in range(categorical):
+        codes = rng.integers(cardinality, size=rows)
+        columns[f"c{i}"] = labels[codes]
+        if i == 0:
+            y += effects[codes]
+    columns["y"] = y
+    columns["label"] = np.array(["low", "mid", "high"], dtype=object)[
+        np.searchsorted(np.quantile(y, [1 / 3, 2 / 3]), y)]
+    return pd.DataFrame(columns)
+
+
+def synthetic_features(data: pd.DataFrame) -> List[Feature]:
+    """The input features of a table from `synthetic_table`.
+    Args:
+        data (pd.DataFrame): The table
+    Returns:
+        List[Feature]: Its numerical and categorical input features
+    """
+    return [Feature(name=name,
+                    type="numerical" if name.startswith("x")
+                    else "categorical")
+            for name in data.columns if name not in ("y", "label")]
@@ -0,0 +1,345 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import count
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from autoop.benchmarks.generators import synthetic_features, synthetic_table
+from autoop.core.database import Database
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import evaluate_metrics, get_metric
+from autoop.core.ml.model import get_model
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.storage import LocalStorage
+from autoop.functional.preprocessing import preprocess_features
+
+if TYPE_CHECKING:
+    from app.core.system import ArtifactRegistry
+
+# Version of the layout of the results; `compare` refuses other versions.
+RESULTS_VERSION = 1
+
+# Arguments of `synthetic_table` per scale.
+SCALES: Dict[str, dict] = {
+    "small": {"rows": 10_000, "numerical": 8, "categorical": 4,
+              "cardinality": 16},
+    "medium": {"rows": 100_000, "numerical": 16, "categorical": 8,
+               "cardinality": 64},
+    "large": {"rows": 1_000_000, "numerical": 16, "categorical": 8,
+              "cardinality": 256},
+}
+
+# A benchmark prepares everything it needs from the context and returns
+# the operation to time, which may run several times.
+Benchmark = Callable[[dict], Callable[[], object]]
+
+
+def _storage_save(context: dict) -> Callable[[], object]:
+    storage = LocalStorage(os.path.join(context["directory"], "save"))
+    data = context["dataset"].data
+    keys = count()
+    return lambda: storage.save(data, f"datasets/{next(keys)}")
+
+
+def _storage_load(context: dict) -> Callable[[], object]:
+    storage = LocalStorage(os.path.join(context["directory"], "load"))
+    storage.save(context["dataset"].data, "dataset")
+    return lambda: storage.load("dataset")
+
+
+def _entries(context: dict) -> List[dict]:
+    """One metadata entry per hundred rows, like many small artifacts."""
+    return [{"name": f"artifact{i}", "version": "1.0.0", "tags": [],
+             "metadata": {"rows": i}}
+            for i in range(max(1, len(context["table"]) // 100))]
+
+
+def _database_set(context: dict) -> Callable[[], object]:
+    database = Database(LocalStorage(
+        os.path.join(context["directory"], "database_set")))
+    entries = _entries(context)
+
+    def run() -> None:
+        with database.transaction():
+            for i, entry in enumerate(entries):
+                database.set("artifacts", str(i), entry)
+    return run
+
+
+def _database_load(context: dict) -> Callable[[], object]:
+    storage = LocalStorage(os.path.join(context["directory"],
+                                        "database_load"))
+    database = Database(storage)
+    with database.transaction():
+        for i, entry in enumerate(_entries(context)):
+            database.set("artifacts", str(i), entry)
+    return lambda: Database(storage).list("artifacts")
+
+
+def _registry(context: dict, name: str) -> "ArtifactRegistry":
+    # the registry is part of the app, which builds on this package
+    from app.core.system import ArtifactRegistry
+    root = os.path.join(context["directory"], name)
+    return ArtifactRegistry(Database(LocalStorage(f"{root}/dbo")),
+                            LocalStorage(f"{root}/objects"))
+
+
+def _registry_register(context: dict) -> Callable[[], object]:
+    registry = _registry(context, "registry_register")
+    versions = count()
+
+    def run() -> None:
+        # a new version each time, with its profile and statistics
+        registry.register(Dataset(
+            name="benchmark", asset_path="datasets/benchmark",
+            version=f"1.0.{next(versions)}",
+            data=context["dataset"].data))
+    return run
+
+
+def _registry_read(context: dict) -> Callable[[], object]:
+    registry = _registry(context, "registry_read")
+    dataset = Dataset(name="benchmark", asset_path="datasets/benchmark",
+                      data=context["dataset"].data)
+    registry.register(dataset)
+    return lambda: registry.get(dataset.id).read()
+
+
+def _dataset_read(context: dict) -> Callable[[], object]:
+    return context["dataset"].read
+
+
+def _dataset_column(context: dict) -> Callable[[], object]:
+    return lambda: float(np.sum(context["dataset"].column("x0")))
+
+
+def _preprocess_features(context: dict) -> Callable[[], object]:
+    return lambda: preprocess_features(context["features"],
+                                       context["dataset"])
+
+
+def _pipeline_execute(context: dict) -> Callable[[], object]:
+    return lambda: Pipeline(
+        [get_metric("mean_squared_error")], context["dataset"],
+        get_model("multiple_linear_regression"), context["features"],
+        Feature(name="y", type="numerical")).execute()
+
+
+def _metrics_regression(context: dict) -> Callable[[], object]:
+    metrics = [get_metric(name) for name in
+               ("mean_squared_error", "mean_absolute_error", "r_squared")]
+    truth = context["table"]["y"].to_numpy()
+    predictions = truth + np.random.default_rng(0).normal(size=len(truth))
+    return lambda: evaluate_metrics(metrics, predictions, truth)
+
+
+def _metrics_classification(context: dict) -> Callable[[], object]:
+    metrics = [get_metric(name) for name in
+               ("accuracy", "macro_precision", "macro_recall")]
+    truth = context["table"]["label"].to_numpy()
+    predictions = np.random.default_rng(0).permutation(truth)
+    return lambda: evaluate_metrics(metrics, predictions, truth)
+
+
+def _startup(module: str) -> Benchmark:
+    """Benchmark importing a module in a fresh interpreter, like a cold
+    start of the app or of a worker."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+
+    def benchmark(context: dict) -> Callable[[], object]:
+        return lambda: subprocess.run(
+            [sys.executable, "-c", f"import {module}"], cwd=root,
+            check=True)
+    return benchmark
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "storage.save": _storage_save,
+    "storage.load": _storage_load,
+    "database.set": _database_set,
+    "database.load": _database_load,
+    "registry.register": _registry_register,
+    "registry.read": _registry_read,
+    "dataset.read": _dataset_read,
+    "dataset.column": _dataset_column,
+    "preprocess_features": _preprocess_features,
+    "pipeline.execute": _pipeline_execute,
+    "metrics.regression": _metrics_regression,
+    "metrics.classification": _metrics_classification,
+    "startup.app": _startup("app.core.system"),
+    "startup.pipeline": _startup("autoop.core.ml.pipeline"),
+}
+
+
+def measure(operation: Callable[[], object], repeat: int = 3) -> dict:
+    """Time an operation and record its peak memory.
+
+    The timed runs are not traced; the peak is taken from one more run
+    under `tracemalloc`, which sees the allocations of Python and NumPy.
+    Args:
+        operation (Callable[[], object]): The operation
+        repeat (int): Number of timed runs
+    Returns:
+        dict: `seconds` with the min, median and max over the runs, and
+            `peak_bytes`
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        operation()
+        seconds.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": {"min": min(seconds),
+                    "median": statistics.median(seconds),
+                    "max": max(seconds)},
+        "peak_bytes": peak,
+    }
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
+
+
+def run_suite(scales: List[str] = None, benchmarks: List[str] = None,
+              repeat: int = 3, seed: int = 0,
+              progress: Callable[[str, str], None] = None) -> dict:
+    """Run benchmarks on synthetic tables, without network access.
+    Args:
+        scales (List[str]): Names of `SCALES`, by default "small"
+        benchmarks (List[str]): Names of `BENCHMARKS`, by default all
+        repeat (int): Number of timed runs per benchmark
+        seed (int): Seed of the synthetic tables
+        progress (Callable[[str, str], None]): Called with the scale and
+            benchmark before each benchmark runs
+    Returns:
+        dict: The results, see `write_results`
+    """
+    scales = scales or ["small"]
+    benchmarks = benchmarks or list(BENCHMARKS)
+    for name in scales:
+        if name not in SCALES:
+            raise ValueError(f"Unknown scale: {name}")
+    for name in benchmarks:
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark: {name}")
+    results = []
+    for scale in scales:
+        table = synthetic_table(seed=seed, **SCALES[scale])
+        with tempfile.TemporaryDirectory() as directory:
+            context = {
+                "table": table,
+                "dataset": Dataset.from_dataframe(
+                    table, name="benchmark", asset_path="benchmark.bin"),
+                "features": synthetic_features(table),
+                "directory": directory,
+            }
+            for name in benchmarks:
+                if progress is not None:
+                    progress(scale, name)
+                result = measure(BENCHMARKS[name](context), repeat)
+                seconds = max(result["seconds"]["min"], 1e-9)
+                result.update({"benchmark": name, "scale": scale,
+                               **SCALES[scale],
+                               "rows_per_second": len(table) / seconds})
+                results.append(result)
+    return {
+        "results_version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def write_results(results: dict, path: str) -> None:
+    """Write results of `run_suite` as JSON.
+    Args:
+        results (dict): The results
+        path (str): The file to write
+    """
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def read_results(path: str) -> dict:
+    """Read results written by `write_results`.
+    Args:
+        path (str): The file to read
+    Returns:
+        dict: The results
+    """
+    with open(path) as file:
+        results = json.load(file)
+    if results.get("results_version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported results version in {path}")
+    return results
+
+
+def compare(baseline: dict, current: dict,
+            tolerance: float = 0.2) -> List[dict]:
+    """Find benchmarks that became slower or use more memory.
+
+    The fastest run of each benchmark is compared, being the least
+    affected by noise. Benchmarks present in only one of the results are
+    ignored.
+    Args:
+        baseline (dict): Earlier results
+        current (dict): New results
+        tolerance (float): Relative increase that is not a regression
+    Returns:
+        List[dict]: Per regression, the `benchmark`, `scale`, `measure`
+            (seconds or peak_bytes), the `baseline` and `current` values
+            and their `ratio`
+    """
+    earlier = {(result["benchmark"], result["scale"]): result
+               for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = earlier.get((result["benchmark"], result["scale"]))
+        if before is None:
+            continue
+        for measure_name, old, new in [
+                ("seconds", before["seconds"]["min"],
+                 result["seconds"]["min"]),
+                ("peak_bytes", before["peak_bytes"], result["peak_bytes"])]:
+            if new > old * (1 + tolerance):
+                regressions.append({
+                    "benchmark": result["benchmark"],
+                    "scale": result["scale"],
+                    "measure": measure_name,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": new / old if old else float("inf"),
+                })
+    return regressions
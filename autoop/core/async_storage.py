@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import functools
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from autoop.core.storage import LocalStorage, NotFoundError, Storage
+
+T = TypeVar("T")
+
+
+def run(coroutine: Awaitable[T]) -> T:
+    """Run a coroutine to completion from synchronous code.
+
+    Uses a new event loop, or a helper thread when called from a thread
+    that is already running one, e.g. inside a notebook.
+    Args:
+        coroutine (Awaitable[T]): The coroutine to run
+    Returns:
+        T: Its result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+class AsyncStorage(ABC):
+    """Asynchronous counterpart of `Storage`.
+
+    Besides single-key operations it offers bulk operations that transfer
+    many keys concurrently, so that their latencies overlap instead of
+    adding up.
+    """
+
+    @abstractmethod
+    async def save(self, data: bytes, path: str) -> None:
+        """
+        Save data to a given path
+        Args:
+            data (bytes): Data to save
+            path (str): Path to save data
+        """
+        pass
+
+    @abstractmethod
+    async def load(self, path: str) -> bytes:
+        """
+        Load data from a given path
+        Args:
+            path (str): Path to load data
+        Returns:
+            bytes: Loaded data
+        """
+        pass
+
+    @abstractmethod
+    async def delete(self, path: str) -> None:
+        """
+        Delete data at a given path
+        Args:
+            path (str): Path to delete data
+        """
+        pass
+
+    @abstractmethod
+    async def list(self, path: str) -> list:
+        """
+        List all paths under a given path
+        Args:
+            path (str): Path to list
+        Returns:
+            list: List of paths
+        """
+        pass
+
+    async def load_many(self, paths: List[str],
+                        missing_ok: bool = False
+                        ) -> List[Optional[bytes]]:
+        """
+        Load several paths concurrently
+        Args:
+            paths (List[str]): Paths to load
+            missing_ok (bool): Return None for missing paths instead of
+                raising `NotFoundError`
+        Returns:
+            List[Optional[bytes]]: The data of each path, in order
+        """
+        async def load(path: str) -> Optional[bytes]:
+            try:
+                return await self.load(path)
+            except NotFoundError:
+                if missing_ok:
+                    return None
+                raise
+        return list(await asyncio.gather(*(load(path) for path in paths)))
+
+    async def save_many(self, items: Dict[str, bytes]) -> None:
+        """
+        Save several paths concurrently
+        Args:
+            items (Dict[str, bytes]): Data to save, by path
+        """
+        await asyncio.gather(*(self.save(data, path)
+                               for path, data in items.items()))
+
+
+class ThreadedStorage(AsyncStorage):
+    """Runs the operations of a blocking `Storage` on a bounded thread pool.
+
+    At most `max_concurrency` operations are in flight at a time, however
+    many are awaited together. I/O recorded by the wrapped storage is
+    attributed to the stage that started the operation.
+    """
+
+    def __init__(self, storage: Storage, max_concurrency: int = 32) -> None:
+        """Wrap a storage.
+        Args:
+            storage (Storage): The storage to run operations on
+            max_concurrency (int): Most operations run at the same time
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self._storage = storage
+        self._max_concurrency = max_concurrency
+        self._executor = None
+
+    @property
+    def storage(self) -> Storage:
+        """The wrapped storage"""
+        return self._storage
+
+    async def save(self, data: bytes, path: str) -> None:
+        """
+        Save data to a given path on the pool
+        Args:
+            data (bytes): Data to save
+            path (str): Path to save data
+        """
+        await self._call(self._storage.save, data, path)
+
+    async def load(self, path: str) -> bytes:
+        """
+        Load data from a given path on the pool
+        Args:
+            path (str): Path to load data
+        Returns:
+            bytes: Loaded data
+        """
+        return await self._call(self._storage.load, path)
+
+    async def delete(self, path: str) -> None:
+        """
+        Delete data at a given path on the pool
+        Args:
+            path (str): Path to delete data
+        """
+        await self._call(self._storage.delete, path)
+
+    async def list(self, path: str) -> list:
+        """
+        List all paths under a given path on the pool
+        Args:
+            path (str): Path to list
+        Returns:
+            list: List of paths
+        """
+        return await self._call(self._storage.list, path)
+
+    async def _call(self, function: Callable[..., T], *args: object) -> T:
+        """Run a blocking call on the pool, in the caller's context.
+        Args:
+            function (Callable[..., T]): The blocking storage method
+            *args (object): Its arguments
+        Returns:
+            T: Its result
+        """
+        if self._executor is None:
+            # started on first use, its threads are reused afterwards
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_concurrency,
+                thread_name_prefix="storage")
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(context.run, function, *args))
+
+
+class AsyncLocalStorage(ThreadedStorage):
+    """Asynchronous storage of files under a local directory."""
+
+    def __init__(self, base_path: str = "./assets",
+                 max_concurrency: int = 32) -> None:
+        """Open or create a directory.
+        Args:
+            base_path (str): Directory holding the files
+            max_concurrency (int): Most operations run at the same time
+        """
+        super().__init__(LocalStorage(base_path), max_concurrency)
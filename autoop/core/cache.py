@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from threading import RLock
+from typing import Callable, Hashable, List
+
+
+class LRUCache:
+    """A thread-safe cache bounded by the total size of its values.
+
+    When adding a value would exceed `max_size`, the least recently used
+    values are evicted first. Values larger than `max_size` on their own
+    are not cached at all.
+    """
+
+    def __init__(self, max_size: int,
+                 size_of: Callable[[object], int] = len,
+                 on_evict: Callable[[Hashable, object], None] = None
+                 ) -> None:
+        """Create an empty cache.
+        Args:
+            max_size (int): The maximum total size of the cached values
+            size_of (Callable[[object], int]): Computes the size of a value,
+                by default its length in bytes
+            on_evict (Callable[[Hashable, object], None]): Called with the
+                key and value of every entry evicted to make room
+        """
+        self._max_size = max_size
+        self._size_of = size_of
+        self._on_evict = on_evict
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = RLock()
+
+    @property
+    def size(self) -> int:
+        """The total size of the cached values."""
+        return self._size
+
+    @property
+    def max_size(self) -> int:
+        """The maximum total size of the cached values."""
+        return self._max_size
+
+    def __len__(self) -> int:
+        """The number of cached values."""
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check whether a key is cached, without touching its recency."""
+        return key in self._items
+
+    def get(self, key: Hashable, default: object = None) -> object:
+        """Get a cached value and mark it as most recently used.
+        Args:
+            key (Hashable): The key of the value
+            default (object): Returned if the key is not cached
+        Returns:
+            object: The cached value or `default`
+        """
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def put(self, key: Hashable, value: object) -> None:
+        """Cache a value, evicting least recently used values if needed.
+        Args:
+            key (Hashable): The key of the value
+            value (object): The value to cache
+        """
+        size = self._size_of(value)
+        with self._lock:
+            self.invalidate(key)
+            if size > self._max_size:
+                return
+            self._items[key] = (value, size)
+            self._size += size
+            while self._size > self._max_size:
+                evicted, (old, old_size) = self._items.popitem(last=False)
+                self._size -= old_size
+                if self._on_evict is not None:
+                    self._on_evict(evicted, old)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a key from the cache if it is present.
+        Args:
+            key (Hashable): The key to remove
+        """
+        with self._lock:
+            if key in self._items:
+                _, size = self._items.pop(key)
+                self._size -= size
+
+    def keys(self) -> List[Hashable]:
+        """The cached keys, least recently used first."""
+        with self._lock:
+            return list(self._items)
+
+    def clear(self) -> None:
+        """Remove every value from the cache."""
+        with self._lock:
+            self._items.clear()
+            self._size = 0
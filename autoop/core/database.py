@@ -1,14 +1,46 @@
 
 import json
-from typing import Dict, Tuple, List, Union
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, Tuple, List, Union
 
-from autoop.core.storage import Storage
+from autoop.core.async_storage import ThreadedStorage, run
+from autoop.core.profiling import record_io
+from autoop.core.storage import AlreadyExistsError, NotFoundError, Storage
 
 class Database():
+    # Every flush bumps a generation counter stored next to the data and
+    # writes a small change record listing the keys it touched, so that
+    # `refresh` can catch up by replaying only the newer change records.
+    _META = ".meta"
+    _GENERATION_KEY = f"{_META}/generation"
+    _INDEXES_KEY = f"{_META}/indexes"
+    _CHANGES_KEPT = 1000
 
-    def __init__(self, storage: Storage):
+    def __init__(self, storage: Storage, max_concurrency: int = 32,
+                 indexes: Dict[str, List[str]] = None):
+        """Open a database and load its entries.
+        Args:
+            storage (Storage): The storage holding the entries
+            max_concurrency (int): Most entries read at the same time
+                when loading or refreshing
+            indexes (Dict[str, List[str]]): Fields to index per
+                collection, see `create_index`
+        """
         self._storage = storage
+        self._async_storage = ThreadedStorage(storage, max_concurrency)
         self._data = {}
+        # collection -> field -> value key -> ids, kept in insertion
+        # order as dict keys; see `_index_keys`
+        self._indexes = {collection: {field: {} for field in fields}
+                         for collection, fields in (indexes or {}).items()}
+        self._indexes_changed = False
+        # keys changed since the last flush, and the entries they held
+        # before the current transaction started (None if absent)
+        self._dirty = set()
+        self._deleted = set()
+        self._undo = {}
+        self._transaction_depth = 0
+        self._generation = 0
         self._load()
 
     def set(self, collection: str, id: str, entry: dict) -> dict:
@@ -23,9 +55,10 @@ class Database():
         assert isinstance(entry, dict), "Data must be a dictionary"
         assert isinstance(collection, str), "Collection must be a string"
         assert isinstance(id, str), "ID must be a string"
-        if not self._data.get(collection, None):
-            self._data[collection] = {}
-        self._data[collection][id] = entry
+        self._remember(collection, id)
+        self._put(collection, id, entry)
+        self._dirty.add((collection, id))
+        self._deleted.discard((collection, id))
         self._persist()
         return entry
 
@@ -51,8 +84,11 @@ class Database():
         """
         if not self._data.get(collection, None):
             return
-        if self._data[collection].get(id, None):
-            del self._data[collection][id]
+        if id in self._data[collection]:
+            self._remember(collection, id)
+            self._pop(collection, id)
+            self._deleted.add((collection, id))
+            self._dirty.discard((collection, id))
         self._persist()
 
     def list(self, collection: str) -> List[Tuple[str, dict]]:
@@ -66,33 +102,336 @@ class Database():
             return []
         return [(id, data) for id, data in self._data[collection].items()]
 
+    def create_index(self, collection: str, field: str) -> None:
+        """Maintain a secondary index on a field of a collection.
+
+        Indexes are kept up to date on every change and rebuilt when the
+        database is loaded; the indexed fields are persisted with the
+        data, so other readers index them too. `query` finds entries
+        without scanning the collection. A list field, such as tags, is
+        indexed by each of its elements. Entries must not be mutated after
+        they are set.
+        Args:
+            collection (str): The collection to index
+            field (str): The field of its entries to index
+        """
+        if field in self._indexes.get(collection, {}):
+            return
+        self._build_index(collection, field)
+        self._indexes_changed = True
+        self._persist()
+
+    def query(self, collection: str, **conditions: Any) -> List[str]:
+        """Find the ids of the entries matching all conditions.
+
+        A condition matches entries whose field equals the value, or, for
+        a list field, contains it. Conditions on indexed fields are
+        answered from the indexes; any others only check the entries
+        those leave, or scan the collection if no field is indexed. List
+        values are always checked on the entries, as the indexes only
+        hold the elements of list fields.
+
+        Example:
+            db.query("artifacts", type="dataset", tags="public")
+        Args:
+            collection (str): The collection to search
+            **conditions (Any): The value required for each field
+        Returns:
+            List[str]: The ids of the matching entries
+        """
+        entries = self._data.get(collection, {})
+        indexes = self._indexes.get(collection, {})
+        matches = []
+        scanned = {}
+        for field, value in conditions.items():
+            if field in indexes and not isinstance(value, list):
+                matches.append(indexes[field].get(
+                    self._index_key(value), {}))
+            else:
+                scanned[field] = value
+        if matches:
+            matches.sort(key=len)
+            ids = [id for id in matches[0]
+                   if all(id in match for match in matches[1:])]
+        else:
+            ids = list(entries)
+        return [id for id in ids
+                if all(self._matches(entries[id], field, value)
+                       for field, value in scanned.items())]
+
     def refresh(self):
-        """Refresh the database by loading the data from storage"""
-        self._load()
+        """Refresh the database by loading the data from storage
+
+        Only entries changed since the last load are read again; if
+        nothing changed this costs a single read of the generation counter.
+        """
+        with record_io("database.refresh"):
+            generation = self._read_generation()
+            if generation == self._generation:
+                return
+            changes = self._read_changes(self._generation + 1, generation)
+            if changes is None:
+                # too far behind or the counter went back: reload everything
+                self._load()
+                return
+            # replay the changes in order, then read every key that is
+            # still set in one concurrent batch
+            changed = {}
+            for change in changes:
+                for key in change["set"]:
+                    changed[key] = True
+                for key in change["deleted"]:
+                    changed[key] = False
+            keys = [key for key, is_set in changed.items() if is_set]
+            payloads = run(self._async_storage.load_many(keys,
+                                                         missing_ok=True))
+            loaded = dict(zip(keys, payloads))
+            for key, is_set in changed.items():
+                collection, id = key.split("/")
+                if loaded.get(key) is None:
+                    # deleted, possibly again by a writer after the
+                    # generation we read
+                    self._pop(collection, id)
+                    continue
+                self._put(collection, id, json.loads(loaded[key].decode()))
+            self._generation = generation
+
+    @contextmanager
+    def transaction(self) -> Iterator["Database"]:
+        """Batch several changes into a single flush to storage.
+
+        Changes made inside the block are visible immediately but only
+        written when the outermost transaction exits. If the block raises,
+        the changes are rolled back and nothing is written; a nested
+        block that raises is rolled back with its outermost transaction.
+
+        Example:
+            with db.transaction():
+                for id, entry in entries.items():
+                    db.set("collection", id, entry)
+        Returns:
+            Iterator[Database]: The database itself
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._rollback()
+            raise
+        self._transaction_depth -= 1
+        self._persist()
+
+    def _remember(self, collection: str, id: str) -> None:
+        """Record the entry a key held before the current transaction"""
+        if self._transaction_depth and (collection, id) not in self._undo:
+            entry = self._data.get(collection, {}).get(id, None)
+            self._undo[(collection, id)] = entry
+
+    def _rollback(self) -> None:
+        """Undo the changes of the current transaction"""
+        for (collection, id), entry in self._undo.items():
+            if entry is None:
+                self._pop(collection, id)
+            else:
+                self._put(collection, id, entry)
+        self._undo = {}
+        self._dirty = set()
+        self._deleted = set()
 
     def _persist(self):
-        """Persist the data to storage"""
-        for collection, data in self._data.items():
-            if not data:
-                continue
-            for id, item in data.items():
-                self._storage.save(json.dumps(item).encode(), f"{collection}/{id}")
-
-        # for things that were deleted, we need to remove them from the storage
-        keys = self._storage.list("")
-        for key in keys:
-            collection, id = key.split("/")[-2:]
-            if not self._data.get(collection, id):
-                self._storage.delete(f"{collection}/{id}")
+        """Persist the changed entries to storage"""
+        if self._transaction_depth:
+            return
+        with record_io("database.flush"):
+            self._storage.save_many({
+                f"{collection}/{id}": json.dumps(
+                    self._data[collection][id]).encode()
+                for collection, id in self._dirty})
+            # an entry may have been set and deleted again before it was
+            # ever written
+            self._storage.delete_many(
+                [f"{collection}/{id}" for collection, id in self._deleted],
+                missing_ok=True)
+            changed = bool(self._dirty or self._deleted)
+            if changed:
+                self._write_change()
+            if self._indexes_changed:
+                self._write_indexes()
+            self._dirty = set()
+            self._deleted = set()
+            self._undo = {}
+
+    def _put(self, collection: str, id: str, entry: dict) -> None:
+        """Store an entry in memory and update the indexes"""
+        self._pop(collection, id)
+        self._data.setdefault(collection, {})[id] = entry
+        for field, index in self._indexes.get(collection, {}).items():
+            for key in self._index_keys(entry, field):
+                index.setdefault(key, {})[id] = None
+
+    def _pop(self, collection: str, id: str) -> None:
+        """Remove an entry from memory and from the indexes"""
+        entry = self._data.get(collection, {}).pop(id, None)
+        if entry is None:
+            return
+        for field, index in self._indexes.get(collection, {}).items():
+            for key in self._index_keys(entry, field):
+                ids = index.get(key)
+                if ids is not None:
+                    ids.pop(id, None)
+                    if not ids:
+                        del index[key]
+
+    @classmethod
+    def _index_key(cls, value: object) -> Hashable:
+        """The key of a value in an index
+
+        Two keys are equal exactly when the values compare equal, as in
+        `_matches`: numbers compare by value, so 1, 1.0 and True share a
+        key, and nested lists and dicts are made hashable.
+        """
+        if isinstance(value, dict):
+            return ("dict", frozenset((key, cls._index_key(item))
+                                      for key, item in value.items()))
+        if isinstance(value, (list, tuple)):
+            return (type(value).__name__,
+                    tuple(cls._index_key(item) for item in value))
+        return value
+
+    @classmethod
+    def _index_keys(cls, entry: dict, field: str) -> List[Hashable]:
+        """The keys under which an entry is indexed for a field"""
+        if field not in entry:
+            return []
+        value = entry[field]
+        values = value if isinstance(value, list) else [value]
+        return [cls._index_key(value) for value in values]
+
+    @staticmethod
+    def _matches(entry: dict, field: str, value: Any) -> bool:
+        """Whether a field of an entry equals or contains a value"""
+        if field not in entry:
+            return False
+        if isinstance(entry[field], list):
+            return value in entry[field]
+        return entry[field] == value
+
+    def _build_index(self, collection: str, field: str) -> None:
+        """Index a field over the entries of a collection"""
+        index = {}
+        for id, entry in self._data.get(collection, {}).items():
+            for key in self._index_keys(entry, field):
+                index.setdefault(key, {})[id] = None
+        self._indexes.setdefault(collection, {})[field] = index
+
+    def _write_indexes(self) -> None:
+        """Persist which fields are indexed, not the indexes themselves
+
+        `_load` reads every entry anyway, so the indexes are rebuilt in
+        memory there and a flush costs the same with or without them.
+        """
+        declared = {collection: sorted(fields)
+                    for collection, fields in self._indexes.items()}
+        self._storage.save(json.dumps(declared).encode(), self._INDEXES_KEY)
+        self._indexes_changed = False
+
+    def _read_indexes(self) -> None:
+        """Build the indexes declared here or by earlier writers"""
+        try:
+            stored = json.loads(self._storage.load(self._INDEXES_KEY))
+        except NotFoundError:
+            stored = {}
+        fields = {collection: set(names) for collection, names
+                  in stored.items()}
+        for collection, names in self._indexes.items():
+            if not set(names) <= fields.get(collection, set()):
+                # declared here but not persisted yet
+                self._indexes_changed = True
+            fields.setdefault(collection, set()).update(names)
+        self._indexes = {}
+        for collection, names in fields.items():
+            for field in sorted(names):
+                self._build_index(collection, field)
+
+    def _read_generation(self) -> int:
+        """Read the generation counter, 0 if nothing was written yet"""
+        try:
+            return int(self._storage.load(self._GENERATION_KEY).decode())
+        except NotFoundError:
+            return 0
+
+    def _read_changes(self, first: int, last: int) -> Union[List[dict], None]:
+        """Read the change records of generations `first` to `last`
+
+        Returns None if any of them is no longer available.
+        """
+        if first > last + 1:
+            return None
+        changes = []
+        for generation in range(first, last + 1):
+            try:
+                data = self._storage.load(f"{self._META}/{generation}")
+            except NotFoundError:
+                return None
+            changes.append(json.loads(data.decode()))
+        return changes
+
+    def _write_change(self) -> None:
+        """Record the flushed keys under a new generation
+
+        The change record is claimed with an exclusive create, so two
+        writers that read the same counter never overwrite each other's
+        record: the later one moves on to the next generation.
+        """
+        stored = self._read_generation()
+        change = json.dumps({
+            "set": [f"{collection}/{id}" for collection, id in self._dirty],
+            "deleted": [f"{collection}/{id}"
+                        for collection, id in self._deleted],
+        }).encode()
+        generation = stored + 1
+        while True:
+            try:
+                self._storage.create(change, f"{self._META}/{generation}")
+                break
+            except AlreadyExistsError:
+                generation += 1
+        # the counter only moves forward, even if a writer that claimed a
+        # later generation got there first
+        if self._read_generation() < generation:
+            self._storage.save(str(generation).encode(),
+                               self._GENERATION_KEY)
+        # only advance if no other writer got in between; otherwise the
+        # next refresh replays their changes as well
+        if stored == self._generation and generation == stored + 1:
+            self._generation = generation
+        try:
+            self._storage.delete(
+                f"{self._META}/{generation - self._CHANGES_KEPT}")
+        except NotFoundError:
+            pass
     
     def _load(self):
         """Load the data from storage"""
-        self._data = {}
-        for key in self._storage.list(""):
-            collection, id = key.split("/")[-2:]
-            data = self._storage.load(f"{collection}/{id}")
-            # Ensure the collection exists in the dictionary
-            if collection not in self._data:
-                self._data[collection] = {}
-            self._data[collection][id] = json.loads(data.decode())
-
+        with record_io("database.load"):
+            self._data = {}
+            self._generation = self._read_generation()
+            keys = []
+            for key in self._storage.list(""):
+                parts = key.split("/")
+                # skip the metadata and any stray file not in a collection
+                if len(parts) != 2 or parts[0] == self._META:
+                    continue
+                keys.append((parts[0], parts[1]))
+            # entries are read concurrently, so the load takes about as
+            # long as the slowest batch rather than the sum of all reads
+            payloads = run(self._async_storage.load_many(
+                [f"{collection}/{id}" for collection, id in keys]))
+            for (collection, id), data in zip(keys, payloads):
+                # Ensure the collection exists in the dictionary
+                if collection not in self._data:
+                    self._data[collection] = {}
+                self._data[collection][id] = json.loads(data.decode())
+            self._read_indexes()
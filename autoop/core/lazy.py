@@ -0,0 +1,39 @@
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_attributes(module_name: str, attributes: Dict[str, str]
+                    ) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Build the `__getattr__` and `__dir__` of a module with lazy attributes.
+
+    Each attribute is imported from its module on first access and then
+    stored in the module, so later accesses cost nothing (PEP 562). This
+    keeps heavy dependencies, such as scikit-learn, out of the import of
+    a package until one of its attributes is used.
+
+    Example:
+        __getattr__, __dir__ = lazy_attributes(__name__, {
+            "Lasso": "autoop.core.ml.model.regression.lasso",
+        })
+    Args:
+        module_name (str): The name of the module, `__name__`
+        attributes (Dict[str, str]): Maps each attribute to the module
+            defining it
+    Returns:
+        Tuple[Callable[[str], Any], Callable[[], List[str]]]: The
+            `__getattr__` and `__dir__` of the module
+    """
+    module = importlib.import_module(module_name)
+
+    def __getattr__(name: str) -> Any:
+        if name not in attributes:
+            raise AttributeError(
+                f"module {module_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(attributes[name]), name)
+        setattr(module, name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(module)) | set(attributes))
+
+    return __getattr__, __dir__
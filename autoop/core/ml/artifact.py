@@ -1,5 +1,69 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 import base64
+from typing import Any, Callable, Dict, List, Optional
+
 
 class Artifact(BaseModel):
-    pass
\ No newline at end of file
+    """An asset stored at `asset_path` together with its description.
+
+    The data can be given directly or through a `loader`, in which case
+    it is only fetched the first time `data` is accessed. This lets the
+    registry hand out artifacts that cost nothing until they are used.
+    """
+    name: str
+    asset_path: str = ""
+    version: str = "1.0.0"
+    type: str = "other"
+    tags: List[str] = Field(default_factory=list)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    _data: Optional[bytes] = PrivateAttr(default=None)
+    _loader: Optional[Callable[[], bytes]] = PrivateAttr(default=None)
+
+    def __init__(self, data: bytes = None,
+                 loader: Callable[[], bytes] = None, **kwargs) -> None:
+        """Create an artifact.
+        Args:
+            data (bytes): The raw data of the artifact
+            loader (Callable[[], bytes]): Fetches the data on first access
+                when `data` is not given
+        """
+        super().__init__(**kwargs)
+        self._data = data
+        self._loader = loader if data is None else None
+
+    @property
+    def id(self) -> str:
+        """The id of the artifact, `{base64(asset_path)}:{version}`.
+
+        The url-safe alphabet is used so that the id never contains a
+        path separator and can be used directly as a storage key.
+        """
+        path = base64.urlsafe_b64encode(self.asset_path.encode()).decode()
+        return f"{path}:{self.version}"
+
+    @property
+    def data(self) -> bytes:
+        """The raw data of the artifact, loaded on first access."""
+        if self._data is None:
+            self._data = self._loader() if self._loader else b""
+            self._loader = None
+        return self._data
+
+    @data.setter
+    def data(self, data: bytes) -> None:
+        self._data = data
+        self._loader = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the data has been fetched already."""
+        return self._data is not None or self._loader is None
+
+    def read(self) -> bytes:
+        """ Read the raw data of the artifact """
+        return self.data
+
+    def save(self, data: bytes) -> bytes:
+        """ Replace the raw data of the artifact """
+        self.data = data
+        return self.data
@@ -0,0 +1,374 @@
+import json
+import struct
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"AUTOOPC1"
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+
+Buffer = Union[bytes, bytearray, memoryview]
+# Rows are selected by a range or by an array of row indices.
+Rows = Union[slice, np.ndarray]
+
+_PREFIX = struct.Struct("<8sQ")
+
+
+def _padding(offset: int) -> int:
+    """Number of bytes needed to align `offset` to `ALIGNMENT`."""
+    return -offset % ALIGNMENT
+
+
+def _as_bytes(array: np.ndarray) -> np.ndarray:
+    """View an array as a flat, C-contiguous uint8 array."""
+    return np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+
+
+def is_columnar(data: Buffer) -> bool:
+    """Check whether a buffer holds the columnar format.
+    Args:
+        data (Buffer): The buffer to check
+    Returns:
+        bool: True if the buffer starts with the format's magic bytes
+    """
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def pack(arrays: Dict[str, np.ndarray], meta: dict = None) -> bytes:
+    """Pack named arrays and a JSON header into a single buffer.
+
+    Layout: magic, header length, JSON header, then every array as raw
+    bytes aligned to `ALIGNMENT` so it can be viewed in place on load.
+    Args:
+        arrays (Dict[str, np.ndarray]): The arrays to pack
+        meta (dict): JSON-serialisable data stored in the header
+    Returns:
+        bytes: The packed buffer
+    """
+    entries = []
+    payload = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(f"Cannot pack object array '{name}'")
+        raw = _as_bytes(array)
+        entries.append({
+            "name": name,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+            "nbytes": raw.nbytes,
+        })
+        payload.append(raw)
+        pad = _padding(raw.nbytes)
+        if pad:
+            payload.append(b"\x00" * pad)
+        offset += raw.nbytes + pad
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "meta": meta or {},
+        "buffers": entries,
+    }).encode()
+    prefix = _PREFIX.pack(MAGIC, len(header))
+    head_pad = b"\x00" * _padding(len(prefix) + len(header))
+    return b"".join([prefix, header, head_pad, *payload])
+
+
+class ColumnarReader:
+    """Lazy reader over a packed buffer.
+
+    Only the header is parsed up front; arrays are returned as views on
+    the underlying buffer, so reading one array from a memory-mapped file
+    only pages in that array's bytes.
+    """
+
+    def __init__(self, data: Buffer) -> None:
+        """Parse the header of a packed buffer.
+        Args:
+            data (Buffer): The packed buffer, e.g. bytes or an mmap
+        """
+        if not is_columnar(data):
+            raise ValueError("Buffer is not in the columnar format")
+        _, header_len = _PREFIX.unpack_from(data, 0)
+        start = _PREFIX.size
+        header = json.loads(bytes(data[start:start + header_len]))
+        if header["version"] > FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported columnar version: {header['version']}")
+        self._data = data
+        self._meta = header["meta"]
+        self._buffers = {entry["name"]: entry for entry in header["buffers"]}
+        end = start + header_len
+        self._data_start = end + _padding(end)
+
+    @property
+    def buffer(self) -> Buffer:
+        """The buffer the arrays are read from."""
+        return self._data
+
+    @property
+    def meta(self) -> dict:
+        """The metadata stored in the header."""
+        return self._meta
+
+    @property
+    def names(self) -> List[str]:
+        """The names of all stored arrays."""
+        return list(self._buffers)
+
+    def __contains__(self, name: str) -> bool:
+        """Check whether an array is stored under `name`."""
+        return name in self._buffers
+
+    def nbytes(self, name: str) -> int:
+        """Size in bytes of a stored array."""
+        return self._buffers[name]["nbytes"]
+
+    def array(self, name: str) -> np.ndarray:
+        """Get a zero-copy view of a stored array.
+        Args:
+            name (str): The name of the array
+        Returns:
+            np.ndarray: A read-only view on the buffer
+        """
+        entry = self._buffers[name]
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        count = int(np.prod(shape, dtype=np.int64))
+        array = np.frombuffer(
+            self._data,
+            dtype=dtype,
+            count=count,
+            offset=self._data_start + entry["offset"],
+        )
+        return array.reshape(shape)
+
+
+def unpack(data: Buffer) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """Unpack a buffer created by `pack`.
+    Args:
+        data (Buffer): The packed buffer
+    Returns:
+        Tuple[dict, Dict[str, np.ndarray]]: The header metadata and views
+            on every stored array
+    """
+    reader = ColumnarReader(data)
+    return reader.meta, {name: reader.array(name) for name in reader.names}
+
+
+def _encode_strings(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as concatenated UTF-8 bytes plus int64 offsets."""
+    encoded = [str(value).encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(raw: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Inverse of `_encode_strings`, returning an object array."""
+    data = raw.tobytes()
+    bounds = offsets.tolist()
+    values = np.empty(len(bounds) - 1, dtype=object)
+    values[:] = [data[bounds[i]:bounds[i + 1]].decode()
+                 for i in range(len(values))]
+    return values
+
+
+def encode_column(series: pd.Series, key: str,
+                  arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Encode one column into arrays named after `key`.
+    Args:
+        series (pd.Series): The column
+        key (str): Prefix of the names of its arrays
+        arrays (Dict[str, np.ndarray]): Arrays to `pack`, updated in place
+    Returns:
+        Dict[str, Any]: The JSON-serialisable schema of the column
+    """
+    dtype = series.dtype
+    schema = {"dtype": str(dtype)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        arrays[f"{key}.codes"] = series.cat.codes.to_numpy()
+        categories = pd.Series(dtype.categories)
+        schema["kind"] = "categorical"
+        schema["ordered"] = bool(dtype.ordered)
+        schema["categories"] = encode_column(
+            categories, f"{key}.categories", arrays)
+        return schema
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        arrays[key] = series.to_numpy()
+        schema["kind"] = "numpy"
+        return schema
+    extension = isinstance(dtype, pd.api.extensions.ExtensionDtype)
+    if extension and dtype.kind in "biuf":
+        mask = series.isna().to_numpy()
+        values = series.to_numpy(dtype=dtype.numpy_dtype,
+                                 na_value=dtype.numpy_dtype.type(0))
+        arrays[key] = values
+        arrays[f"{key}.mask"] = mask
+        schema["kind"] = "masked"
+        return schema
+    # Strings and other objects are dictionary encoded: each distinct value
+    # is stored once, which keeps low-cardinality text columns small and
+    # means decoding only has to build one Python object per distinct value.
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    raw, offsets = _encode_strings(uniques)
+    arrays[f"{key}.codes"] = codes.astype(np.int32, copy=False)
+    arrays[f"{key}.values"] = raw
+    arrays[f"{key}.offsets"] = offsets
+    schema["kind"] = "dictionary"
+    return schema
+
+
+def decode_column(reader: ColumnarReader, key: str,
+                  schema: Dict[str, Any], rows: Rows = None
+                  ) -> Union[np.ndarray, pd.Series]:
+    """Rebuild a column, or a range of its rows, written by `encode_column`.
+    Args:
+        reader (ColumnarReader): Reader of the packed buffer
+        key (str): The key the column was encoded with
+        schema (Dict[str, Any]): The schema returned by `encode_column`
+        rows (Rows): The rows to decode, all if None
+    Returns:
+        Union[np.ndarray, pd.Series]: The column values
+    """
+    rows = rows if rows is not None else slice(None)
+    kind = schema["kind"]
+    if kind == "numpy":
+        return reader.array(key)[rows]
+    if kind == "masked":
+        values = pd.array(reader.array(key)[rows], dtype=schema["dtype"])
+        values[reader.array(f"{key}.mask")[rows]] = pd.NA
+        return values
+    if kind == "categorical":
+        categories = decode_column(
+            reader, f"{key}.categories", schema["categories"])
+        return pd.Categorical.from_codes(
+            reader.array(f"{key}.codes")[rows],
+            categories=categories,
+            ordered=schema["ordered"],
+        )
+    uniques = _dictionary(reader, key)
+    # Missing values are stored as code -1, which picks the trailing None.
+    values = uniques[reader.array(f"{key}.codes")[rows]]
+    if schema["dtype"] == "object":
+        return pd.Series(values, dtype=object, copy=False)
+    try:
+        return pd.array(values, dtype=schema["dtype"])
+    except TypeError:
+        return values
+
+
+def _dictionary(reader: ColumnarReader, key: str) -> np.ndarray:
+    """The distinct values of a dictionary column, followed by None.
+
+    A `TableReader` decodes them once, so reading a column in chunks does
+    not decode its dictionary again for every chunk.
+    """
+    decoded = getattr(reader, "_dictionaries", {})
+    if key not in decoded:
+        uniques = _decode_strings(reader.array(f"{key}.values"),
+                                  reader.array(f"{key}.offsets"))
+        decoded[key] = np.append(uniques, None)
+    return decoded[key]
+
+
+def encode_dataframe(data: pd.DataFrame) -> bytes:
+    """Encode a dataframe into the columnar format.
+
+    Every column is stored as typed buffers (values, masks, dictionary
+    codes) so that dtypes survive the round trip without any parsing.
+    Args:
+        data (pd.DataFrame): The dataframe to encode
+    Returns:
+        bytes: The encoded table
+    """
+    arrays = {}
+    columns = []
+    for i, name in enumerate(data.columns):
+        schema = encode_column(data.iloc[:, i], f"c{i}", arrays)
+        schema["name"] = str(name)
+        schema["key"] = f"c{i}"
+        columns.append(schema)
+    meta = {"kind": "table", "num_rows": len(data), "columns": columns}
+    return pack(arrays, meta)
+
+
+class TableReader(ColumnarReader):
+    """Reader for tables written by `encode_dataframe`."""
+
+    def __init__(self, data: Buffer) -> None:
+        """Parse the header and the table schema.
+        Args:
+            data (Buffer): The encoded table
+        """
+        super().__init__(data)
+        if self.meta.get("kind") != "table":
+            raise ValueError("Buffer does not contain a table")
+        self._columns = {column["name"]: column
+                         for column in self.meta["columns"]}
+        self._dictionaries = {}
+
+    @property
+    def columns(self) -> List[str]:
+        """The names of the columns, in order."""
+        return list(self._columns)
+
+    @property
+    def num_rows(self) -> int:
+        """The number of rows in the table."""
+        return self.meta["num_rows"]
+
+    def column(self, name: str, rows: Rows = None
+               ) -> Union[np.ndarray, pd.Series]:
+        """Decode a single column.
+
+        Numeric columns are returned as read-only views on the buffer.
+        Args:
+            name (str): The name of the column
+            rows (Rows): The rows to decode, all if None
+        Returns:
+            Union[np.ndarray, pd.Series]: The column values
+        """
+        if name not in self._columns:
+            raise KeyError(f"Column not found: {name}")
+        schema = self._columns[name]
+        return decode_column(self, schema["key"], schema, rows)
+
+    def read(self, columns: List[str] = None,
+             rows: Rows = None) -> pd.DataFrame:
+        """Decode the table, or only some of its columns and rows.
+        Args:
+            columns (List[str]): The columns to read, all if None
+            rows (Rows): The rows to read, all if None
+        Returns:
+            pd.DataFrame: The decoded table, indexed by row number
+        """
+        if columns is None:
+            columns = self.columns
+        rows = rows if rows is not None else slice(None)
+        index = pd.RangeIndex(self.num_rows)[rows]
+        # decoded series carry their own index from 0, so the frame is
+        # built on that and renumbered afterwards instead of realigned
+        data = pd.DataFrame(
+            {name: self.column(name, rows) for name in columns},
+            index=pd.RangeIndex(len(index)),
+            columns=columns,
+        )
+        data.index = index
+        return data
+
+
+def decode_dataframe(data: Buffer, columns: List[str] = None
+                     ) -> pd.DataFrame:
+    """Decode a table written by `encode_dataframe`.
+    Args:
+        data (Buffer): The encoded table
+        columns (List[str]): The columns to read, all if None
+    Returns:
+        pd.DataFrame: The decoded table
+    """
+    return TableReader(data).read(columns)
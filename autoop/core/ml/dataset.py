@@ -1,32 +1,339 @@
 from autoop.core.ml.artifact import Artifact
+from autoop.core.ml.columnar import (
+    Buffer,
+    Rows,
+    TableReader,
+    encode_dataframe,
+    is_columnar,
+)
+from autoop.core.ml.statistics import DatasetStatistics, statistics_path
+from autoop.core.ml.slicing import Predicate, select_rows
+from autoop.core.storage import NotFoundError, Storage
 from abc import ABC, abstractmethod
+from pydantic import PrivateAttr
+from typing import IO, Callable, Iterator, List, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
+import hashlib
 import io
 
 
 class Dataset(Artifact):
-    """A class to represent an ML dataset"""
-    def __init__(self, *args, **kwargs):
+    """A class to represent an ML dataset
+
+    The data is stored in the binary columnar format from
+    `autoop.core.ml.columnar`; CSV is only used to import and export.
+    """
+    _buffer: Optional[Buffer] = PrivateAttr(default=None)
+    # opens the stored buffer on first use, see `from_storage`
+    _buffer_loader: Optional[Callable[[], Buffer]] = PrivateAttr(
+        default=None)
+    _table: Optional[TableReader] = PrivateAttr(default=None)
+    _statistics: Optional[DatasetStatistics] = PrivateAttr(default=None)
+    _statistics_loader: Optional[Callable[[], Buffer]] = PrivateAttr(
+        default=None)
+    # rows of the stored table seen by a view, see `take`
+    _rows: Optional[np.ndarray] = PrivateAttr(default=None)
+    _fingerprint: Optional[str] = PrivateAttr(default=None)
+    # computes the fingerprint of a view from that of its parent
+    _fingerprint_loader: Optional[Callable[[], str]] = PrivateAttr(
+        default=None)
+
+    def __init__(self, *args,
+                 statistics_loader: Callable[[], Buffer] = None,
+                 buffer_loader: Callable[[], Buffer] = None, **kwargs):
         super().__init__(type="dataset", *args, **kwargs)
+        self._statistics_loader = statistics_loader
+        self._buffer_loader = buffer_loader
 
     @staticmethod
-    def from_dataframe(data: pd.DataFrame, name: str,
-                       asset_path: str, version: str = "1.0.0"):
+    def from_dataframe(data: pd.DataFrame, name: str, asset_path: str,
+                       version: str = "1.0.0") -> "Dataset":
         """ Create a dataset from a pandas dataframe."""
         return Dataset(
             name=name,
             asset_path=asset_path,
-            data=data.to_csv(index=False).encode(),
+            data=encode_dataframe(data),
             version=version,
         )
 
-    def read(self) -> pd.DataFrame:
-        """ Read data from a given path """
-        bytes = super().read()
-        csv = bytes.decode()
-        return pd.read_csv(io.StringIO(csv))
+    @staticmethod
+    def from_csv(csv: Union[str, bytes, IO], name: str,
+                 asset_path: str, version: str = "1.0.0") -> "Dataset":
+        """ Import a dataset from CSV text, bytes or a file-like object."""
+        if isinstance(csv, bytes):
+            csv = io.BytesIO(csv)
+        elif isinstance(csv, str):
+            csv = io.StringIO(csv)
+        return Dataset.from_dataframe(
+            pd.read_csv(csv), name, asset_path, version)
+
+    @staticmethod
+    def from_storage(storage: Storage, asset_path: str, name: str = None,
+                     version: str = "1.0.0") -> "Dataset":
+        """ Open a stored dataset without reading it into memory.
+
+        With `LocalStorage` the asset is memory-mapped, so columns are
+        only paged in when they are read and the table can be larger
+        than the available RAM. `data` is only loaded, as a copy, if it
+        is accessed directly.
+        """
+        dataset = Dataset(
+            name=name if name is not None else asset_path,
+            asset_path=asset_path,
+            version=version,
+            loader=lambda: storage.load(asset_path),
+            statistics_loader=lambda: storage.load_buffer(
+                statistics_path(asset_path)),
+        )
+        dataset._buffer = storage.load_buffer(asset_path)
+        return dataset
+
+    def _raw(self) -> Buffer:
+        """ The stored bytes, memory-mapped if opened from storage """
+        if self._buffer is None and self._buffer_loader is not None:
+            self._buffer = self._buffer_loader()
+            self._buffer_loader = None
+        if self._buffer is not None:
+            return self._buffer
+        return super().read()
+
+    def _reader(self) -> Optional[TableReader]:
+        """ The columnar reader, or None for legacy CSV data """
+        raw = self._raw()
+        if not is_columnar(raw):
+            return None
+        if self._table is None or self._table.buffer is not raw:
+            self._table = TableReader(raw)
+        return self._table
+
+    def _base_rows(self, rows: Rows = None) -> Optional[Rows]:
+        """ Map rows of this dataset to rows of the stored table """
+        if self._rows is None:
+            return rows
+        return self._rows if rows is None else self._rows[rows]
+
+    def _row_indices(self, rows: Rows) -> np.ndarray:
+        """ Normalise a range, mask or index array to row indices """
+        if isinstance(rows, slice):
+            return np.arange(*rows.indices(self.num_rows))
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            if len(rows) != self.num_rows:
+                raise ValueError("Row mask does not match the dataset")
+            return np.flatnonzero(rows)
+        if rows.dtype.kind not in "iu":
+            raise ValueError("Rows must be a slice, a mask or indices")
+        rows = rows.astype(np.int64)
+        if len(rows) and (rows.min() < -self.num_rows
+                          or rows.max() >= self.num_rows):
+            raise ValueError("Row index out of range")
+        return np.where(rows < 0, rows + self.num_rows, rows)
+
+    @property
+    def columns(self) -> List[str]:
+        """ The names of the columns of the dataset """
+        reader = self._reader()
+        if reader is None:
+            return list(self.read().columns)
+        return reader.columns
+
+    @property
+    def statistics(self) -> Optional[DatasetStatistics]:
+        """ Column statistics and zone maps stored at registration, if any.
+
+        They answer questions about the data, such as ranges and counts,
+        without reading it. A view has none: they describe the stored table.
+        """
+        if self._rows is not None:
+            return None
+        if self._statistics is None and self._statistics_loader is not None:
+            try:
+                self._statistics = DatasetStatistics(
+                    self._statistics_loader())
+            except NotFoundError:
+                self._statistics_loader = None
+        return self._statistics
+
+    @property
+    def fingerprint(self) -> str:
+        """ A hash of the content of the dataset.
+
+        Unlike `id`, it changes whenever the data does, even if the data
+        is stored again under the same path and version. The registry
+        stores it in `metadata` at registration, so that a registered
+        dataset is not hashed again; otherwise the stored buffer is
+        hashed once, on first use.
+        """
+        if self._fingerprint is None:
+            if self._fingerprint_loader is not None:
+                self._fingerprint = self._fingerprint_loader()
+            elif "fingerprint" in self.metadata:
+                self._fingerprint = self.metadata["fingerprint"]
+            else:
+                self._fingerprint = hashlib.blake2b(
+                    self._raw(), digest_size=16).hexdigest()
+        return self._fingerprint
+
+    @property
+    def is_view(self) -> bool:
+        """ Whether the dataset is a row view on another dataset """
+        return self._rows is not None
+
+    @property
+    def num_rows(self) -> int:
+        """ The number of rows of the dataset """
+        if self._rows is not None:
+            return len(self._rows)
+        reader = self._reader()
+        if reader is None:
+            # counted chunk by chunk on one column, so that the legacy CSV
+            # is never held parsed in memory as a whole
+            with pd.read_csv(io.BytesIO(self._raw()), usecols=[0],
+                             chunksize=64 * 1024) as chunks:
+                return sum(len(chunk) for chunk in chunks)
+        return reader.num_rows
+
+    def column(self, name: str, rows: Rows = None
+               ) -> Union[np.ndarray, pd.Series]:
+        """ Read a single column, optionally only some of its rows.
+
+        Numeric columns are returned as read-only views on the stored
+        buffer, so nothing is copied and only that column is paged in.
+        """
+        reader = self._reader()
+        if reader is None:
+            return self.read([name], rows)[name]
+        return reader.column(name, self._base_rows(rows))
+
+    def read(self, columns: List[str] = None,
+             rows: Rows = None) -> pd.DataFrame:
+        """ Read data, optionally only some columns and some rows """
+        reader = self._reader()
+        base = self._base_rows(rows)
+        if reader is not None:
+            data = reader.read(columns, base)
+        else:
+            # Datasets registered before the columnar format are plain CSV.
+            csv = bytes(self._raw()).decode()
+            data = pd.read_csv(io.StringIO(csv), usecols=columns)
+            data = data if base is None else data.iloc[base]
+        if self._rows is not None:
+            # a view is indexed by its own row numbers
+            data.index = pd.RangeIndex(self.num_rows)[
+                slice(None) if rows is None else rows]
+        return data
+
+    def take(self, rows: Rows) -> "Dataset":
+        """ A view on some rows of the dataset, without copying them.
+
+        The view shares the stored buffer and only holds the indices of
+        its rows, so it costs 8 bytes per row. It can be used anywhere a
+        dataset is, e.g. by `Pipeline`; its `data` is only encoded, as a
+        copy of its rows, if it is accessed, e.g. to register the view.
+        """
+        indices = self._base_rows(self._row_indices(rows))
+        indices = np.ascontiguousarray(indices, dtype=np.int64)
+        indices.flags.writeable = False
+        digest = hashlib.sha256(indices.tobytes()).hexdigest()[:16]
+        metadata = {"parent": self.id}
+        if "profile" in self.metadata:
+            metadata["profile"] = self.metadata["profile"]
+        view = Dataset(
+            name=self.name,
+            # a distinct path, so that caches keyed by id tell views apart
+            asset_path=f"{self.asset_path}#rows={digest}",
+            version=self.version,
+            tags=list(self.tags),
+            metadata=metadata,
+            loader=lambda: encode_dataframe(
+                view.read().reset_index(drop=True)),
+        )
+        view._buffer = self._raw()
+        view._rows = indices
+        view._fingerprint_loader = lambda: hashlib.sha256(
+            f"{self.fingerprint}#rows={digest}".encode()).hexdigest()[:32]
+        return view
+
+    def where(self, predicate: Predicate) -> "Dataset":
+        """ A view on the rows matching a predicate.
+
+        The predicate, e.g. "age > 18 and sex == 'F'" or
+        `("age", ">", 18)`, is evaluated as vectorized masks over only the
+        columns it uses, and row blocks that the zone maps in `statistics`
+        rule out are never read. See `autoop.core.ml.slicing`.
+        """
+        return self.take(select_rows(self, predicate))
+
+    def split(self, fraction: float) -> Tuple["Dataset", "Dataset"]:
+        """ Views on the first `fraction` of the rows and on the rest """
+        if not 0 <= fraction <= 1:
+            raise ValueError("fraction must be between 0 and 1")
+        boundary = int(fraction * self.num_rows)
+        return (self.take(slice(0, boundary)),
+                self.take(slice(boundary, self.num_rows)))
+
+    def iter_chunks(self, chunk_size: int, columns: List[str] = None,
+                    start: int = 0, stop: int = None
+                    ) -> Iterator[pd.DataFrame]:
+        """ Read the rows from `start` to `stop` in chunks.
+
+        With a memory-mapped dataset only one chunk of the requested
+        columns is decoded at a time, so a table larger than memory can be
+        processed chunk by chunk.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        if self._reader() is None:
+            yield from self._iter_csv_chunks(chunk_size, columns, start,
+                                             stop)
+            return
+        stop = self.num_rows if stop is None else min(stop, self.num_rows)
+        for first in range(start, stop, chunk_size):
+            yield self.read(columns, slice(first, min(first + chunk_size,
+                                                      stop)))
+
+    def _iter_csv_chunks(self, chunk_size: int, columns: List[str],
+                         start: int, stop: Optional[int]
+                         ) -> Iterator[pd.DataFrame]:
+        """ `iter_chunks` for legacy CSV data, parsed in a single pass """
+        if self._rows is not None:
+            # a view selects arbitrary rows: parse the columns once
+            data = self.read(columns)
+            stop = len(data) if stop is None else min(stop, len(data))
+            for first in range(start, stop, chunk_size):
+                yield data.iloc[first:min(first + chunk_size, stop)]
+            return
+        if stop is not None and stop <= start:
+            return
+        reader = pd.read_csv(
+            io.BytesIO(self._raw()), usecols=columns, chunksize=chunk_size,
+            # skip data rows before `start`, keeping the header
+            skiprows=range(1, start + 1),
+            nrows=None if stop is None else stop - start)
+        first = start
+        with reader:
+            for chunk in reader:
+                chunk.index = pd.RangeIndex(first, first + len(chunk))
+                first += len(chunk)
+                yield chunk
 
     def save(self, data: pd.DataFrame) -> bytes:
         """ Save data to a given path """
-        bytes = data.to_csv(index=False).encode()
+        bytes = encode_dataframe(data)
+        self._buffer = None
+        self._buffer_loader = None
+        self._table = None
+        self._statistics = None
+        self._statistics_loader = None
+        self._rows = None
+        # set here, so that a fingerprint stored in `metadata` at
+        # registration is not used for the new data
+        self._fingerprint = hashlib.blake2b(
+            bytes, digest_size=16).hexdigest()
+        self._fingerprint_loader = None
         return super().save(bytes)
+
+    def to_csv(self) -> bytes:
+        """ Export the data as CSV """
+        return self.read().to_csv(index=False).encode()
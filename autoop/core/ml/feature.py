@@ -5,8 +5,12 @@ import numpy as np
 
 from autoop.core.ml.dataset import Dataset
 
+
 class Feature(BaseModel):
-    # attributes here
+    """A column of a dataset together with its type."""
+    name: str = Field()
+    type: Literal["categorical", "numerical"] = Field()
 
-    def __str__(self):
-        raise NotImplementedError("To be implemented.")
\ No newline at end of file
+    def __str__(self) -> str:
+        """Describe the feature as `name (type)`."""
+        return f"{self.name} ({self.type})"
@@ -0,0 +1,171 @@
+import pickle
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.columnar import (
+    Buffer,
+    ColumnarReader,
+    decode_column,
+    encode_column,
+    pack,
+)
+from autoop.core.ml.model import Model
+
+# Version of the layout of fitted state; bumped whenever it changes so
+# that old readers refuse new artifacts instead of misreading them.
+STATE_VERSION = 1
+
+
+def encode_transformer(artifact: dict, key: str,
+                       arrays: Dict[str, np.ndarray]) -> dict:
+    """Encode the fitted state of a feature transformer.
+
+    Only what the transformer learned is stored: the categories of a
+    one-hot encoder and the mean, variance and scale of a scaler.
+    Args:
+        artifact (dict): The artifact of a feature, holding its type and
+            fitted `transformer`
+        key (str): Prefix of the names of its arrays
+        arrays (Dict[str, np.ndarray]): Arrays to `pack`, updated in place
+    Returns:
+        dict: The JSON-serialisable description of the transformer
+    """
+    transformer = artifact["transformer"]
+    if artifact["type"] == "OneHotEncoder":
+        categories = pd.Series(transformer.categories_[0])
+        return {
+            "type": "OneHotEncoder",
+            "categories": encode_column(
+                categories, f"{key}.categories", arrays),
+        }
+    if artifact["type"] == "StandardScaler":
+        for attribute in ("mean_", "var_", "scale_"):
+            value = getattr(transformer, attribute)
+            if value is not None:
+                arrays[f"{key}.{attribute[:-1]}"] = value
+        return {
+            "type": "StandardScaler",
+            "with_mean": transformer.with_mean,
+            "with_std": transformer.with_std,
+            "n_samples_seen": np.asarray(
+                transformer.n_samples_seen_).tolist(),
+        }
+    raise ValueError(f"Unknown transformer type: {artifact['type']}")
+
+
+def decode_transformer(reader: ColumnarReader, key: str,
+                       state: dict) -> dict:
+    """Rebuild a fitted transformer written by `encode_transformer`.
+
+    A scaler is restored without copying its arrays; a one-hot encoder is
+    refitted on its categories, which gives the same encoder.
+    Args:
+        reader (ColumnarReader): Reader of the packed buffer
+        key (str): The key the transformer was encoded with
+        state (dict): The description returned by `encode_transformer`
+    Returns:
+        dict: The artifact of the feature, with its type and `transformer`
+    """
+    # scikit-learn is only needed once a fitted transformer is restored
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    if state["type"] == "OneHotEncoder":
+        categories = np.asarray(decode_column(
+            reader, f"{key}.categories", state["categories"]))
+        encoder = OneHotEncoder()
+        encoder.fit(categories.reshape(-1, 1))
+        return {"type": "OneHotEncoder", "transformer": encoder}
+    if state["type"] == "StandardScaler":
+        scaler = StandardScaler(with_mean=state["with_mean"],
+                                with_std=state["with_std"])
+        for attribute in ("mean_", "var_", "scale_"):
+            name = f"{key}.{attribute[:-1]}"
+            setattr(scaler, attribute,
+                    reader.array(name) if name in reader else None)
+        scaler.n_samples_seen_ = state["n_samples_seen"]
+        scaler.n_features_in_ = 1
+        return {"type": "StandardScaler", "transformer": scaler}
+    raise ValueError(f"Unknown transformer type: {state['type']}")
+
+
+def encode_model(model: Model, key: str,
+                 arrays: Dict[str, np.ndarray]) -> dict:
+    """Encode a fitted model.
+
+    The model is pickled with protocol 5, which hands the NumPy arrays it
+    holds (weights, tree nodes, ...) out of band; they are stored as raw
+    buffers, so loading maps them instead of unpickling copies.
+    Args:
+        model (Model): The model
+        key (str): Prefix of the names of its arrays
+        arrays (Dict[str, np.ndarray]): Arrays to `pack`, updated in place
+    Returns:
+        dict: The JSON-serialisable description of the model
+    """
+    buffers = []
+    data = pickle.dumps(model, protocol=5, buffer_callback=buffers.append)
+    arrays[f"{key}.pickle"] = np.frombuffer(data, dtype=np.uint8)
+    for i, buffer in enumerate(buffers):
+        arrays[f"{key}.buffer{i}"] = np.frombuffer(buffer.raw(),
+                                                   dtype=np.uint8)
+    return {"class": f"{type(model).__module__}.{type(model).__name__}",
+            "buffers": len(buffers)}
+
+
+def decode_model(reader: ColumnarReader, key: str, state: dict) -> Model:
+    """Rebuild a model written by `encode_model`.
+    Args:
+        reader (ColumnarReader): Reader of the packed buffer
+        key (str): The key the model was encoded with
+        state (dict): The description returned by `encode_model`
+    Returns:
+        Model: The fitted model, whose arrays are read-only views on the
+            buffer
+    """
+    buffers = [reader.array(f"{key}.buffer{i}")
+               for i in range(state["buffers"])]
+    return pickle.loads(reader.array(f"{key}.pickle"), buffers=buffers)
+
+
+def pack_transformer(artifact: dict) -> bytes:
+    """Pack the fitted state of a single transformer.
+    Args:
+        artifact (dict): The artifact of a feature
+    Returns:
+        bytes: The packed state, see `unpack_transformer`
+    """
+    arrays = {}
+    state = encode_transformer(artifact, "transformer", arrays)
+    return pack(arrays, {"kind": "transformer",
+                         "state_version": STATE_VERSION,
+                         "transformer": state})
+
+
+def unpack_transformer(data: Buffer) -> dict:
+    """Rebuild a transformer packed by `pack_transformer`.
+    Args:
+        data (Buffer): The packed state
+    Returns:
+        dict: The artifact of the feature, with its type and `transformer`
+    """
+    reader = open_state(data, "transformer")
+    return decode_transformer(reader, "transformer",
+                              reader.meta["transformer"])
+
+
+def open_state(data: Buffer, kind: str) -> ColumnarReader:
+    """Open packed fitted state, checking its kind and version.
+    Args:
+        data (Buffer): The packed state
+        kind (str): The expected kind, e.g. "pipeline"
+    Returns:
+        ColumnarReader: Reader of the state
+    """
+    reader = ColumnarReader(data)
+    if reader.meta.get("kind") != kind:
+        raise ValueError(f"Buffer does not contain a {kind}")
+    version = reader.meta.get("state_version")
+    if version != STATE_VERSION:
+        raise ValueError(f"Unsupported {kind} state version: {version}")
+    return reader
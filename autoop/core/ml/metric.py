@@ -1,25 +1,387 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Dict, List, Sequence, Tuple, Union
 import numpy as np
 
 METRICS = [
     "mean_squared_error",
+    "mean_absolute_error",
+    "r_squared",
     "accuracy",
+    "macro_precision",
+    "macro_recall",
 ] # add the names (in strings) of the metrics you implement
 
-def get_metric(name: str):
-    # Factory function to get a metric by name.
-    # Return a metric instance given its str name.
-    raise NotImplementedError("To be implemented.")
 
-class Metric(...):
+def get_metric(name: str) -> "Metric":
+    """Factory function to get a metric by name.
+    Args:
+        name (str): One of METRICS
+    Returns:
+        Metric: The metric
+    """
+    metrics = {
+        "mean_squared_error": MeanSquaredError,
+        "mean_absolute_error": MeanAbsoluteError,
+        "r_squared": RSquared,
+        "accuracy": Accuracy,
+        "macro_precision": MacroPrecision,
+        "macro_recall": MacroRecall,
+    }
+    if name not in metrics:
+        raise ValueError(f"Unknown metric: {name}")
+    return metrics[name]()
+
+
+Statistics = Dict[str, np.ndarray]
+Predictions = Union[np.ndarray, Sequence[np.ndarray]]
+
+
+def _as_labels(values: np.ndarray) -> np.ndarray:
+    """Reduce one-hot encoded values to class indices."""
+    values = np.asarray(values)
+    if values.ndim == 2:
+        return values.argmax(axis=1)
+    return values
+
+
+def _as_vector(values: np.ndarray) -> np.ndarray:
+    """Flatten a single-column target into a vector of floats."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 2 and values.shape[1] == 1:
+        return values.ravel()
+    return values
+
+
+def _classification_statistics(predictions: List[np.ndarray],
+                               ground_truth: np.ndarray) -> Statistics:
+    """Count a confusion matrix per model in a single `bincount`.
+
+    `confusion[m, i, j]` is the number of observations of class
+    `classes[i]` that model m predicted as class `classes[j]`.
+    """
+    truth = _as_labels(ground_truth)
+    predicted = np.stack([_as_labels(values) for values in predictions])
+    labels = np.concatenate([truth, predicted.ravel()])
+    if (labels.dtype.kind in "iu" and len(labels)
+            and labels.min() >= 0 and labels.max() < 1024):
+        # small non-negative integers, e.g. argmax indices, are their own
+        # class codes and need no sorting
+        classes = np.arange(int(labels.max()) + 1)
+        codes = labels
+    else:
+        classes, codes = np.unique(labels, return_inverse=True)
+    n_classes = len(classes)
+    n_models, n = predicted.shape
+    index = ((np.arange(n_models)[:, None] * n_classes + codes[:n])
+             * n_classes + codes[n:].reshape(n_models, n))
+    confusion = np.bincount(index.ravel(),
+                            minlength=n_models * n_classes ** 2)
+    return {
+        "classes": classes,
+        "confusion": confusion.reshape(n_models, n_classes, n_classes),
+    }
+
+
+def _regression_statistics(predictions: List[np.ndarray],
+                           ground_truth: np.ndarray) -> Statistics:
+    """Reduce the residuals of every model to sums in one pass."""
+    truth = _as_vector(ground_truth)
+    residuals = np.stack([_as_vector(values) for values in predictions])
+    residuals -= truth
+    mean = truth.mean() if len(truth) else 0.0
+    return {
+        "count": np.asarray(len(truth)),
+        "squared_error": np.einsum("ij,ij->i", residuals, residuals),
+        "absolute_error": np.abs(residuals).sum(axis=1),
+        "mean": np.asarray(mean),
+        "total": np.asarray(np.sum((truth - mean) ** 2)),
+    }
+
+
+def _merge_classification(first: Statistics,
+                          second: Statistics) -> Statistics:
+    """Add two confusion matrices over the union of their classes."""
+    classes = np.union1d(first["classes"], second["classes"])
+    n_models = first["confusion"].shape[0]
+    confusion = np.zeros((n_models, len(classes), len(classes)),
+                         dtype=np.int64)
+    for statistics in (first, second):
+        index = np.searchsorted(classes, statistics["classes"])
+        confusion[:, index[:, None], index] += statistics["confusion"]
+    return {"classes": classes, "confusion": confusion}
+
+
+def _merge_regression(first: Statistics, second: Statistics) -> Statistics:
+    """Combine residual sums, and the variance with Chan's update."""
+    count = first["count"] + second["count"]
+    if count == 0:
+        return first
+    delta = second["mean"] - first["mean"]
+    return {
+        "count": count,
+        "squared_error": first["squared_error"] + second["squared_error"],
+        "absolute_error": (first["absolute_error"]
+                           + second["absolute_error"]),
+        "mean": first["mean"] + delta * second["count"] / count,
+        "total": (first["total"] + second["total"]
+                  + delta ** 2 * first["count"] * second["count"] / count),
+    }
+
+
+_STATISTICS = {
+    "classification": _classification_statistics,
+    "regression": _regression_statistics,
+}
+
+_MERGE = {
+    "classification": _merge_classification,
+    "regression": _merge_regression,
+}
+
+
+def evaluate_batch(metrics: List["Metric"], predictions: Predictions,
+                   ground_truth: np.ndarray) -> np.ndarray:
+    """Evaluate several metrics for several models in one pass.
+
+    The statistics every metric is derived from are computed once and
+    shared: one confusion matrix per model for classification metrics,
+    and sums over one residual vector per model for regression metrics.
+    Args:
+        metrics (List[Metric]): The metrics to compute
+        predictions (Predictions): The predictions of every model, as a
+            list of arrays or stacked into one array of shape (M, N) or,
+            one-hot encoded, (M, N, C)
+        ground_truth (np.ndarray): Ground truth of shape (N,) or (N, C)
+    Returns:
+        np.ndarray: The values of shape (M, len(metrics))
+    """
+    predictions = list(predictions)
+    values = np.empty((len(predictions), len(metrics)))
+    if not predictions:
+        return values
+    statistics = {}
+    for j, metric in enumerate(metrics):
+        if metric.type not in statistics:
+            statistics[metric.type] = _STATISTICS[metric.type](
+                predictions, ground_truth)
+        values[:, j] = metric._from_statistics(statistics[metric.type])
+    return values
+
+
+def evaluate_metrics(metrics: List["Metric"], predictions: np.ndarray,
+                     ground_truth: np.ndarray
+                     ) -> List[Tuple["Metric", float]]:
+    """Evaluate several metrics for one model in one pass.
+    Args:
+        metrics (List[Metric]): The metrics to compute
+        predictions (np.ndarray): Predictions of shape (N,) or (N, C)
+        ground_truth (np.ndarray): Ground truth of shape (N,) or (N, C)
+    Returns:
+        List[Tuple[Metric, float]]: Every metric with its value
+    """
+    values = evaluate_batch(metrics, [predictions], ground_truth)[0]
+    return list(zip(metrics, values.tolist()))
+
+
+class MetricAccumulator:
+    """Accumulates metrics over chunks or shards of observations.
+
+    Only the statistics the metrics are derived from are kept: confusion
+    counts for classification, and residual sums plus the running mean and
+    variance of the ground truth for regression. `update` adds a chunk,
+    `merge` adds another accumulator, e.g. one filled by another worker,
+    and `finalize` computes the metrics, which equal those computed on
+    all observations at once.
+    """
+
+    def __init__(self, metrics: List["Metric"]) -> None:
+        """Create an empty accumulator.
+        Args:
+            metrics (List[Metric]): The metrics to compute
+        """
+        self._metrics = list(metrics)
+        self._statistics = {}
+
+    @property
+    def metrics(self) -> List["Metric"]:
+        """The metrics being accumulated."""
+        return list(self._metrics)
+
+    def update(self, predictions: np.ndarray,
+               ground_truth: np.ndarray) -> "MetricAccumulator":
+        """Add a chunk of observations.
+        Args:
+            predictions (np.ndarray): Predictions of shape (N,) or (N, C)
+            ground_truth (np.ndarray): Ground truth of shape (N,) or (N, C)
+        Returns:
+            MetricAccumulator: This accumulator
+        """
+        for metric_type in {metric.type for metric in self._metrics}:
+            self._add(metric_type, _STATISTICS[metric_type](
+                [predictions], ground_truth))
+        return self
+
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        """Add the observations of another accumulator of the same metrics.
+        Args:
+            other (MetricAccumulator): The accumulator to merge in
+        Returns:
+            MetricAccumulator: This accumulator
+        """
+        if [type(metric) for metric in other._metrics] != [
+                type(metric) for metric in self._metrics]:
+            raise ValueError("Cannot merge accumulators of other metrics")
+        for metric_type, statistics in other._statistics.items():
+            self._add(metric_type, statistics)
+        return self
+
+    def finalize(self) -> List[Tuple["Metric", float]]:
+        """Compute the metrics over all observations added so far.
+        Returns:
+            List[Tuple[Metric, float]]: Every metric with its value, NaN
+                if no observations were added
+        """
+        results = []
+        for metric in self._metrics:
+            statistics = self._statistics.get(metric.type)
+            value = (float(metric._from_statistics(statistics)[0])
+                     if statistics is not None else float("nan"))
+            results.append((metric, value))
+        return results
+
+    def _add(self, metric_type: str, statistics: Statistics) -> None:
+        current = self._statistics.get(metric_type)
+        self._statistics[metric_type] = (
+            statistics if current is None
+            else _MERGE[metric_type](current, statistics))
+
+
+class Metric(ABC):
     """Base class for all metrics.
+
+    A metric maps predictions and ground truth to a real number. For
+    classification, one-hot encoded inputs are reduced to class indices.
+    Metrics are computed from statistics shared with the other metrics of
+    their type, so that `evaluate_batch` can compute many at once.
     """
-    # your code here
-    # remember: metrics take ground truth and prediction as input and return a real number
+    name: str
+    type: str
+    greater_is_better: bool = True
+
+    def __call__(self, predictions: np.ndarray,
+                 ground_truth: np.ndarray) -> float:
+        """Compute the metric.
+        Args:
+            predictions (np.ndarray): Predictions of shape (N,) or (N, C)
+            ground_truth (np.ndarray): Ground truth of shape (N,) or (N, C)
+        Returns:
+            float: The value of the metric
+        """
+        return float(evaluate_batch([self], [predictions], ground_truth)[0, 0])
+
+    def evaluate(self, predictions: np.ndarray,
+                 ground_truth: np.ndarray) -> float:
+        """Alias of calling the metric."""
+        return self(predictions, ground_truth)
+
+    def accumulator(self) -> MetricAccumulator:
+        """Create an accumulator to compute the metric chunk by chunk."""
+        return MetricAccumulator([self])
+
+    @abstractmethod
+    def _from_statistics(self, statistics: Statistics) -> np.ndarray:
+        """Compute the metric of every model from the shared statistics.
+
+        Arrays in `statistics` that differ per model have a leading model
+        axis, and so does the result.
+        """
+        pass
+
+    def __str__(self) -> str:
+        """The name of the metric."""
+        return self.name
+
+    def __repr__(self) -> str:
+        """The class of the metric."""
+        return f"{type(self).__name__}()"
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Divide, giving 0 where the denominator is 0."""
+    numerator = np.asarray(numerator, dtype=float)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator),
+                     where=np.asarray(denominator) != 0)
+
+
+class MeanSquaredError(Metric):
+    """Mean of the squared residuals."""
+    name = "mean_squared_error"
+    type = "regression"
+    greater_is_better = False
+
+    def _from_statistics(self, statistics: Statistics) -> np.ndarray:
+        return statistics["squared_error"] / statistics["count"]
+
+
+class MeanAbsoluteError(Metric):
+    """Mean of the absolute residuals."""
+    name = "mean_absolute_error"
+    type = "regression"
+    greater_is_better = False
+
+    def _from_statistics(self, statistics: Statistics) -> np.ndarray:
+        return statistics["absolute_error"] / statistics["count"]
+
+
+class RSquared(Metric):
+    """Fraction of the variance of the ground truth that is explained."""
+    name = "r_squared"
+    type = "regression"
+
+    def _from_statistics(self, statistics: Statistics) -> np.ndarray:
+        total = statistics["total"]
+        explained = 1 - _ratio(statistics["squared_error"], total)
+        return np.where(total != 0, explained, 0.0)
+
+
+class Accuracy(Metric):
+    """Fraction of correctly classified observations."""
+    name = "accuracy"
+    type = "classification"
+
+    def _from_statistics(self, statistics: Statistics) -> np.ndarray:
+        confusion = statistics["confusion"]
+        correct = np.trace(confusion, axis1=-2, axis2=-1)
+        return correct / confusion.sum(axis=(-2, -1))
+
+
+class MacroPrecision(Metric):
+    """Precision averaged over all classes, each weighted equally.
+
+    Classes that are neither predicted nor present are ignored; classes
+    that are present but never predicted count as precision 0.
+    """
+    name = "macro_precision"
+    type = "classification"
+
+    def _from_statistics(self, statistics: Statistics) -> np.ndarray:
+        confusion = statistics["confusion"]
+        correct = np.diagonal(confusion, axis1=-2, axis2=-1)
+        predicted = confusion.sum(axis=-2)
+        present = (predicted + confusion.sum(axis=-1)) > 0
+        precision = _ratio(correct, predicted)
+        return (precision * present).sum(axis=-1) / present.sum(axis=-1)
+
 
-    def __call__(self):
-        raise NotImplementedError("To be implemented.")
+class MacroRecall(Metric):
+    """Recall averaged over all classes present, each weighted equally."""
+    name = "macro_recall"
+    type = "classification"
 
-# add here concrete implementations of the Metric class
-    
\ No newline at end of file
+    def _from_statistics(self, statistics: Statistics) -> np.ndarray:
+        confusion = statistics["confusion"]
+        correct = np.diagonal(confusion, axis1=-2, axis2=-1)
+        actual = confusion.sum(axis=-1)
+        present = actual > 0
+        recall = _ratio(correct, actual)
+        return (recall * present).sum(axis=-1) / present.sum(axis=-1)
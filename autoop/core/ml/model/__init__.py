@@ -1,13 +1,59 @@
 
+import importlib
+
+from autoop.core.lazy import lazy_attributes
 from autoop.core.ml.model.model import Model
-from autoop.core.ml.model.regression import MultipleLinearRegression
 
 REGRESSION_MODELS = [
+    "multiple_linear_regression",
+    "lasso",
+    "decision_tree_regression",
+    "sgd_regression",
 ] # add your models as str here
 
 CLASSIFICATION_MODELS = [
+    "logistic_regression",
+    "k_nearest_neighbors",
+    "decision_tree_classification",
+    "sgd_classification",
 ] # add your models as str here
 
-def get_model(model_name: str) -> Model:
-    """Factory function to get a model by name."""
-    raise NotImplementedError("To be implemented.")
\ No newline at end of file
+# The module and class of each model; a model and its scikit-learn
+# backend are only imported when it is first requested.
+_MODELS = {
+    "multiple_linear_regression": ("regression.multiple_linear_regression",
+                                   "MultipleLinearRegression"),
+    "lasso": ("regression.lasso", "Lasso"),
+    "decision_tree_regression": ("regression.decision_tree_regression",
+                                 "DecisionTreeRegression"),
+    "sgd_regression": ("regression.sgd_regression", "SGDRegression"),
+    "logistic_regression": ("classification.logistic_regression",
+                            "LogisticRegression"),
+    "k_nearest_neighbors": ("classification.k_nearest_neighbors",
+                            "KNearestNeighbors"),
+    "decision_tree_classification": (
+        "classification.decision_tree_classification",
+        "DecisionTreeClassification"),
+    "sgd_classification": ("classification.sgd_classification",
+                           "SGDClassification"),
+}
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    name: f"{__name__}.{module}" for module, name in _MODELS.values()
+})
+
+
+def get_model(model_name: str, **hyperparameters) -> Model:
+    """Factory function to get a model by name.
+    Args:
+        model_name (str): One of REGRESSION_MODELS or CLASSIFICATION_MODELS
+        **hyperparameters: Passed to the model
+    Returns:
+        Model: An untrained model
+    """
+    if model_name not in _MODELS:
+        raise ValueError(f"Unknown model: {model_name}")
+    module, name = _MODELS[model_name]
+    model_class = getattr(
+        importlib.import_module(f"{__name__}.{module}"), name)
+    return model_class(**hyperparameters)
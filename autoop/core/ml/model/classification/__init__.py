@@ -0,0 +1,13 @@
+from autoop.core.lazy import lazy_attributes
+
+# each model imports its scikit-learn estimator only when it is first used
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "LogisticRegression":
+        "autoop.core.ml.model.classification.logistic_regression",
+    "KNearestNeighbors":
+        "autoop.core.ml.model.classification.k_nearest_neighbors",
+    "DecisionTreeClassification":
+        "autoop.core.ml.model.classification.decision_tree_classification",
+    "SGDClassification":
+        "autoop.core.ml.model.classification.sgd_classification",
+})
@@ -0,0 +1,9 @@
+from sklearn.tree import DecisionTreeClassifier
+
+from autoop.core.ml.model.sklearn_model import SklearnModel
+
+
+class DecisionTreeClassification(SklearnModel):
+    """Classification with a single decision tree."""
+    _type = "classification"
+    _estimator_class = DecisionTreeClassifier
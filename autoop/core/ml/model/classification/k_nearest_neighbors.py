@@ -0,0 +1,9 @@
+from sklearn.neighbors import KNeighborsClassifier
+
+from autoop.core.ml.model.sklearn_model import SklearnModel
+
+
+class KNearestNeighbors(SklearnModel):
+    """Classification by majority vote of the nearest observations."""
+    _type = "classification"
+    _estimator_class = KNeighborsClassifier
@@ -0,0 +1,9 @@
+from sklearn.linear_model import LogisticRegression as SklearnLogistic
+
+from autoop.core.ml.model.sklearn_model import SklearnModel
+
+
+class LogisticRegression(SklearnModel):
+    """Multinomial logistic regression."""
+    _type = "classification"
+    _estimator_class = SklearnLogistic
@@ -0,0 +1,12 @@
+from sklearn.linear_model import SGDClassifier
+
+from autoop.core.ml.model.sklearn_model import SklearnModel
+
+
+class SGDClassification(SklearnModel):
+    """Linear classifier fitted by stochastic gradient descent.
+
+    Supports `partial_fit`, so it can be trained chunk by chunk.
+    """
+    _type = "classification"
+    _estimator_class = SGDClassifier
@@ -1,10 +1,99 @@
 
-from abc import abstractmethod
+from abc import ABC, abstractmethod
 from autoop.core.ml.artifact import Artifact
 import numpy as np
 from copy import deepcopy
 from typing import Literal
+import pickle
 
-class Model:
-    pass # your code (attribute and methods) here
-    
+
+class Model(ABC):
+    """Base class for all models.
+
+    `parameters` holds both the hyperparameters given at construction and
+    the parameters learned by `fit`, so that together they restore the
+    state of the model.
+    """
+    _type: Literal["classification", "regression"]
+
+    def __init__(self, **hyperparameters) -> None:
+        """Create an untrained model.
+        Args:
+            **hyperparameters: Hyperparameters used when fitting
+        """
+        self._hyperparameters = hyperparameters
+        self._parameters = {}
+
+    @property
+    def type(self) -> str:
+        """The task of the model, classification or regression."""
+        return self._type
+
+    @property
+    def hyperparameters(self) -> dict:
+        """The hyperparameters given at construction."""
+        return deepcopy(self._hyperparameters)
+
+    @property
+    def parameters(self) -> dict:
+        """The hyperparameters together with the learned parameters."""
+        return deepcopy({**self._hyperparameters, **self._parameters})
+
+    @abstractmethod
+    def fit(self, observations: np.ndarray, ground_truth: np.ndarray) -> None:
+        """Fit the model.
+        Args:
+            observations (np.ndarray): Input features of shape (N, ...)
+            ground_truth (np.ndarray): Targets of shape (N,) or, one-hot
+                encoded, (N, C)
+        """
+        pass
+
+    @abstractmethod
+    def predict(self, observations: np.ndarray) -> np.ndarray:
+        """Predict targets for new observations.
+        Args:
+            observations (np.ndarray): Input features of shape (N, ...)
+        Returns:
+            np.ndarray: Predictions of shape (N,)
+        """
+        pass
+
+    @property
+    def supports_partial_fit(self) -> bool:
+        """Whether the model can be trained chunk by chunk."""
+        return False
+
+    def partial_fit(self, observations: np.ndarray,
+                    ground_truth: np.ndarray) -> None:
+        """Update the model with one more chunk of training data.
+
+        Used to train on datasets that do not fit in memory; only models
+        whose `supports_partial_fit` is True implement it.
+        Args:
+            observations (np.ndarray): Input features of shape (N, ...)
+            ground_truth (np.ndarray): Targets of shape (N,) or, one-hot
+                encoded, (N, C)
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} cannot be trained incrementally")
+
+    def to_artifact(self, name: str) -> Artifact:
+        """Store the model in an artifact.
+        Args:
+            name (str): Name of the artifact
+        Returns:
+            Artifact: Artifact holding the pickled model
+        """
+        return Artifact(
+            name=name,
+            asset_path=f"models/{name}",
+            data=pickle.dumps(self),
+            type=f"model:{self.type}",
+        )
+
+    def __str__(self) -> str:
+        """Describe the model by its class and hyperparameters."""
+        hyperparameters = ", ".join(
+            f"{key}={value!r}" for key, value in self._hyperparameters.items())
+        return f"{type(self).__name__}({hyperparameters})"
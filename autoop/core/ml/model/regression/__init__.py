@@ -1,2 +1,11 @@
+from autoop.core.lazy import lazy_attributes
 
-from autoop.core.ml.model.regression.multiple_linear_regression import MultipleLinearRegression
\ No newline at end of file
+# each model imports its scikit-learn estimator only when it is first used
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    "MultipleLinearRegression":
+        "autoop.core.ml.model.regression.multiple_linear_regression",
+    "Lasso": "autoop.core.ml.model.regression.lasso",
+    "DecisionTreeRegression":
+        "autoop.core.ml.model.regression.decision_tree_regression",
+    "SGDRegression": "autoop.core.ml.model.regression.sgd_regression",
+})
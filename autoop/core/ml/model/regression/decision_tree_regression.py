@@ -0,0 +1,9 @@
+from sklearn.tree import DecisionTreeRegressor
+
+from autoop.core.ml.model.sklearn_model import SklearnModel
+
+
+class DecisionTreeRegression(SklearnModel):
+    """Regression with a single decision tree."""
+    _type = "regression"
+    _estimator_class = DecisionTreeRegressor
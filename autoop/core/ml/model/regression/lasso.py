@@ -0,0 +1,9 @@
+from sklearn.linear_model import Lasso as SklearnLasso
+
+from autoop.core.ml.model.sklearn_model import SklearnModel
+
+
+class Lasso(SklearnModel):
+    """Linear regression with an L1 penalty."""
+    _type = "regression"
+    _estimator_class = SklearnLasso
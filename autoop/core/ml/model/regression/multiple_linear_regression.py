@@ -0,0 +1,82 @@
+import numpy as np
+from scipy import sparse as sp
+
+from autoop.core.ml.model.model import Model
+
+
+class MultipleLinearRegression(Model):
+    """Ordinary least squares regression with an intercept."""
+    _type = "regression"
+
+    def __init__(self, **hyperparameters) -> None:
+        """Create an untrained model."""
+        super().__init__(**hyperparameters)
+        self._gram = None
+        self._moment = None
+
+    @property
+    def supports_partial_fit(self) -> bool:
+        """Always True: the normal equations are sums over observations."""
+        return True
+
+    def fit(self, observations: np.ndarray, ground_truth: np.ndarray) -> None:
+        """Solve the least squares problem for weights and intercept."""
+        self._gram = None
+        self._moment = None
+        ground_truth = np.asarray(ground_truth, dtype=float)
+        if sp.issparse(observations):
+            # solve the normal equations, which only needs the small
+            # (width x width) Gram matrix to be dense
+            ones = np.ones((observations.shape[0], 1))
+            design = sp.hstack([observations, ones], format="csr")
+            gram = (design.T @ design).toarray()
+            solution, *_ = np.linalg.lstsq(
+                gram, design.T @ ground_truth, rcond=None)
+        else:
+            observations = np.asarray(observations, dtype=float)
+            design = np.column_stack(
+                [observations, np.ones(len(observations))])
+            solution, *_ = np.linalg.lstsq(design, ground_truth, rcond=None)
+        self._parameters = {
+            "coefficients": solution[:-1],
+            "intercept": solution[-1],
+        }
+
+    def partial_fit(self, observations: np.ndarray,
+                    ground_truth: np.ndarray) -> None:
+        """Add a chunk to the normal equations and solve them again.
+
+        After all chunks have been seen, the solution equals the one `fit`
+        finds on all of them at once.
+        """
+        ground_truth = np.asarray(ground_truth, dtype=float)
+        if sp.issparse(observations):
+            ones = np.ones((observations.shape[0], 1))
+            design = sp.hstack([observations, ones], format="csr")
+            gram = (design.T @ design).toarray()
+        else:
+            observations = np.asarray(observations, dtype=float)
+            design = np.column_stack(
+                [observations, np.ones(len(observations))])
+            gram = design.T @ design
+        moment = design.T @ ground_truth
+        if self._gram is None:
+            self._gram, self._moment = gram, moment
+        else:
+            self._gram += gram
+            self._moment += moment
+        solution, *_ = np.linalg.lstsq(self._gram, self._moment, rcond=None)
+        self._parameters = {
+            "coefficients": solution[:-1],
+            "intercept": solution[-1],
+        }
+
+    def predict(self, observations: np.ndarray) -> np.ndarray:
+        """Predict with the fitted weights."""
+        if not sp.issparse(observations):
+            observations = np.asarray(observations, dtype=float)
+        predictions = observations @ self._parameters["coefficients"]
+        predictions = predictions + self._parameters["intercept"]
+        if predictions.ndim == 2 and predictions.shape[1] == 1:
+            return predictions.ravel()
+        return predictions
@@ -0,0 +1,12 @@
+from sklearn.linear_model import SGDRegressor
+
+from autoop.core.ml.model.sklearn_model import SklearnModel
+
+
+class SGDRegression(SklearnModel):
+    """Linear regression fitted by stochastic gradient descent.
+
+    Supports `partial_fit`, so it can be trained chunk by chunk.
+    """
+    _type = "regression"
+    _estimator_class = SGDRegressor
@@ -0,0 +1,76 @@
+from typing import TYPE_CHECKING, Type
+
+import numpy as np
+
+from autoop.core.ml.model.model import Model
+
+if TYPE_CHECKING:
+    from sklearn.base import BaseEstimator
+
+
+class SklearnModel(Model):
+    """Facade over a scikit-learn estimator.
+
+    Subclasses only set `_type` and `_estimator_class`; hyperparameters are
+    passed to the estimator unchanged. Classifiers are fitted on class
+    indices, so a one-hot encoded target is reduced with `argmax` first.
+    """
+    _estimator_class: Type["BaseEstimator"]
+
+    def __init__(self, **hyperparameters) -> None:
+        """Create an untrained model.
+        Args:
+            **hyperparameters: Passed to the scikit-learn estimator
+        """
+        super().__init__(**hyperparameters)
+        self._estimator = self._estimator_class(**hyperparameters)
+
+    @property
+    def supports_partial_fit(self) -> bool:
+        """Whether the wrapped estimator has `partial_fit`."""
+        return hasattr(self._estimator, "partial_fit")
+
+    def fit(self, observations: np.ndarray, ground_truth: np.ndarray) -> None:
+        """Fit the wrapped estimator."""
+        self._estimator.fit(observations, self._target(ground_truth))
+        self._update_parameters()
+
+    def partial_fit(self, observations: np.ndarray,
+                    ground_truth: np.ndarray) -> None:
+        """Update the wrapped estimator with one chunk of training data.
+
+        A classifier must know every class from the first chunk on; with a
+        one-hot target they are the target columns, otherwise only the
+        classes present in the first chunk are known.
+        """
+        if not self.supports_partial_fit:
+            return super().partial_fit(observations, ground_truth)
+        ground_truth = np.asarray(ground_truth)
+        kwargs = {}
+        if (self._type == "classification"
+                and not hasattr(self._estimator, "classes_")):
+            kwargs["classes"] = (np.arange(ground_truth.shape[1])
+                                 if ground_truth.ndim == 2
+                                 else np.unique(ground_truth))
+        self._estimator.partial_fit(
+            observations, self._target(ground_truth), **kwargs)
+        self._update_parameters()
+
+    def predict(self, observations: np.ndarray) -> np.ndarray:
+        """Predict with the wrapped estimator."""
+        return self._estimator.predict(observations)
+
+    def _target(self, ground_truth: np.ndarray) -> np.ndarray:
+        """Shape a target the way scikit-learn expects it."""
+        ground_truth = np.asarray(ground_truth)
+        if self._type == "classification" and ground_truth.ndim == 2:
+            return ground_truth.argmax(axis=1)
+        if ground_truth.ndim == 2 and ground_truth.shape[1] == 1:
+            return ground_truth.ravel()
+        return ground_truth
+
+    def _update_parameters(self) -> None:
+        self._parameters = {
+            name: value for name, value in vars(self._estimator).items()
+            if name.endswith("_") and not name.startswith("_")
+        }
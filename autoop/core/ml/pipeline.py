@@ -1,13 +1,127 @@
-from typing import List
-import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple, Union
+import json
+import os
 
 from autoop.core.ml.artifact import Artifact
+from autoop.core.ml.columnar import Buffer, pack
 from autoop.core.ml.dataset import Dataset
 from autoop.core.ml.model import Model
 from autoop.core.ml.feature import Feature
-from autoop.core.ml.metric import Metric
-from autoop.functional.preprocessing import preprocess_features
+from autoop.core.ml.metric import Metric, MetricAccumulator, evaluate_metrics
+from autoop.core.ml.fitted_state import (
+    STATE_VERSION,
+    decode_model,
+    decode_transformer,
+    encode_model,
+    encode_transformer,
+    open_state,
+    pack_transformer,
+)
+from autoop.core.ml.preprocessing_cache import PreprocessingCache
+from autoop.core.ml.shared import MatrixSpec, SharedMatrix
+from autoop.core.profiling import Profiler, array_info
+from autoop.core.storage import Storage
+from autoop.functional.preprocessing import (
+    DesignMatrix,
+    build_design_matrix,
+    fit_transformers,
+    preprocess_features,
+    transform_features,
+)
 import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+
+
+def _row_range(matrix: DesignMatrix, rows: slice) -> DesignMatrix:
+    """Take a contiguous range of rows without copying the values.
+
+    Dense arrays are sliced as views. CSR matrices are rebuilt on views of
+    their data and indices, so only the row pointers are copied.
+    """
+    if not sp.issparse(matrix):
+        return matrix[rows]
+    start, stop, _ = rows.indices(matrix.shape[0])
+    first, last = matrix.indptr[start], matrix.indptr[stop]
+    return sp.csr_matrix(
+        (matrix.data[first:last], matrix.indices[first:last],
+         matrix.indptr[start:stop + 1] - first),
+        shape=(stop - start, matrix.shape[1]),
+    )
+
+
+def _refit_scaling(train: DesignMatrix, test: DesignMatrix,
+                   columns: np.ndarray) -> None:
+    """Standardize columns with the statistics of the training rows only.
+
+    The columns already hold values standardized over all rows; scaling
+    them again by their mean and deviation over the training rows gives
+    exactly the values of a scaler fitted on those rows alone. Both
+    matrices are updated in place; in a CSR matrix the stored entries are
+    updated, as the design matrix stores one for every scaled value.
+    """
+    if len(columns) == 0:
+        return
+    shift = np.zeros(train.shape[1])
+    scale = np.ones(train.shape[1])
+    values = train[:, columns]
+    mean = np.asarray(values.mean(axis=0)).ravel()
+    if sp.issparse(values):
+        square = np.asarray(values.multiply(values).mean(axis=0)).ravel()
+    else:
+        square = (values ** 2).mean(axis=0)
+    deviation = np.sqrt(np.maximum(square - mean ** 2, 0))
+    shift[columns] = mean
+    scale[columns] = np.where(deviation > 0, deviation, 1)
+    for matrix in (train, test):
+        if sp.issparse(matrix):
+            matrix.data -= shift[matrix.indices]
+            matrix.data /= scale[matrix.indices]
+        else:
+            matrix -= shift
+            matrix /= scale
+
+
+def _fold_rows(order: np.ndarray, fold: Tuple[int, int]
+               ) -> Tuple[np.ndarray, np.ndarray]:
+    """The sorted training and test rows of a fold of `order`."""
+    start, stop = fold
+    test = np.sort(order[start:stop])
+    train = np.sort(np.concatenate([order[:start], order[stop:]]))
+    return train, test
+
+
+def _fit_fold(specs: Dict[str, MatrixSpec], model: Model,
+              fold: Tuple[int, int], scaled: np.ndarray) -> np.ndarray:
+    """Worker entry point: fit a model on one fold of the shared matrix.
+    Args:
+        specs (Dict[str, MatrixSpec]): The shared observations `X`,
+            targets `y` and row `order`
+        model (Model): The untrained model
+        fold (Tuple[int, int]): The range of `order` holding the test rows
+        scaled (np.ndarray): Columns whose scaling is refitted on the
+            training rows
+    Returns:
+        np.ndarray: The predictions for the test rows
+    """
+    memories = []
+    try:
+        arrays = {}
+        for name, spec in specs.items():
+            segments, arrays[name] = SharedMatrix.attach(spec)
+            memories.extend(segments)
+        train, test = _fold_rows(arrays["order"], fold)
+        # indexing copies the rows of this fold, the shared matrix is intact
+        train_X, test_X = arrays["X"][train], arrays["X"][test]
+        _refit_scaling(train_X, test_X, scaled)
+        model.fit(train_X, arrays["y"][train])
+        predictions = np.asarray(model.predict(test_X))
+        del arrays, train_X, test_X
+        return predictions
+    finally:
+        for memory in memories:
+            memory.close()
 
 
 class Pipeline():
@@ -19,6 +133,9 @@ class Pipeline():
                  input_features: List[Feature],
                  target_feature: Feature,
                  split=0.8,
+                 cache: PreprocessingCache = None,
+                 sparse: Union[bool, str] = "auto",
+                 profiler: Profiler = None,
                  ):
         self._dataset = dataset
         self._model = model
@@ -27,6 +144,9 @@ class Pipeline():
         self._metrics = metrics
         self._artifacts = {}
         self._split = split
+        self._cache = cache
+        self._sparse = sparse
+        self._profiler = profiler
         if target_feature.type == "categorical" and model.type != "classification":
             raise ValueError("Model type must be classification for categorical target feature")
         if target_feature.type == "continuous" and model.type != "regression":
@@ -54,47 +174,194 @@ Pipeline(
         artifacts = []
         for name, artifact in self._artifacts.items():
             artifact_type = artifact.get("type")
-            if artifact_type in ["OneHotEncoder"]:
-                data = artifact["encoder"]
-                data = pickle.dumps(data)
-                artifacts.append(Artifact(name=name, data=data))
-            if artifact_type in ["StandardScaler"]:
-                data = artifact["scaler"]
-                data = pickle.dumps(data)
+            if artifact_type in ["OneHotEncoder", "StandardScaler"]:
+                # the fitted state, not the constructor hyperparameters
+                data = pack_transformer(artifact)
                 artifacts.append(Artifact(name=name, data=data))
         pipeline_data = {
-            "input_features": self._input_features,
-            "target_feature": self._target_feature,
+            "input_features": [feature.model_dump()
+                               for feature in self._input_features],
+            "target_feature": self._target_feature.model_dump(),
             "split": self._split,
         }
-        artifacts.append(Artifact(name="pipeline_config", data=pickle.dumps(pipeline_data)))
+        artifacts.append(Artifact(name="pipeline_config",
+                                  data=json.dumps(pipeline_data).encode()))
         artifacts.append(self._model.to_artifact(name=f"pipeline_model_{self._model.type}"))
         return artifacts
-    
+
+    def to_artifact(self, name: str, version: str = "1.0.0") -> Artifact:
+        """Store the trained pipeline in a single artifact for serving.
+
+        The artifact holds the features, the model and the fitted
+        transformers as a JSON header plus raw NumPy buffers, so
+        `from_artifact` restores a pipeline that can `predict` without the
+        training data.
+        Args:
+            name (str): Name of the artifact
+            version (str): Version of the artifact
+        Returns:
+            Artifact: Artifact of type "pipeline"
+        """
+        self._check_trained()
+        arrays = {}
+        transformers = {}
+        for i, (feature_name, artifact) in enumerate(self._artifacts.items()):
+            transformers[feature_name] = encode_transformer(
+                artifact, f"transformer{i}", arrays)
+        meta = {
+            "kind": "pipeline",
+            "state_version": STATE_VERSION,
+            "input_features": [feature.model_dump()
+                               for feature in self._input_features],
+            "target_feature": self._target_feature.model_dump(),
+            "split": self._split,
+            "sparse": self._sparse,
+            "transformers": transformers,
+            "model": encode_model(self._model, "model", arrays),
+        }
+        return Artifact(
+            name=name,
+            asset_path=f"pipelines/{name}",
+            version=version,
+            data=pack(arrays, meta),
+            type="pipeline",
+        )
+
+    @staticmethod
+    def from_artifact(artifact: Artifact) -> "Pipeline":
+        """Restore a pipeline stored with `to_artifact`.
+        Args:
+            artifact (Artifact): The pipeline artifact
+        Returns:
+            Pipeline: A trained pipeline without dataset or metrics
+        """
+        if artifact.type != "pipeline":
+            raise ValueError(f"Not a pipeline artifact: {artifact.type}")
+        return Pipeline._from_state(artifact.data)
+
+    @staticmethod
+    def from_storage(storage: Storage, asset_path: str) -> "Pipeline":
+        """Restore a stored pipeline without copying its arrays.
+
+        With `LocalStorage` the asset is memory-mapped and the model's
+        arrays are views on the mapping.
+        Args:
+            storage (Storage): The storage holding the artifact data
+            asset_path (str): The asset path of the pipeline artifact
+        Returns:
+            Pipeline: A trained pipeline without dataset or metrics
+        """
+        return Pipeline._from_state(storage.load_buffer(asset_path))
+
+    @staticmethod
+    def _from_state(data: Buffer) -> "Pipeline":
+        reader = open_state(data, "pipeline")
+        meta = reader.meta
+        pipeline = Pipeline(
+            metrics=[],
+            dataset=None,
+            model=decode_model(reader, "model", meta["model"]),
+            input_features=[Feature(**feature)
+                            for feature in meta["input_features"]],
+            target_feature=Feature(**meta["target_feature"]),
+            split=meta["split"],
+            sparse=meta["sparse"],
+        )
+        for i, (feature_name, state) in enumerate(
+                meta["transformers"].items()):
+            pipeline._artifacts[feature_name] = decode_transformer(
+                reader, f"transformer{i}", state)
+        return pipeline
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        """Predict the target of new observations.
+
+        The observations are encoded with the transformers fitted during
+        training, and the predictions are decoded back to the units or
+        categories of the target feature.
+        Args:
+            data (pd.DataFrame): Rows holding the input feature columns
+        Returns:
+            np.ndarray: One prediction per row
+        """
+        self._check_trained()
+        inputs = sorted(((feature.name, self._artifacts[feature.name])
+                         for feature in self._input_features),
+                        key=lambda x: x[0])
+        X, _ = transform_features(data, inputs, self._sparse)
+        predictions = np.asarray(self._model.predict(X))
+        target = self._artifacts[self._target_feature.name]
+        transformer = target["transformer"]
+        if target["type"] == "OneHotEncoder":
+            if predictions.ndim == 2:
+                predictions = predictions.argmax(axis=1)
+            return transformer.categories_[0][predictions.astype(int)]
+        return transformer.inverse_transform(
+            predictions.reshape(-1, 1)).ravel()
+
+    def _check_trained(self):
+        names = [feature.name for feature in self._input_features]
+        names.append(self._target_feature.name)
+        if any(name not in self._artifacts for name in names):
+            raise ValueError("The pipeline has not been trained yet")
+
     def _register_artifact(self, name: str, artifact):
         self._artifacts[name] = artifact
 
     def _preprocess_features(self):
-        (target_feature_name, target_data, artifact) = preprocess_features([self._target_feature], self._dataset)[0]
+        (target_feature_name, target_data, artifact) = preprocess_features(
+            [self._target_feature], self._dataset, self._cache)[0]
         self._register_artifact(target_feature_name, artifact)
-        input_results = preprocess_features(self._input_features, self._dataset)
-        for (feature_name, data, artifact) in input_results:
+        # all inputs are written into one preallocated (possibly sparse)
+        # matrix, sorted by feature name for consistency
+        matrix, layout = build_design_matrix(
+            self._input_features, self._dataset, self._cache, self._sparse)
+        for (feature_name, columns, artifact) in layout:
             self._register_artifact(feature_name, artifact)
-        # Get the input vectors and output vector, sort by feature name for consistency
         self._output_vector = target_data
-        self._input_vectors = [data for (feature_name, data, artifact) in input_results]
+        self._input_layout = layout
+        self._input_vectors = [matrix]
 
     def _split_data(self):
-        # Split the data into training and testing sets
+        # Split the data into training and testing sets; every split is a
+        # view on the rows of the design matrix rather than a copy
         split = self._split
-        self._train_X = [vector[:int(split * len(vector))] for vector in self._input_vectors]
-        self._test_X = [vector[int(split * len(vector)):] for vector in self._input_vectors]
-        self._train_y = self._output_vector[:int(split * len(self._output_vector))]
-        self._test_y = self._output_vector[int(split * len(self._output_vector)):]
+        rows = len(self._output_vector)
+        self._train_rows = slice(0, int(split * rows))
+        self._test_rows = slice(int(split * rows), rows)
+        self._train_X = [_row_range(vector, self._train_rows)
+                         for vector in self._input_vectors]
+        self._test_X = [_row_range(vector, self._test_rows)
+                        for vector in self._input_vectors]
+        self._train_y = self._output_vector[self._train_rows]
+        self._test_y = self._output_vector[self._test_rows]
 
     def _compact_vectors(self, vectors: List[np.array]) -> np.array:
+        if len(vectors) == 1:
+            return vectors[0]
+        if any(sp.issparse(vector) for vector in vectors):
+            return sp.hstack(vectors, format="csr")
         return np.concatenate(vectors, axis=1)
 
+    def design_matrices(self) -> Tuple[np.ndarray, np.ndarray,
+                                       np.ndarray, np.ndarray]:
+        """Preprocess and split the data without training.
+
+        Used to share one preprocessed dataset between several models.
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The
+                train observations, train targets, test observations and
+                test targets
+        """
+        self._preprocess_features()
+        self._split_data()
+        return (
+            self._compact_vectors(self._train_X),
+            self._train_y,
+            self._compact_vectors(self._test_X),
+            self._test_y,
+        )
+
     def _train(self):
         X = self._compact_vectors(self._train_X)
         Y = self._train_y
@@ -103,22 +370,181 @@ Pipeline(
     def _evaluate(self):
         X = self._compact_vectors(self._test_X)
         Y = self._test_y
-        self._metrics_results = []
         predictions = self._model.predict(X)
-        for metric in self._metrics:
-            result = metric.evaluate(predictions, Y)
-            self._metrics_results.append((metric, result))
+        # all metrics share one confusion matrix or residual vector
+        self._metrics_results = evaluate_metrics(
+            self._metrics, predictions, Y)
         self._predictions = predictions
 
     def execute(self):
+        """Preprocess, split, train and evaluate.
+        Returns:
+            dict: `metrics` as a list of (metric, value), `predictions` on
+                the test set, and `profile`, the records of the stages of
+                this run with their wall and CPU time, peak memory, array
+                sizes and I/O, see `autoop.core.profiling.Profiler`
+        """
+        profiler = self._profiler or Profiler()
+        first = len(profiler.records)
+        with profiler.stage("preprocess_features") as record:
+            self._preprocess_features()
+            record["arrays"].update({
+                "inputs": array_info(self._input_vectors[0]),
+                "target": array_info(self._output_vector)})
+        with profiler.stage("split_data") as record:
+            self._split_data()
+            record["arrays"].update({
+                "train_y": array_info(self._train_y),
+                "test_y": array_info(self._test_y)})
+        with profiler.stage("compact_vectors") as record:
+            # compacted once here, so training and evaluation reuse them
+            self._train_X = [self._compact_vectors(self._train_X)]
+            self._test_X = [self._compact_vectors(self._test_X)]
+            record["arrays"].update({
+                "train_X": array_info(self._train_X[0]),
+                "test_X": array_info(self._test_X[0])})
+        with profiler.stage("train"):
+            self._train()
+        with profiler.stage("evaluate") as record:
+            self._evaluate()
+            record["arrays"]["predictions"] = array_info(self._predictions)
+        return {
+            "metrics": self._metrics_results,
+            "predictions": self._predictions,
+            "profile": profiler.records[first:],
+        }
+
+    def cross_validate(self, folds: int = 5, n_workers: int = None,
+                       shuffle: bool = True, seed: int = 0,
+                       fold_safe: bool = True) -> dict:
+        """Estimate the metrics with k-fold cross-validation.
+
+        The dataset is read and preprocessed once. The design matrix is
+        placed in shared memory and each fold, given as arrays of row
+        indices into it, is fitted on a copy of the model in its own
+        worker process. The model of the pipeline itself is not trained.
+        Args:
+            folds (int): Number of folds
+            n_workers (int): Number of folds fitted at the same time, by
+                default one per fold up to the number of CPUs
+            shuffle (bool): Whether to shuffle the rows before they are
+                divided into folds
+            seed (int): Seed of the shuffle
+            fold_safe (bool): Whether numerical features are scaled with
+                the statistics of the training rows of each fold only, so
+                that nothing is learned from its test rows
+        Returns:
+            dict: `metrics` as a list of (metric, mean over the folds),
+                `metrics_std` as a list of (metric, standard deviation)
+                and `folds` with the list of (metric, value) of each fold
+        """
+        if folds < 2:
+            raise ValueError("At least two folds are required")
         self._preprocess_features()
-        self._split_data()
-        self._train()
-        self._evaluate()
+        X = self._compact_vectors(self._input_vectors)
+        Y = self._output_vector
+        if len(Y) < folds:
+            raise ValueError("Fewer rows than folds")
+        order = (np.random.default_rng(seed).permutation(len(Y))
+                 if shuffle else np.arange(len(Y)))
+        bounds = np.linspace(0, len(Y), folds + 1).astype(int)
+        ranges = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        scaled = np.array(
+            [columns.start for _, columns, artifact in self._input_layout
+             if fold_safe and artifact["type"] == "StandardScaler"],
+            dtype=np.int64)
+        shared = {name: SharedMatrix(array) for name, array in
+                  [("X", X), ("y", Y), ("order", order)]}
+        try:
+            specs = {name: array.spec for name, array in shared.items()}
+            workers = n_workers or min(folds, os.cpu_count() or 1)
+            with ProcessPoolExecutor(workers) as executor:
+                futures = [executor.submit(_fit_fold, specs, self._model,
+                                           fold, scaled)
+                           for fold in ranges]
+                predictions = [future.result() for future in futures]
+        finally:
+            for array in shared.values():
+                array.release()
+        results = [
+            evaluate_metrics(self._metrics, fold_predictions,
+                             Y[_fold_rows(order, fold)[1]])
+            for fold, fold_predictions in zip(ranges, predictions)
+        ]
+        values = np.array([[value for _, value in result]
+                           for result in results])
+        return {
+            "metrics": list(zip(self._metrics, values.mean(axis=0).tolist())),
+            "metrics_std": list(zip(self._metrics,
+                                    values.std(axis=0).tolist())),
+            "folds": results,
+        }
+
+    def execute_streaming(self, chunk_size: int = 100_000) -> dict:
+        """Train and evaluate while holding only one chunk of rows at a time.
+
+        The transformers are fitted in a first pass over the dataset, the
+        model is trained with `partial_fit` on the training chunks and the
+        metrics are accumulated over the test chunks, giving exactly the
+        values computed on the whole test set. Together with
+        `Dataset.from_storage` this handles datasets larger than memory.
+        Args:
+            chunk_size (int): Number of rows per chunk
+        Returns:
+            dict: `metrics` as a list of (metric, value), `predictions`,
+                which is None as they would be as large as the test set,
+                and `profile`, see `execute`
+        """
+        if not self._model.supports_partial_fit:
+            raise ValueError(
+                f"{type(self._model).__name__} cannot be trained "
+                "incrementally, use execute instead")
+        profiler = self._profiler or Profiler()
+        first = len(profiler.records)
+        input_names = {feature.name for feature in self._input_features}
+        columns = sorted(input_names | {self._target_feature.name})
+        with profiler.stage("fit_transformers"):
+            artifacts = fit_transformers(
+                self._input_features + [self._target_feature],
+                self._dataset.iter_chunks(chunk_size, columns))
+        for name, artifact in artifacts:
+            self._register_artifact(name, artifact)
+        inputs = [(name, artifact) for name, artifact in artifacts
+                  if name in input_names]
+        target = [(self._target_feature.name,
+                   self._artifacts[self._target_feature.name])]
+        rows = self._dataset.num_rows
+        self._train_rows = slice(0, int(self._split * rows))
+        self._test_rows = slice(int(self._split * rows), rows)
+        # reading and encoding the chunks is part of these stages
+        with profiler.stage("train"):
+            for X, Y in self._stream(chunk_size, self._train_rows, columns,
+                                     inputs, target):
+                self._model.partial_fit(X, Y)
+        with profiler.stage("evaluate"):
+            accumulator = MetricAccumulator(self._metrics)
+            for X, Y in self._stream(chunk_size, self._test_rows, columns,
+                                     inputs, target):
+                accumulator.update(self._model.predict(X), Y)
+            self._metrics_results = accumulator.finalize()
+        self._predictions = None
         return {
             "metrics": self._metrics_results,
             "predictions": self._predictions,
+            "profile": profiler.records[first:],
         }
+
+    def _stream(self, chunk_size: int, rows: slice, columns: List[str],
+                inputs: List[Tuple[str, dict]],
+                target: List[Tuple[str, dict]]
+                ) -> Iterator[Tuple[DesignMatrix, np.ndarray]]:
+        """Encode a range of rows chunk by chunk with fitted transformers."""
+        for chunk in self._dataset.iter_chunks(
+                chunk_size, columns, rows.start, rows.stop):
+            X, self._input_layout = transform_features(
+                chunk, inputs, self._sparse)
+            Y, _ = transform_features(chunk, target, sparse=False)
+            yield X, Y
         
 
     
\ No newline at end of file
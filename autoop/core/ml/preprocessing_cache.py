@@ -0,0 +1,172 @@
+import hashlib
+import json
+import pickle
+from typing import Hashable, Optional, Tuple
+
+import numpy as np
+
+from autoop.core.cache import LRUCache
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.storage import NotFoundError, Storage
+
+CacheKey = Tuple[str, str, str, str, str, int]
+CacheEntry = Tuple[np.ndarray, dict]
+
+
+def _entry_size(entry: CacheEntry) -> int:
+    """Approximate memory used by a cached entry."""
+    data, _ = entry
+    return getattr(data, "nbytes", 0) + 1024
+
+
+class PreprocessingCache:
+    """Cache of encoded features and the transformers fitted on them.
+
+    Entries are keyed by (dataset id, dataset version, fingerprint of its
+    content, feature name, transform type), so data stored again under
+    the same path and version is never served stale encodings. A bounded
+    in-memory LRU tier sits in front of an optional, also bounded,
+    storage tier that survives restarts. One cache is meant to be shared
+    by all pipelines of an `AutoMLSystem`, so re-running experiments
+    skips feature encoding.
+    """
+    _INDEX_KEY = "index.json"
+    # Version of the cached payload, part of every key so that entries
+    # written in an older layout are never read back. Version 2 stores
+    # categorical features as category codes rather than one-hot arrays.
+    FORMAT_VERSION = 2
+
+    def __init__(self,
+                 max_memory: int = 512 * 1024 * 1024,
+                 storage: Storage = None,
+                 max_disk: int = 2 * 1024 * 1024 * 1024) -> None:
+        """Create a cache.
+        Args:
+            max_memory (int): Bytes kept in memory
+            storage (Storage): Storage for the disk tier, None to disable it
+            max_disk (int): Bytes kept in storage
+        """
+        self._memory = LRUCache(max_memory, size_of=_entry_size)
+        self._storage = storage
+        # per digest on disk: its size and the id of its dataset
+        self._disk = LRUCache(max_disk, size_of=lambda value: value[0],
+                              on_evict=self._evict_from_disk)
+        if storage is not None:
+            self._load_index()
+
+    @staticmethod
+    def key(dataset: Dataset, feature: Feature, transform: str) -> CacheKey:
+        """Build the cache key of a feature of a dataset.
+        Args:
+            dataset (Dataset): The dataset the feature is read from
+            feature (Feature): The feature
+            transform (str): The type of transformer, e.g. OneHotEncoder
+        Returns:
+            CacheKey: The key
+        """
+        return (dataset.id, dataset.version, dataset.fingerprint,
+                feature.name, transform, PreprocessingCache.FORMAT_VERSION)
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Look up an entry, promoting it to memory if found on disk.
+        Args:
+            key (CacheKey): The key from `key`
+        Returns:
+            Optional[CacheEntry]: The encoded data and its artifact, or None
+        """
+        entry = self._memory.get(key)
+        if entry is not None or self._storage is None:
+            return entry
+        digest = self._digest(key)
+        if self._disk.get(digest) is None:
+            return None
+        try:
+            entry = pickle.loads(self._storage.load(digest))
+        except NotFoundError:
+            self._disk.invalidate(digest)
+            return None
+        self._memory.put(key, self._freeze(entry))
+        return entry
+
+    def put(self, key: CacheKey, entry: CacheEntry) -> None:
+        """Store an entry in memory and, if enabled, on disk.
+        Args:
+            key (CacheKey): The key from `key`
+            entry (CacheEntry): The encoded data and its artifact
+        """
+        entry = self._freeze(entry)
+        self._memory.put(key, entry)
+        if self._storage is None:
+            return
+        data = pickle.dumps(entry)
+        if len(data) > self._disk.max_size:
+            # the disk tier would not keep it, so nothing would delete it
+            return
+        digest = self._digest(key)
+        self._storage.save(data, digest)
+        self._disk.put(digest, (len(data), key[0]))
+        self._save_index()
+
+    def invalidate(self, dataset_id: str) -> None:
+        """Remove every entry of a dataset from both tiers.
+
+        Entries of replaced data are never read again, as the key holds
+        a fingerprint of the content; this frees the space they take.
+        Args:
+            dataset_id (str): The id of the dataset
+        """
+        for key in self._memory.keys():
+            if key[0] == dataset_id:
+                self._memory.invalidate(key)
+        if self._storage is None:
+            return
+        digests = [digest for digest in self._disk.keys()
+                   if self._disk.get(digest)[1] == dataset_id]
+        for digest in digests:
+            self._evict_from_disk(digest, None)
+            self._disk.invalidate(digest)
+        if digests:
+            self._save_index()
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        self._memory.clear()
+        for digest in self._disk.keys():
+            self._evict_from_disk(digest, None)
+        self._disk.clear()
+        if self._storage is not None:
+            self._save_index()
+
+    @staticmethod
+    def _freeze(entry: CacheEntry) -> CacheEntry:
+        """Make cached arrays read-only, as they are shared."""
+        data, artifact = entry
+        if isinstance(data, np.ndarray):
+            data.flags.writeable = False
+        return data, artifact
+
+    @staticmethod
+    def _digest(key: CacheKey) -> str:
+        return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+    def _evict_from_disk(self, digest: Hashable, _: object) -> None:
+        try:
+            self._storage.delete(digest)
+        except NotFoundError:
+            pass
+
+    def _load_index(self) -> None:
+        try:
+            index = json.loads(self._storage.load(self._INDEX_KEY))
+        except NotFoundError:
+            return
+        for entry in index:
+            # indexes written before dataset ids were recorded
+            digest, size, dataset_id = (entry + [None])[:3]
+            self._disk.put(digest, (size, dataset_id))
+
+    def _save_index(self) -> None:
+        index = [[digest, *self._disk.get(digest)]
+                 for digest in self._disk.keys()]
+        self._storage.save(json.dumps(index).encode(), self._INDEX_KEY)
@@ -0,0 +1,206 @@
+import math
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import Metric
+from autoop.core.ml.model import get_model
+from autoop.core.ml.preprocessing_cache import PreprocessingCache
+from autoop.core.ml.shared import MatrixSpec, SharedMatrix
+from autoop.core.ml.sweep import ModelSweep
+
+# Maps each hyperparameter to a list of values, or for random search also
+# to a distribution with an `rvs` method, e.g. from `scipy.stats`.
+SearchSpace = Dict[str, Any]
+
+# The candidates of a bracket and the fraction of rows of its first rung
+Bracket = Tuple[List[int], float]
+
+SEARCHES = ["grid", "random"]
+EARLY_STOPPING = ["halving", "hyperband"]
+
+
+class HyperparameterSearch(ModelSweep):
+    """Tune the hyperparameters of one model family.
+
+    Candidates are the points of a grid or random samples of the space.
+    Like `ModelSweep`, the dataset is preprocessed once and the design
+    matrices are shared with the worker processes fitting the candidates.
+
+    With early stopping, candidates are first fitted on a small random
+    subsample of the training rows, and only the best `1 / factor` of them
+    go on to the next rung, which uses `factor` times as many rows, until
+    the last rung uses all of them (successive halving). Hyperband runs
+    several such brackets, from many candidates on few rows to a few
+    candidates on all rows, so that a poor choice of `min_fraction` cannot
+    eliminate a good candidate that learns slowly.
+    """
+
+    def __init__(self,
+                 metrics: List[Metric],
+                 dataset: Dataset,
+                 model: str,
+                 space: SearchSpace,
+                 input_features: List[Feature],
+                 target_feature: Feature,
+                 search: str = "grid",
+                 early_stopping: str = None,
+                 n_candidates: int = 10,
+                 factor: int = 3,
+                 min_fraction: float = None,
+                 seed: int = 0,
+                 split: float = 0.8,
+                 n_workers: int = None,
+                 timeout: float = None,
+                 cache: PreprocessingCache = None,
+                 sparse: Union[bool, str] = "auto",
+                 ) -> None:
+        """Create a search.
+        Args:
+            metrics (List[Metric]): Metrics to evaluate, the first one is
+                used to compare the candidates
+            dataset (Dataset): The dataset to train on
+            model (str): The name of the model, see `get_model`
+            space (SearchSpace): The hyperparameters to search
+            input_features (List[Feature]): The input features
+            target_feature (Feature): The target feature
+            search (str): "grid" for every combination of the values, or
+                "random" for `n_candidates` samples
+            early_stopping (str): None to fit every candidate on all rows,
+                "halving" or "hyperband"
+            n_candidates (int): Number of random samples
+            factor (int): Rows grow and candidates shrink by this factor
+                from one rung to the next
+            min_fraction (float): Fraction of the training rows in the
+                first rung; by default as small as leaves one candidate
+                in the last rung
+            seed (int): Seed of the samples of candidates and rows
+            split (float): Fraction of the data used for training
+            n_workers (int): Number of candidates fitted at the same time
+            timeout (float): Seconds a single fit may take, or None
+            cache (PreprocessingCache): Cache of encoded features
+            sparse (Union[bool, str]): Whether to build a sparse design
+                matrix, see `Pipeline`
+        """
+        if search not in SEARCHES:
+            raise ValueError(f"Unknown search: {search}")
+        if early_stopping is not None and early_stopping not in EARLY_STOPPING:
+            raise ValueError(f"Unknown early stopping: {early_stopping}")
+        if early_stopping == "hyperband" and search != "random":
+            raise ValueError("Hyperband samples its candidates, "
+                             "use search='random'")
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        if min_fraction is not None and not 0 < min_fraction <= 1:
+            raise ValueError("min_fraction must be in (0, 1]")
+        self._factor = factor
+        self._rng = np.random.default_rng(seed)
+        if early_stopping == "hyperband":
+            candidates, self._brackets = self._hyperband(
+                space, factor, min_fraction or factor ** -3, seed)
+        else:
+            if search == "grid":
+                candidates = list(ParameterGrid(space))
+            else:
+                candidates = list(ParameterSampler(
+                    space, n_candidates, random_state=seed))
+            fraction = 1.0
+            if early_stopping == "halving":
+                rungs = int(math.log(len(candidates), factor) + 1e-9)
+                fraction = min_fraction or factor ** -rungs
+            self._brackets = [(list(range(len(candidates))), fraction)]
+        super().__init__(
+            metrics, dataset,
+            [get_model(model, **candidate) for candidate in candidates],
+            input_features, target_feature, split, n_workers, timeout,
+            cache, sparse)
+
+    @staticmethod
+    def _hyperband(space: SearchSpace, factor: int, min_fraction: float,
+                   seed: int) -> Tuple[List[dict], List[Bracket]]:
+        """Sample the candidates of every bracket of Hyperband."""
+        rungs = int(math.log(1 / min_fraction, factor) + 1e-9)
+        candidates, brackets = [], []
+        for bracket in range(rungs, -1, -1):
+            count = math.ceil((rungs + 1) / (bracket + 1) * factor ** bracket)
+            sampled = list(ParameterSampler(
+                space, count, random_state=seed + bracket))
+            brackets.append((list(range(len(candidates),
+                                        len(candidates) + len(sampled))),
+                             float(factor) ** -bracket))
+            candidates.extend(sampled)
+        return candidates, brackets
+
+    def run(self) -> List[dict]:
+        """Fit the candidates and rank them.
+        Returns:
+            List[dict]: One entry per candidate, best first, as returned
+                by `ModelSweep.run`, with the `hyperparameters` of the
+                candidate and `train_rows`, the number of training rows of
+                the last rung it reached; candidates that reached a later
+                rung rank before those stopped earlier
+        """
+        self._cancelled.clear()
+        shared, test_y = self._share_design()
+        specs = {name: array.spec for name, array in shared.items()}
+        n_train = shared["train_y"].spec[1][0]
+        results = []
+        try:
+            for candidates, fraction in self._brackets:
+                if self._cancelled.is_set():
+                    break
+                results.extend(self._halve(candidates, fraction, specs,
+                                           n_train, test_y))
+        finally:
+            for array in shared.values():
+                array.release()
+        return self._rank(results)
+
+    def _halve(self, candidates: List[int], fraction: float,
+               specs: Dict[str, MatrixSpec], n_train: int,
+               ground_truth: np.ndarray) -> List[dict]:
+        """Run successive halving from `fraction` of the training rows."""
+        order = self._rng.permutation(n_train)
+        final = {}
+        while True:
+            rows = max(1, int(fraction * n_train))
+            subset = (SharedMatrix(np.sort(order[:rows]))
+                      if rows < n_train else None)
+            rung_specs = (specs if subset is None
+                          else {**specs, "train_rows": subset.spec})
+            try:
+                results = self._schedule(
+                    rung_specs, [self._models[i] for i in candidates])
+            finally:
+                if subset is not None:
+                    subset.release()
+            self._evaluate(results, ground_truth)
+            for index, result in zip(candidates, results):
+                result["hyperparameters"] = self._models[index].hyperparameters
+                result["train_rows"] = rows
+                result["candidate"] = index
+                final[index] = result
+            if rows >= n_train or self._cancelled.is_set():
+                break
+            survivors = [result for result in self._rank(results)
+                         if result["status"] == "ok"]
+            keep = max(1, len(candidates) // self._factor)
+            candidates = [result["candidate"] for result in survivors[:keep]]
+            if not candidates:
+                break
+            fraction = min(1.0, fraction * self._factor)
+        for result in final.values():
+            del result["candidate"]
+        return list(final.values())
+
+    def _rank(self, results: List[dict]) -> List[dict]:
+        """Rank by the rung reached, then by the first metric."""
+        ranked = super()._rank(results)
+        ranked.sort(key=lambda result: (result["status"] != "ok",
+                                        -result.get("train_rows", 0)))
+        for rank, result in enumerate(ranked, start=1):
+            result["rank"] = rank
+        return ranked
@@ -0,0 +1,310 @@
+import json
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Tuple, Union
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.cache import LRUCache
+from autoop.core.ml.artifact import Artifact
+from autoop.core.ml.pipeline import Pipeline
+
+Rows = Union[dict, List[dict]]
+
+
+class BatcherClosed(RuntimeError):
+    """Raised when requests are queued on a batcher that has stopped."""
+
+
+class ServiceClosed(RuntimeError):
+    """Raised when a closed `PredictionService` is asked for predictions."""
+
+
+class _Batcher:
+    """Groups the requests for one pipeline into batches.
+
+    A background thread takes the first waiting request and keeps adding
+    requests until the batch is full or `max_latency` has passed since the
+    first one; the batch is then predicted in one vectorized call on the
+    shared thread pool.
+    """
+
+    def __init__(self, pipeline: Pipeline, executor: ThreadPoolExecutor,
+                 max_batch_size: int, max_latency: float) -> None:
+        self._pipeline = pipeline
+        self._executor = executor
+        self._max_batch_size = max_batch_size
+        self._max_latency = max_latency
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self._closed = False
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: List[dict]) -> Future:
+        """Queue rows for prediction.
+
+        Raises:
+            BatcherClosed: If the batcher has been closed
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise BatcherClosed("Batcher is closed")
+            self._queue.put((rows, future))
+        return future
+
+    def close(self, wait: bool = False) -> None:
+        """Stop after the requests queued so far have been batched.
+        Args:
+            wait (bool): Whether to wait until they have been batched
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self) -> None:
+        batch = []
+        try:
+            self._batch_forever(batch)
+        except BaseException as error:
+            # e.g. the executor was shut down: fail the requests of the
+            # current batch and every queued one instead of leaving their
+            # futures unresolved
+            with self._lock:
+                self._closed = True
+            while True:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not None:
+                    batch.append(request)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _batch_forever(self, batch: List[Tuple[List[dict], Future]]) -> None:
+        """Form batches until closed; `batch` holds the one being formed."""
+        while True:
+            batch.clear()
+            request = self._queue.get()
+            if request is None:
+                return
+            batch.append(request)
+            size = len(request[0])
+            deadline = time.monotonic() + self._max_latency
+            while size < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self._executor.submit(self._predict, list(batch))
+
+    def _predict(self, batch: List[Tuple[List[dict], Future]]) -> None:
+        rows = [row for request_rows, _ in batch for row in request_rows]
+        try:
+            predictions = self._pipeline.predict(pd.DataFrame(rows))
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        start = 0
+        for request_rows, future in batch:
+            stop = start + len(request_rows)
+            future.set_result(predictions[start:stop].tolist())
+            start = stop
+
+
+class PredictionService:
+    """Serves predictions of registered pipelines from warm memory.
+
+    A pipeline is loaded from its artifact once, on its first request, and
+    kept in a bounded LRU together with its fitted model and transformers.
+    Concurrent requests for the same pipeline are grouped into batches, so
+    many single-row requests cost a few vectorized predictions while each
+    waits at most `max_latency` seconds for its batch to fill.
+    """
+    # times a request is retried when its pipeline is evicted between
+    # looking up its batcher and queueing on it
+    _MAX_RETRIES = 3
+
+    def __init__(self,
+                 load: Callable[[str], Artifact],
+                 max_pipelines: int = 8,
+                 max_batch_size: int = 256,
+                 max_latency: float = 0.002,
+                 n_workers: int = 4) -> None:
+        """Create a service.
+        Args:
+            load (Callable[[str], Artifact]): Returns the pipeline artifact
+                with a given id, see `Pipeline.to_artifact`; raises
+                KeyError for an unknown id
+            max_pipelines (int): Number of pipelines kept loaded
+            max_batch_size (int): Maximum number of rows per batch
+            max_latency (float): Seconds a request may wait for others to
+                join its batch
+            n_workers (int): Number of batches predicted at the same time
+        """
+        self._load = load
+        self._max_batch_size = max_batch_size
+        self._max_latency = max_latency
+        self._executor = ThreadPoolExecutor(n_workers)
+        self._pipelines = LRUCache(max_pipelines, size_of=lambda _: 1,
+                                   on_evict=lambda _, batcher:
+                                   batcher.close())
+        self._lock = Lock()
+        self._loading: Dict[str, Lock] = {}
+        self._closed = False
+
+    def submit(self, pipeline_id: str, rows: Rows) -> Future:
+        """Request predictions without waiting for them.
+        Args:
+            pipeline_id (str): The id of the pipeline artifact
+            rows (Rows): One row, or a list of rows, mapping input feature
+                names to values
+        Returns:
+            Future: Resolves to a list with one prediction per row
+        Raises:
+            ServiceClosed: If the service has been closed
+        """
+        if isinstance(rows, dict):
+            rows = [rows]
+        for attempt in range(self._MAX_RETRIES + 1):
+            try:
+                return self._batcher(pipeline_id).submit(rows)
+            except BatcherClosed:
+                # evicted between lookup and submit, load it again
+                if attempt == self._MAX_RETRIES:
+                    raise
+
+    def predict(self, pipeline_id: str, rows: Rows,
+                timeout: float = None) -> list:
+        """Request predictions and wait for them.
+        Args:
+            pipeline_id (str): The id of the pipeline artifact
+            rows (Rows): One row, or a list of rows
+            timeout (float): Seconds to wait, or None to wait indefinitely
+        Returns:
+            list: One prediction per row
+        """
+        return self.submit(pipeline_id, rows).result(timeout)
+
+    def close(self) -> None:
+        """Unload every pipeline and stop the worker threads.
+
+        Requests made afterwards raise `ServiceClosed`.
+        """
+        with self._lock:
+            self._closed = True
+        for pipeline_id in self._pipelines.keys():
+            batcher = self._pipelines.get(pipeline_id)
+            self._pipelines.invalidate(pipeline_id)
+            if batcher is not None:
+                batcher.close(wait=True)
+        self._executor.shutdown(wait=True)
+
+    def _batcher(self, pipeline_id: str) -> _Batcher:
+        """The batcher of a pipeline, loading the pipeline if needed."""
+        with self._lock:
+            if self._closed:
+                raise ServiceClosed("Prediction service is closed")
+            batcher = self._pipelines.get(pipeline_id)
+            if batcher is not None:
+                return batcher
+            loading = self._loading.setdefault(pipeline_id, Lock())
+        # only requests for this pipeline wait while it is loaded
+        try:
+            with loading:
+                batcher = self._pipelines.get(pipeline_id)
+                if batcher is None:
+                    pipeline = Pipeline.from_artifact(
+                        self._load(pipeline_id))
+                    with self._lock:
+                        # closed while the pipeline was loading
+                        if self._closed:
+                            raise ServiceClosed(
+                                "Prediction service is closed")
+                        batcher = _Batcher(
+                            pipeline, self._executor,
+                            self._max_batch_size, self._max_latency)
+                        self._pipelines.put(pipeline_id, batcher)
+        finally:
+            with self._lock:
+                self._loading.pop(pipeline_id, None)
+        return batcher
+
+
+def _json_default(value: object) -> object:
+    """Convert NumPy scalars in predictions to plain Python values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def make_server(service: PredictionService, host: str = "127.0.0.1",
+                port: int = 8000) -> ThreadingHTTPServer:
+    """Create an HTTP server in front of a prediction service.
+
+    Predictions are requested with `POST /pipelines/<id>/predict` and a
+    JSON body `{"rows": [{"feature": value, ...}, ...]}`; the response is
+    `{"predictions": [...]}`. Every connection is handled in its own
+    thread, so concurrent requests are batched by the service.
+    Args:
+        service (PredictionService): The service to expose
+        host (str): The interface to listen on
+        port (int): The port to listen on, 0 for any free port
+    Returns:
+        ThreadingHTTPServer: The server, started with `serve_forever`
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_POST(self) -> None:  # noqa: N802
+            parts = self.path.strip("/").split("/")
+            if (len(parts) != 3 or parts[0] != "pipelines"
+                    or parts[2] != "predict"):
+                return self._reply(404, {"error": "Not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                rows = json.loads(self.rfile.read(length))["rows"]
+            except (ValueError, KeyError, TypeError):
+                return self._reply(400, {"error": "Expected rows"})
+            try:
+                predictions = service.predict(unquote(parts[1]), rows)
+            except KeyError as error:
+                return self._reply(404, {"error": f"Not found: {error}"})
+            except ServiceClosed as error:
+                return self._reply(503, {"error": str(error)})
+            except (ValueError, TypeError) as error:
+                return self._reply(400, {"error": str(error)})
+            self._reply(200, {"predictions": predictions})
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body, default=_json_default).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,96 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse as sp
+
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+MatrixSpec = Tuple[str, Tuple[int, ...], List[ArraySpec]]
+
+
+class SharedArray:
+    """A NumPy array in shared memory that other processes can attach to.
+
+    Only the small `spec` (segment name, shape and dtype) is sent to a
+    worker, which maps the same memory instead of receiving a copy.
+    """
+
+    def __init__(self, array: np.ndarray) -> None:
+        """Copy an array into a new shared memory segment.
+        Args:
+            array (np.ndarray): The array to share
+        """
+        array = np.ascontiguousarray(array)
+        self._memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.array = np.ndarray(array.shape, array.dtype,
+                                buffer=self._memory.buf)
+        self.array[...] = array
+        self.spec = (self._memory.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(spec: ArraySpec) -> Tuple[SharedMemory, np.ndarray]:
+        """Map a shared array created by another process.
+        Args:
+            spec (ArraySpec): The `spec` of the shared array
+        Returns:
+            Tuple[SharedMemory, np.ndarray]: The segment, to be closed by
+                the caller, and a read-only view on it
+        """
+        name, shape, dtype = spec
+        # workers share the resource tracker of the process that created
+        # the segment, so attaching here does not change its ownership
+        memory = SharedMemory(name=name)
+        array = np.ndarray(shape, np.dtype(dtype), buffer=memory.buf)
+        array.flags.writeable = False
+        return memory, array
+
+    def release(self) -> None:
+        """Free the shared memory segment."""
+        del self.array
+        self._memory.close()
+        self._memory.unlink()
+
+
+class SharedMatrix:
+    """A dense array or CSR matrix in shared memory.
+
+    A CSR matrix is shared as its three component arrays and rebuilt on
+    top of them in the worker, so sparse design matrices stay zero-copy.
+    """
+
+    def __init__(self, matrix: np.ndarray) -> None:
+        """Copy a dense array or sparse matrix into shared memory.
+        Args:
+            matrix (np.ndarray): A dense array or a scipy sparse matrix
+        """
+        if sp.issparse(matrix):
+            matrix = matrix.tocsr()
+            parts = [matrix.data, matrix.indices, matrix.indptr]
+            self._kind = "csr"
+        else:
+            parts = [matrix]
+            self._kind = "dense"
+        self._parts = [SharedArray(part) for part in parts]
+        self.spec = (self._kind, tuple(matrix.shape),
+                     [part.spec for part in self._parts])
+
+    @staticmethod
+    def attach(spec: MatrixSpec) -> Tuple[List[SharedMemory], np.ndarray]:
+        """Map a shared matrix created by another process.
+        Args:
+            spec (MatrixSpec): The `spec` of the shared matrix
+        Returns:
+            Tuple[List[SharedMemory], np.ndarray]: The segments, to be
+                closed by the caller, and the matrix
+        """
+        kind, shape, part_specs = spec
+        memories, parts = zip(*[SharedArray.attach(part_spec)
+                                for part_spec in part_specs])
+        if kind == "csr":
+            return list(memories), sp.csr_matrix(tuple(parts), shape=shape)
+        return list(memories), parts[0]
+
+    def release(self) -> None:
+        """Free the shared memory segments."""
+        for part in self._parts:
+            part.release()
@@ -0,0 +1,145 @@
+import ast
+import operator
+import re
+from numbers import Real
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.statistics import BLOCK_SIZE
+
+if TYPE_CHECKING:
+    from autoop.core.ml.dataset import Dataset
+
+Condition = Tuple[str, str, Any]
+Predicate = Union[str, Condition, List[Condition]]
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# `column op value`, where a column name with spaces or other symbols is
+# written between backticks
+_CONDITION = re.compile(
+    r"^\s*(?:`(?P<quoted>[^`]+)`|(?P<name>[A-Za-z_][\w.]*))\s*"
+    r"(?P<op>>=|<=|==|!=|>|<)\s*(?P<value>.+?)\s*$")
+
+
+def _parse_value(text: str) -> Any:
+    """A Python literal, or the text itself for a bare word."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parse_predicate(predicate: Predicate) -> List[Condition]:
+    """Turn a predicate into a list of conditions that must all hold.
+    Args:
+        predicate (Predicate): A string such as "age > 18 and sex == 'F'",
+            one (column, operator, value) tuple, or a list of them
+    Returns:
+        List[Condition]: The conditions
+    """
+    if isinstance(predicate, tuple):
+        predicate = [predicate]
+    if isinstance(predicate, str):
+        conditions = []
+        for part in re.split(r"\s+and\s+", predicate.strip()):
+            match = _CONDITION.match(part)
+            if match is None:
+                raise ValueError(f"Cannot parse condition: {part!r}")
+            name = match.group("quoted") or match.group("name")
+            conditions.append(
+                (name, match.group("op"), _parse_value(match.group("value"))))
+        predicate = conditions
+    for name, op, _ in predicate:
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator in condition on {name}: {op}")
+    return list(predicate)
+
+
+def _bounds(op: str, value: Any) -> Tuple[Any, Any]:
+    """The range of values a condition can match, for the zone maps."""
+    if not isinstance(value, Real) or isinstance(value, bool):
+        return None, None
+    if op in (">", ">="):
+        return value, None
+    if op in ("<", "<="):
+        return None, value
+    if op == "==":
+        return value, value
+    return None, None
+
+
+def candidate_ranges(dataset: "Dataset",
+                     conditions: List[Condition]) -> List[slice]:
+    """Ranges of rows that may match, from the zone maps of the dataset.
+
+    Blocks whose min/max rule out any condition are skipped; adjacent
+    remaining blocks are merged into one range. Without statistics the
+    whole dataset is returned in blocks.
+    Args:
+        dataset (Dataset): The dataset
+        conditions (List[Condition]): Conditions that must all hold
+    Returns:
+        List[slice]: The ranges of rows to read
+    """
+    statistics = dataset.statistics
+    if statistics is None:
+        return [slice(start, min(start + BLOCK_SIZE, dataset.num_rows))
+                for start in range(0, dataset.num_rows, BLOCK_SIZE)]
+    candidates = np.ones(statistics.num_blocks, dtype=bool)
+    for name, op, value in conditions:
+        low, high = _bounds(op, value)
+        if low is not None or high is not None:
+            candidates &= statistics.candidate_blocks(name, low, high)
+    # runs of candidate blocks: where the mask switches on and off
+    edges = np.flatnonzero(np.diff(np.concatenate(
+        [[False], candidates, [False]]).astype(np.int8)))
+    return [slice(statistics.block_rows(start).start,
+                  statistics.block_rows(stop - 1).stop)
+            for start, stop in zip(edges[::2], edges[1::2])]
+
+
+def evaluate(data: pd.DataFrame, conditions: List[Condition]) -> np.ndarray:
+    """Evaluate conditions on rows as one vectorized boolean mask.
+
+    Missing values never match.
+    Args:
+        data (pd.DataFrame): Rows holding the columns of the conditions
+        conditions (List[Condition]): Conditions that must all hold
+    Returns:
+        np.ndarray: The mask, True for rows matching every condition
+    """
+    mask = np.ones(len(data), dtype=bool)
+    for name, op, value in conditions:
+        result = OPERATORS[op](data[name], value)
+        mask &= pd.Series(result).to_numpy(dtype=bool, na_value=False)
+    return mask
+
+
+def select_rows(dataset: "Dataset", predicate: Predicate) -> np.ndarray:
+    """Find the rows of a dataset matching a predicate.
+
+    Only the columns used by the predicate are read, and only in the row
+    ranges the zone maps cannot rule out.
+    Args:
+        dataset (Dataset): The dataset
+        predicate (Predicate): See `parse_predicate`
+    Returns:
+        np.ndarray: The indices of the matching rows, in order
+    """
+    conditions = parse_predicate(predicate)
+    columns = list(dict.fromkeys(name for name, _, _ in conditions))
+    selected = [np.empty(0, dtype=np.int64)]
+    for rows in candidate_ranges(dataset, conditions):
+        mask = evaluate(dataset.read(columns, rows), conditions)
+        selected.append(rows.start + np.flatnonzero(mask))
+    return np.concatenate(selected)
@@ -0,0 +1,251 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.columnar import Buffer, ColumnarReader, pack
+
+if TYPE_CHECKING:
+    from autoop.core.ml.dataset import Dataset
+
+# Rows per block of a zone map; a filter can skip a whole block when the
+# block's min/max shows that none of its rows can match.
+BLOCK_SIZE = 65_536
+HISTOGRAM_BINS = 20
+TOP_VALUES = 10
+STATISTICS_VERSION = 1
+
+
+def statistics_path(asset_path: str) -> str:
+    """The asset path of the statistics stored next to a dataset.
+    Args:
+        asset_path (str): The asset path of the dataset
+    Returns:
+        str: The asset path of its statistics
+    """
+    return f"{asset_path}.stats"
+
+
+def _numeric_values(column: object) -> Optional[np.ndarray]:
+    """The values of a numeric column as floats with NaN for missing."""
+    if isinstance(column, np.ndarray):
+        if column.dtype.kind == "f":
+            return column
+        if column.dtype.kind in "biu":
+            return column.astype(np.float64)
+        return None
+    if isinstance(column, pd.Series):
+        column = column.array
+    if (isinstance(column, pd.api.extensions.ExtensionArray)
+            and column.dtype.kind in "biuf"
+            and not isinstance(column.dtype, pd.CategoricalDtype)):
+        return column.to_numpy(dtype=np.float64, na_value=np.nan)
+    return None
+
+
+def _zone_map(values: np.ndarray, block_size: int,
+              exact: bool) -> Dict[str, np.ndarray]:
+    """Per-block min, max and number of missing values.
+
+    Blocks without any value get NaN bounds. When the floats are rounded
+    from other types the bounds are widened by one unit in the last place,
+    so they never exclude a value that is in the block.
+    """
+    if len(values) == 0:
+        empty = np.empty(0)
+        return {"min": empty, "max": empty,
+                "nulls": np.empty(0, dtype=np.int64)}
+    starts = np.arange(0, len(values), block_size)
+    missing = np.isnan(values)
+    mins = np.fmin.reduceat(values, starts)
+    maxs = np.fmax.reduceat(values, starts)
+    if not exact:
+        mins = np.nextafter(mins, -np.inf)
+        maxs = np.nextafter(maxs, np.inf)
+    return {
+        "min": mins,
+        "max": maxs,
+        "nulls": np.add.reduceat(missing, starts).astype(np.int64),
+    }
+
+
+def _numeric_summary(values: np.ndarray) -> dict:
+    present = values[~np.isnan(values)]
+    summary = {
+        "kind": "numeric",
+        "nulls": int(len(values) - len(present)),
+        "distinct": int(len(pd.unique(present))),
+        "min": None,
+        "max": None,
+        "histogram": None,
+    }
+    if len(present):
+        counts, edges = np.histogram(present, bins=HISTOGRAM_BINS)
+        summary.update({
+            "min": float(present.min()),
+            "max": float(present.max()),
+            "histogram": {"counts": counts.tolist(),
+                          "edges": edges.tolist()},
+        })
+    return summary
+
+
+def _value_summary(column: object) -> dict:
+    series = pd.Series(column, copy=False)
+    counts = series.value_counts(dropna=True)
+    summary = {
+        "kind": "values",
+        "nulls": int(series.isna().sum()),
+        "distinct": int(len(counts)),
+        "min": None,
+        "max": None,
+        "top": [[str(value), int(count)]
+                for value, count in counts.head(TOP_VALUES).items()],
+    }
+    if len(counts) and pd.api.types.is_datetime64_any_dtype(series.dtype):
+        summary["min"] = str(series.min())
+        summary["max"] = str(series.max())
+    return summary
+
+
+def compute_statistics(dataset: "Dataset",
+                       block_size: int = BLOCK_SIZE) -> bytes:
+    """Summarise every column of a dataset and build its zone maps.
+
+    Numeric columns get min, max, missing and distinct counts, a
+    histogram and a zone map of per-block min/max; other columns get
+    missing and distinct counts and their most frequent values.
+    Args:
+        dataset (Dataset): The dataset
+        block_size (int): Rows per zone map block
+    Returns:
+        bytes: The statistics in the columnar format, see
+            `DatasetStatistics`
+    """
+    arrays = {}
+    columns = []
+    for i, name in enumerate(dataset.columns):
+        column = dataset.column(name)
+        key = f"c{i}"
+        values = _numeric_values(column)
+        if values is None:
+            summary = _value_summary(column)
+        else:
+            summary = _numeric_summary(values)
+            exact = (isinstance(column, np.ndarray)
+                     and column.dtype.kind == "f")
+            for part, array in _zone_map(values, block_size, exact).items():
+                arrays[f"{key}.{part}"] = array
+        summary.update({"name": str(name), "key": key})
+        columns.append(summary)
+    meta = {
+        "kind": "statistics",
+        "statistics_version": STATISTICS_VERSION,
+        "num_rows": dataset.num_rows,
+        "block_size": block_size,
+        "columns": columns,
+    }
+    return pack(arrays, meta)
+
+
+class DatasetStatistics(ColumnarReader):
+    """Reader for statistics written by `compute_statistics`.
+
+    Everything is answered from the small statistics buffer, without
+    reading the dataset itself.
+    """
+
+    def __init__(self, data: Buffer) -> None:
+        """Parse the statistics.
+        Args:
+            data (Buffer): The stored statistics
+        """
+        super().__init__(data)
+        if self.meta.get("kind") != "statistics":
+            raise ValueError("Buffer does not contain statistics")
+        version = self.meta.get("statistics_version")
+        if version != STATISTICS_VERSION:
+            raise ValueError(f"Unsupported statistics version: {version}")
+        self._columns = {column["name"]: column
+                         for column in self.meta["columns"]}
+
+    @property
+    def columns(self) -> List[str]:
+        """The names of the columns, in order."""
+        return list(self._columns)
+
+    @property
+    def num_rows(self) -> int:
+        """The number of rows of the dataset."""
+        return self.meta["num_rows"]
+
+    @property
+    def block_size(self) -> int:
+        """The number of rows per zone map block."""
+        return self.meta["block_size"]
+
+    @property
+    def num_blocks(self) -> int:
+        """The number of zone map blocks."""
+        return -(-self.num_rows // self.block_size)
+
+    def summary(self, name: str) -> dict:
+        """The summary of a column.
+        Args:
+            name (str): The name of the column
+        Returns:
+            dict: `kind` (numeric or values), `nulls`, `distinct`, `min`,
+                `max` and either a `histogram` or the `top` values
+        """
+        if name not in self._columns:
+            raise KeyError(f"Column not found: {name}")
+        return {key: value for key, value in self._columns[name].items()
+                if key not in ("name", "key")}
+
+    def zone_map(self, name: str
+                 ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """The per-block min, max and missing counts of a column.
+        Args:
+            name (str): The name of the column
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]: Arrays of
+                length `num_blocks`, or None if the column is not numeric
+        """
+        if self.summary(name)["kind"] != "numeric":
+            return None
+        key = self._columns[name]["key"]
+        return (self.array(f"{key}.min"), self.array(f"{key}.max"),
+                self.array(f"{key}.nulls"))
+
+    def candidate_blocks(self, name: str, low: float = None,
+                         high: float = None) -> np.ndarray:
+        """Blocks that may hold values of a column within [low, high].
+        Args:
+            name (str): The name of the column
+            low (float): Lower bound, or None for no bound
+            high (float): Upper bound, or None for no bound
+        Returns:
+            np.ndarray: A boolean mask over the blocks; blocks outside it
+                certainly hold no such value
+        """
+        zone_map = self.zone_map(name)
+        if zone_map is None:
+            return np.ones(self.num_blocks, dtype=bool)
+        mins, maxs, _ = zone_map
+        # comparisons with NaN bounds (blocks without values) are False
+        candidates = ~np.isnan(mins)
+        if low is not None:
+            candidates &= maxs >= low
+        if high is not None:
+            candidates &= mins <= high
+        return candidates
+
+    def block_rows(self, block: int) -> slice:
+        """The rows of a block.
+        Args:
+            block (int): The index of the block
+        Returns:
+            slice: The range of rows
+        """
+        start = block * self.block_size
+        return slice(start, min(start + self.block_size, self.num_rows))
@@ -0,0 +1,234 @@
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import Connection, wait
+from threading import Event
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import Metric, evaluate_batch
+from autoop.core.ml.model import Model
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.ml.preprocessing_cache import PreprocessingCache
+from autoop.core.ml.shared import MatrixSpec, SharedMatrix
+
+
+def _fit_candidate(connection: Connection, specs: Dict[str, MatrixSpec],
+                   model: Model) -> None:
+    """Worker entry point: fit one model on the shared design matrices.
+
+    When `specs` holds `train_rows`, only those training rows are used.
+    """
+    memories = []
+    try:
+        arrays = {}
+        for name, spec in specs.items():
+            segments, arrays[name] = SharedMatrix.attach(spec)
+            memories.extend(segments)
+        train_X, train_y = arrays["train_X"], arrays["train_y"]
+        if "train_rows" in arrays:
+            rows = arrays["train_rows"]
+            train_X, train_y = train_X[rows], train_y[rows]
+        started = time.perf_counter()
+        model.fit(train_X, train_y)
+        predictions = np.asarray(model.predict(arrays["test_X"]))
+        del arrays, train_X, train_y
+        connection.send(("ok", model, predictions,
+                         time.perf_counter() - started, None))
+    except Exception as error:
+        connection.send(("error", None, None, None, repr(error)))
+    finally:
+        for memory in memories:
+            memory.close()
+        connection.close()
+
+
+class ModelSweep:
+    """Train several candidate models in parallel on one design matrix.
+
+    The dataset is preprocessed and split once; the resulting matrices are
+    placed in shared memory and every candidate is fitted in its own worker
+    process with zero-copy access to them. A worker that exceeds the
+    per-model timeout, or is still running when the sweep is cancelled, is
+    terminated so that it cannot hold up the others.
+    """
+
+    def __init__(self,
+                 metrics: List[Metric],
+                 dataset: Dataset,
+                 models: List[Model],
+                 input_features: List[Feature],
+                 target_feature: Feature,
+                 split: float = 0.8,
+                 n_workers: int = None,
+                 timeout: float = None,
+                 cache: PreprocessingCache = None,
+                 sparse: Union[bool, str] = "auto",
+                 ) -> None:
+        """Create a sweep.
+        Args:
+            metrics (List[Metric]): Metrics to evaluate, the first one is
+                used to rank the models
+            dataset (Dataset): The dataset to train on
+            models (List[Model]): The candidate models
+            input_features (List[Feature]): The input features
+            target_feature (Feature): The target feature
+            split (float): Fraction of the data used for training
+            n_workers (int): Number of models fitted at the same time,
+                by default the number of CPUs
+            timeout (float): Seconds a single model may take, or None
+            cache (PreprocessingCache): Cache of encoded features
+            sparse (Union[bool, str]): Whether to build a sparse design
+                matrix, see `Pipeline`
+        """
+        if not models:
+            raise ValueError("At least one model is required")
+        if not metrics:
+            raise ValueError("At least one metric is required")
+        # validates every model against the target feature
+        self._pipelines = [
+            Pipeline(metrics, dataset, model, input_features,
+                     target_feature, split, cache, sparse)
+            for model in models
+        ]
+        self._models = models
+        self._metrics = metrics
+        self._n_workers = n_workers or os.cpu_count() or 1
+        self._timeout = timeout
+        self._cancelled = Event()
+
+    def cancel(self) -> None:
+        """Stop the sweep; running workers are terminated.
+
+        Can be called from another thread while `run` is in progress.
+        """
+        self._cancelled.set()
+
+    def run(self) -> List[dict]:
+        """Fit every candidate and rank them.
+        Returns:
+            List[dict]: One entry per model, best first, with the keys
+                `rank`, `model` (fitted when successful), `metrics` as a
+                list of (metric, value), `status` (ok, error, timeout or
+                cancelled), `fit_time` and `error`
+        """
+        self._cancelled.clear()
+        shared, test_y = self._share_design()
+        try:
+            results = self._schedule(
+                {name: array.spec for name, array in shared.items()},
+                self._models)
+        finally:
+            for array in shared.values():
+                array.release()
+        self._evaluate(results, test_y)
+        return self._rank(results)
+
+    def _share_design(self) -> Tuple[Dict[str, SharedMatrix], np.ndarray]:
+        """Build the design matrices once and place them in shared memory.
+
+        The test targets stay here: workers only return predictions, which
+        are evaluated together once every model is done.
+        """
+        train_X, train_y, test_X, test_y = (
+            self._pipelines[0].design_matrices())
+        shared = {name: SharedMatrix(array) for name, array in
+                  [("train_X", train_X), ("train_y", train_y),
+                   ("test_X", test_X)]}
+        return shared, test_y
+
+    def _evaluate(self, results: List[dict], ground_truth: np.ndarray
+                  ) -> None:
+        """Compute the metrics of all fitted models in one call."""
+        fitted = [result for result in results if result["status"] == "ok"]
+        values = evaluate_batch(
+            self._metrics, [result.pop("predictions") for result in fitted],
+            ground_truth)
+        for result, row in zip(fitted, values):
+            result["metrics"] = list(zip(self._metrics, row.tolist()))
+
+    def _schedule(self, specs: Dict[str, MatrixSpec],
+                  models: List[Model]) -> List[dict]:
+        """Fit models in workers, at most `n_workers` at a time."""
+        context = multiprocessing.get_context()
+        results = [self._result(model, "cancelled") for model in models]
+        pending = list(range(len(models)))
+        running = {}
+        while (pending or running) and not self._cancelled.is_set():
+            while pending and len(running) < self._n_workers:
+                index = pending.pop(0)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_fit_candidate,
+                    args=(sender, specs, models[index]),
+                    daemon=True,
+                )
+                process.start()
+                sender.close()
+                deadline = (time.monotonic() + self._timeout
+                            if self._timeout is not None else None)
+                running[receiver] = (index, process, deadline)
+            # wake up regularly to notice cancellation and timeouts
+            for receiver in wait(list(running), timeout=0.1):
+                index, process, _ = running.pop(receiver)
+                try:
+                    status, model, predictions, fit_time, error = (
+                        receiver.recv())
+                except EOFError:
+                    status, model, predictions, fit_time, error = (
+                        "error", None, None, None,
+                        f"worker exited with code {process.exitcode}")
+                process.join()
+                receiver.close()
+                results[index] = self._result(
+                    model or models[index], status,
+                    fit_time=fit_time, error=error)
+                if status == "ok":
+                    results[index]["predictions"] = predictions
+            now = time.monotonic()
+            for receiver, (index, process, deadline) in list(running.items()):
+                if deadline is not None and now > deadline:
+                    self._stop(process, receiver)
+                    del running[receiver]
+                    results[index] = self._result(
+                        models[index], "timeout",
+                        error=f"exceeded {self._timeout}s")
+        for receiver, (_, process, _) in running.items():
+            self._stop(process, receiver)
+        return results
+
+    @staticmethod
+    def _stop(process: multiprocessing.Process,
+              receiver: Connection) -> None:
+        process.terminate()
+        process.join()
+        receiver.close()
+
+    @staticmethod
+    def _result(model: Model, status: str, metrics: list = None,
+                fit_time: float = None, error: str = None) -> dict:
+        return {
+            "model": model,
+            "metrics": metrics or [],
+            "status": status,
+            "fit_time": fit_time,
+            "error": error,
+        }
+
+    def _rank(self, results: List[dict]) -> List[dict]:
+        """Sort successful models by the first metric, failures last."""
+        primary = self._metrics[0]
+        sign = -1 if primary.greater_is_better else 1
+
+        def key(result: dict) -> Tuple[int, float]:
+            if result["status"] != "ok":
+                return (1, 0.0)
+            return (0, sign * result["metrics"][0][1])
+
+        ranked = sorted(results, key=key)
+        for rank, result in enumerate(ranked, start=1):
+            result["rank"] = rank
+        return ranked
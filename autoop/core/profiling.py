@@ -0,0 +1,169 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# A sink receives every stage record once the stage has finished.
+Sink = Callable[[dict], None]
+
+_ACTIVE: ContextVar[Optional["Profiler"]] = ContextVar(
+    "profiler", default=None)
+
+
+def array_info(array: object) -> dict:
+    """The shape, dtype and size in bytes of a dense or sparse array.
+    Args:
+        array (object): A NumPy array or a scipy sparse matrix
+    Returns:
+        dict: `shape`, `dtype` and `nbytes`, counting every component of
+            a sparse matrix
+    """
+    # storage and the database import this module; scipy is only needed
+    # once arrays are reported
+    from scipy import sparse as sp
+    if sp.issparse(array):
+        nbytes = sum(getattr(array, part).nbytes for part in
+                     ("data", "indices", "indptr") if hasattr(array, part))
+    else:
+        array = np.asarray(array)
+        nbytes = array.nbytes
+    return {"shape": list(array.shape), "dtype": str(array.dtype),
+            "nbytes": int(nbytes)}
+
+
+class Profiler:
+    """Records the cost of the stages of a run.
+
+    For each stage it records the wall time, the CPU time of the process,
+    optionally the peak memory allocated during the stage, the sizes of
+    the arrays the stage reports, and the storage and database I/O done
+    while the stage was active. Finished stages are kept in `records` and
+    passed to every sink, e.g. to log them or send them to a monitoring
+    system.
+    """
+
+    def __init__(self, sinks: List[Sink] = None,
+                 trace_memory: bool = False) -> None:
+        """Create a profiler.
+        Args:
+            sinks (List[Sink]): Called with each finished stage record
+            trace_memory (bool): Whether to record the peak memory of each
+                stage with `tracemalloc`, which slows down allocations
+        """
+        self._sinks = list(sinks or [])
+        self._trace_memory = trace_memory
+        self._stack: List[dict] = []
+        # I/O may be recorded from the threads of a bulk transfer
+        self._io_lock = threading.Lock()
+        self.records: List[dict] = []
+
+    def add_sink(self, sink: Sink) -> None:
+        """Pass the records of stages finishing from now on to a sink."""
+        self._sinks.append(sink)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict]:
+        """Profile the code run inside the block as one stage.
+
+        The record is yielded so that the stage can add the arrays it
+        produced under `arrays`, see `array_info`.
+
+        Example:
+            with profiler.stage("train") as record:
+                model.fit(X, y)
+                record["arrays"]["X"] = array_info(X)
+        Args:
+            name (str): The name of the stage
+        Returns:
+            Iterator[dict]: The record of the stage
+        """
+        record = {"stage": name, "wall_time": None, "cpu_time": None,
+                  "peak_memory": None, "arrays": {}, "io": {}}
+        started_tracing = False
+        if self._trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        self._stack.append(record)
+        token = _ACTIVE.set(self)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - wall
+            record["cpu_time"] = time.process_time() - cpu
+            _ACTIVE.reset(token)
+            self._stack.pop()
+            if self._trace_memory:
+                record["peak_memory"] = max(
+                    tracemalloc.get_traced_memory()[1] - baseline, 0)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.records.append(record)
+            for sink in self._sinks:
+                sink(record)
+
+    def _add_io(self, kind: str, seconds: float, nbytes: int) -> None:
+        """Add an I/O operation to the innermost active stage."""
+        if not self._stack:
+            return
+        with self._io_lock:
+            totals = self._stack[-1]["io"].setdefault(
+                kind, {"count": 0, "seconds": 0.0, "bytes": 0})
+            totals["count"] += 1
+            totals["seconds"] += seconds
+            totals["bytes"] += nbytes
+
+
+@contextmanager
+def record_io(kind: str, nbytes: int = 0) -> Iterator[dict]:
+    """Record an I/O operation in the stage being profiled, if any.
+
+    Costs a context variable lookup when nothing is being profiled. The
+    number of bytes can be given up front or set on the yielded event,
+    e.g. once data has been read.
+    Args:
+        kind (str): The kind of operation, e.g. "storage.load"
+        nbytes (int): The number of bytes transferred
+    Returns:
+        Iterator[dict]: The event, whose `bytes` may be updated
+    """
+    profiler = _ACTIVE.get()
+    event = {"bytes": nbytes}
+    if profiler is None:
+        yield event
+        return
+    started = time.perf_counter()
+    try:
+        yield event
+    finally:
+        profiler._add_io(kind, time.perf_counter() - started, event["bytes"])
+
+
+def summarize(records: List[dict]) -> Dict[str, dict]:
+    """Total the records of stages by name.
+    Args:
+        records (List[dict]): Stage records, e.g. `Profiler.records`
+    Returns:
+        Dict[str, dict]: Per stage name, in order of first occurrence, the
+            `count`, total `wall_time` and `cpu_time` and largest
+            `peak_memory`
+    """
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record["stage"], {
+            "count": 0, "wall_time": 0.0, "cpu_time": 0.0,
+            "peak_memory": None})
+        total["count"] += 1
+        total["wall_time"] += record["wall_time"]
+        total["cpu_time"] += record["cpu_time"]
+        if record["peak_memory"] is not None:
+            total["peak_memory"] = max(total["peak_memory"] or 0,
+                                       record["peak_memory"])
+    return totals
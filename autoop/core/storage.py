@@ -1,12 +1,33 @@
 from abc import ABC, abstractmethod
+import hashlib
+import json
+import mmap
 import os
-from typing import List, Union
-from glob import glob
+import time
+from threading import RLock, get_ident
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from autoop.core.profiling import record_io
 
 class NotFoundError(Exception):
     def __init__(self, path):
         super().__init__(f"Path not found: {path}")
 
+
+class AlreadyExistsError(Exception):
+    def __init__(self, path):
+        super().__init__(f"Path already exists: {path}")
+
+
+class StoredKey(NamedTuple):
+    """A key found by `LocalStorage.scan`, with its size in bytes and
+    modification time when they were requested."""
+    key: str
+    size: Optional[int] = None
+    mtime: Optional[float] = None
+
 class Storage(ABC):
 
     @abstractmethod
@@ -30,6 +51,18 @@ class Storage(ABC):
         """
         pass
 
+    def load_buffer(self, path: str) -> Union[bytes, memoryview]:
+        """
+        Load data from a given path as a read-only buffer. Backends that
+        can memory-map their data override this so that callers only page
+        in the parts of the buffer they touch.
+        Args:
+            path (str): Path to load data
+        Returns:
+            Union[bytes, memoryview]: Loaded data
+        """
+        return self.load(path)
+
     @abstractmethod
     def delete(self, path: str):
         """
@@ -50,6 +83,70 @@ class Storage(ABC):
         """
         pass
 
+    def create(self, data: bytes, path: str):
+        """
+        Save data to a path that must not exist yet. Backends override
+        this to claim the path atomically; this fallback checks first and
+        so cannot tell concurrent writers apart.
+        Args:
+            data (bytes): Data to save
+            path (str): Path to save data
+        Raises:
+            AlreadyExistsError: If the path exists
+        """
+        try:
+            self.load(path)
+        except NotFoundError:
+            self.save(data, path)
+            return
+        raise AlreadyExistsError(path)
+
+    def save_many(self, items: Dict[str, bytes]):
+        """
+        Save data to several paths. Backends override this when they can
+        do better than one `save` per path.
+        Args:
+            items (Dict[str, bytes]): Data to save, by path
+        """
+        for path, data in items.items():
+            self.save(data, path)
+
+    def load_many(self, paths: List[str],
+                  missing_ok: bool = False) -> List[Optional[bytes]]:
+        """
+        Load data from several paths
+        Args:
+            paths (List[str]): Paths to load
+            missing_ok (bool): Return None for missing paths instead of
+                raising `NotFoundError`
+        Returns:
+            List[Optional[bytes]]: The data of each path, in order
+        """
+        results = []
+        for path in paths:
+            try:
+                results.append(self.load(path))
+            except NotFoundError:
+                if not missing_ok:
+                    raise
+                results.append(None)
+        return results
+
+    def delete_many(self, paths: List[str], missing_ok: bool = False):
+        """
+        Delete data at several paths
+        Args:
+            paths (List[str]): Paths to delete
+            missing_ok (bool): Skip missing paths instead of raising
+                `NotFoundError`
+        """
+        for path in paths:
+            try:
+                self.delete(path)
+            except NotFoundError:
+                if not missing_ok:
+                    raise
+
 
 class LocalStorage(Storage):
 
@@ -62,25 +159,137 @@ class LocalStorage(Storage):
         path = self._join_path(key)
         if not os.path.exists(path):
             os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, 'wb') as f:
+        with record_io("storage.save", len(data)):
+            self._write(path, data)
+
+    def create(self, data: bytes, key: str):
+        """Save a key only if it does not exist, claimed with O_EXCL."""
+        path = self._join_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            raise AlreadyExistsError(path)
+        with record_io("storage.save", len(data)), os.fdopen(fd, 'wb') as f:
             f.write(data)
 
+    def save_many(self, items: Dict[str, bytes]):
+        """Save several keys, creating each directory only once."""
+        directories = set()
+        with record_io("storage.save_many",
+                       sum(len(data) for data in items.values())):
+            for key, data in items.items():
+                path = self._join_path(key)
+                directory = os.path.dirname(path)
+                if directory not in directories:
+                    os.makedirs(directory, exist_ok=True)
+                    directories.add(directory)
+                self._write(path, data)
+
     def load(self, key: str) -> bytes:
         path = self._join_path(key)
         self._assert_path_exists(path)
-        with open(path, 'rb') as f:
-            return f.read()
+        with record_io("storage.load") as event, open(path, 'rb') as f:
+            data = f.read()
+            event["bytes"] = len(data)
+        return data
+
+    def load_many(self, keys: List[str],
+                  missing_ok: bool = False) -> List[Optional[bytes]]:
+        """Load several keys, opening each file directly."""
+        results = []
+        with record_io("storage.load_many") as event:
+            for key in keys:
+                # a failed open is the existence check
+                try:
+                    with open(self._join_path(key), 'rb') as f:
+                        results.append(f.read())
+                except FileNotFoundError:
+                    if not missing_ok:
+                        raise NotFoundError(self._join_path(key))
+                    results.append(None)
+            event["bytes"] = sum(len(data) for data in results
+                                 if data is not None)
+        return results
+
+    def load_buffer(self, key: str) -> Union[bytes, memoryview]:
+        path = self._join_path(key)
+        self._assert_path_exists(path)
+        if os.path.getsize(path) == 0:
+            return b""
+        # only mapped here: the bytes are paged in when they are used
+        with record_io("storage.map"), open(path, 'rb') as f:
+            # the mapping stays valid after the file object is closed
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped)
 
     def delete(self, key: str="/"):
         self._assert_path_exists(self._join_path(key))
         path = self._join_path(key)
-        os.remove(path)
+        with record_io("storage.delete"):
+            os.remove(path)
+
+    def delete_many(self, keys: List[str], missing_ok: bool = False):
+        """Delete several keys, removing each file directly."""
+        with record_io("storage.delete_many"):
+            for key in keys:
+                try:
+                    os.remove(self._join_path(key))
+                except FileNotFoundError:
+                    if not missing_ok:
+                        raise NotFoundError(self._join_path(key))
 
     def list(self, prefix: str) -> List[str]:
-        path = self._join_path(prefix)
-        self._assert_path_exists(path)
-        keys = glob(path + "/**/*", recursive=True)
-        return list(filter(os.path.isfile, keys))
+        """List the keys under a prefix, relative to the base path."""
+        return [entry.key for entry in self.scan(prefix)]
+
+    def scan(self, prefix: str = "",
+             stat: bool = False) -> Iterator[StoredKey]:
+        """Walk the keys under a prefix, yielding them as they are found.
+
+        Uses `os.scandir`, so the type of each entry comes with the
+        directory listing and only `stat` costs a system call per key.
+        Hidden files and directories, such as the temporary files of
+        writes in progress, are skipped.
+        Args:
+            prefix (str): Directory to walk, relative to the base path
+            stat (bool): Whether to fill in the size and modification time
+        Returns:
+            Iterator[StoredKey]: The keys, relative to the base path
+        """
+        root = self._join_path(prefix)
+        self._assert_path_exists(root)
+        stack = [(root, prefix.strip("/"))]
+        while stack:
+            directory, parent = stack.pop()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    key = f"{parent}/{entry.name}" if parent else entry.name
+                    if entry.is_dir():
+                        stack.append((entry.path, key))
+                    elif not entry.is_file():
+                        continue
+                    elif stat:
+                        info = entry.stat()
+                        yield StoredKey(key, info.st_size, info.st_mtime)
+                    else:
+                        yield StoredKey(key)
+
+    def _write(self, path: str, data: bytes):
+        """Write a file atomically.
+
+        The data goes to a temporary file that is swapped in, so that
+        readers which memory-mapped the previous version keep a valid
+        mapping. The name of the temporary file is unique per thread.
+        """
+        directory, name = os.path.split(path)
+        tmp_path = os.path.join(
+            directory, f".{name}.{os.getpid()}.{get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
 
     def _assert_path_exists(self, path: str):
         if not os.path.exists(path):
@@ -90,4 +299,217 @@ class LocalStorage(Storage):
         return os.path.join(self._base_path, path)
 
 
-    
\ No newline at end of file
+class ContentAddressedStorage(Storage):
+    """Storage that deduplicates data by content.
+
+    Data is split into content-defined chunks which are stored once under
+    their SHA-256 hash, so identical uploads and similar versions of the
+    same asset share their bytes on disk. Every key maps to a manifest
+    listing its chunks; chunks are reference counted and removed when the
+    last key using them is deleted. Only one writer per base path is
+    supported, since the reference counts are kept in memory.
+    """
+
+    _WINDOW = 48
+    _GEAR = np.random.default_rng(0x5EED).integers(
+        0, 2**63, size=256, dtype=np.uint64)
+
+    def __init__(self, base_path: str = "./assets",
+                 min_chunk_size: int = 16 * 1024,
+                 avg_chunk_size: int = 64 * 1024,
+                 max_chunk_size: int = 256 * 1024) -> None:
+        """Open or create a content-addressed store.
+        Args:
+            base_path (str): Directory holding chunks and manifests
+            min_chunk_size (int): Smallest chunk, except at the end
+            avg_chunk_size (int): Expected chunk size, a power of two
+            max_chunk_size (int): Largest chunk
+        """
+        if avg_chunk_size & (avg_chunk_size - 1):
+            raise ValueError("avg_chunk_size must be a power of two")
+        self._min_chunk_size = min_chunk_size
+        self._mask = np.uint64(avg_chunk_size - 1)
+        self._max_chunk_size = max_chunk_size
+        self._chunks = LocalStorage(os.path.join(base_path, "chunks"))
+        self._manifests = LocalStorage(os.path.join(base_path, "manifests"))
+        self._lock = RLock()
+        self._refcounts = {}
+        self._count_references()
+
+    def save(self, data: bytes, key: str) -> None:
+        """Save data under a key, writing only chunks not yet stored."""
+        chunks = []
+        with self._lock:
+            for start, end in self._chunk_bounds(data):
+                chunk = memoryview(data)[start:end]
+                digest = hashlib.sha256(chunk).hexdigest()
+                if digest not in self._refcounts:
+                    self._chunks.save(chunk, self._chunk_key(digest))
+                    self._refcounts[digest] = 0
+                chunks.append(digest)
+            self._incref(chunks)
+            old = self._read_manifest(key) if self._exists(key) else None
+            manifest = {"size": len(data), "chunks": chunks}
+            # chunks are only collected once no manifest lists them, so an
+            # interrupted write can leave unused chunks but never loses any
+            self._manifests.save(json.dumps(manifest).encode(), key)
+            if old is not None:
+                self._decref(old["chunks"])
+
+    def load(self, key: str) -> bytes:
+        """Load data by reassembling its chunks."""
+        manifest = self._read_manifest(key)
+        return b"".join(self._chunks.load(self._chunk_key(digest))
+                        for digest in manifest["chunks"])
+
+    def delete(self, key: str = "/") -> None:
+        """Delete a key and garbage collect chunks nothing refers to."""
+        with self._lock:
+            manifest = self._read_manifest(key)
+            self._manifests.delete(key)
+            self._decref(manifest["chunks"])
+
+    def list(self, prefix: str) -> List[str]:
+        """List the paths of the keys under a prefix."""
+        return self._manifests.list(prefix)
+
+    def _exists(self, key: str) -> bool:
+        return os.path.isfile(self._manifests._join_path(key))
+
+    def _read_manifest(self, key: str) -> Dict:
+        return json.loads(self._manifests.load(key))
+
+    def _chunk_key(self, digest: str) -> str:
+        return f"{digest[:2]}/{digest[2:]}"
+
+    def _incref(self, chunks: List[str]) -> None:
+        for digest in set(chunks):
+            self._refcounts[digest] += 1
+
+    def _decref(self, chunks: List[str]) -> None:
+        for digest in set(chunks):
+            self._refcounts[digest] -= 1
+            if self._refcounts[digest] <= 0:
+                del self._refcounts[digest]
+                self._chunks.delete(self._chunk_key(digest))
+
+    def _count_references(self) -> None:
+        """Rebuild the reference counts from the manifests.
+
+        The manifests are the only record of which chunks are used, so
+        saves and deletes write no more than the manifest they change.
+        """
+        keys = self._manifests.list("")
+        for data in self._manifests.load_many(keys):
+            chunks = json.loads(data)["chunks"]
+            for digest in set(chunks):
+                self._refcounts[digest] = self._refcounts.get(digest, 0) + 1
+
+    def _chunk_bounds(self, data: bytes) -> List[tuple]:
+        """Split data into content-defined chunks.
+
+        A gear hash over a sliding window marks candidate cut points where
+        its low bits are zero; cut points therefore depend only on nearby
+        content, so an insertion early in a file does not shift every
+        later chunk. The hash is computed in vectorised segments.
+        """
+        size = len(data)
+        cuts = []
+        last = 0
+        segment = 4 * 1024 * 1024
+        window = self._WINDOW
+        for seg_start in range(0, size, segment):
+            lo = max(seg_start - window, 0)
+            hi = min(seg_start + segment, size)
+            values = self._GEAR[np.frombuffer(data, np.uint8, hi - lo, lo)]
+            sums = np.cumsum(values, dtype=np.uint64)
+            hashes = sums.copy()
+            hashes[window:] -= sums[:-window]
+            candidates = np.flatnonzero((hashes & self._mask) == 0)
+            candidates = candidates[candidates >= seg_start - lo] + lo + 1
+            for cut in candidates.tolist():
+                while cut - last > self._max_chunk_size:
+                    last += self._max_chunk_size
+                    cuts.append(last)
+                if cut - last >= self._min_chunk_size:
+                    cuts.append(cut)
+                    last = cut
+        while size - last > self._max_chunk_size:
+            last += self._max_chunk_size
+            cuts.append(last)
+        bounds = [0] + cuts
+        if size > bounds[-1] or size == 0:
+            bounds.append(size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+
+class LatencyStorage(Storage):
+    """Stand-in for a remote object store, for tests and benchmarks.
+
+    Forwards every request to a local storage after a fixed delay, like
+    the round trip to a service such as S3. Requests made from several
+    threads wait concurrently, so the time of a bulk transfer shows
+    whether its requests overlap.
+    """
+
+    def __init__(self, storage: Storage, latency: float = 0.02) -> None:
+        """Wrap a storage.
+        Args:
+            storage (Storage): The storage holding the data
+            latency (float): Seconds added to every request
+        """
+        self._storage = storage
+        self._latency = latency
+
+    def save(self, data: bytes, key: str) -> None:
+        """
+        Save data to a key after the delay
+        Args:
+            data (bytes): Data to save
+            key (str): Key to save data under
+        """
+        time.sleep(self._latency)
+        self._storage.save(data, key)
+
+    def create(self, data: bytes, key: str) -> None:
+        """
+        Save data to a new key after the delay
+        Args:
+            data (bytes): Data to save
+            key (str): Key to create
+        Raises:
+            AlreadyExistsError: If the key already exists
+        """
+        time.sleep(self._latency)
+        self._storage.create(data, key)
+
+    def load(self, key: str) -> bytes:
+        """
+        Load data from a key after the delay
+        Args:
+            key (str): Key to load data from
+        Returns:
+            bytes: Loaded data
+        """
+        time.sleep(self._latency)
+        return self._storage.load(key)
+
+    def delete(self, key: str = "/") -> None:
+        """
+        Delete data at a key after the delay
+        Args:
+            key (str): Key to delete data at
+        """
+        time.sleep(self._latency)
+        self._storage.delete(key)
+
+    def list(self, prefix: str) -> List[str]:
+        """
+        List all keys under a prefix after the delay
+        Args:
+            prefix (str): Prefix to list
+        Returns:
+            List[str]: List of keys
+        """
+        time.sleep(self._latency)
+        return self._storage.list(prefix)
@@ -1,31 +1,252 @@
-from typing import List, Tuple
+from typing import Iterable, List, Tuple, Union
 from autoop.core.ml.feature import Feature
 from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.preprocessing_cache import PreprocessingCache
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from scipy.sparse import csr_matrix
 
-def preprocess_features(features: List[Feature], dataset: Dataset) -> List[Tuple[str, np.ndarray, dict]]:
+_TRANSFORMS = {
+    "categorical": "OneHotEncoder",
+    "numerical": "StandardScaler",
+}
+
+# A design matrix is built sparse when it is at least this wide and at most
+# this fraction of its entries can be non-zero (one per feature per row).
+SPARSE_MIN_WIDTH = 32
+SPARSE_MAX_DENSITY = 0.25
+
+DesignMatrix = Union[np.ndarray, csr_matrix]
+Layout = List[Tuple[str, slice, dict]]
+
+
+def _encode(feature: Feature, dataset: Dataset) -> Tuple[np.ndarray, dict]:
+    """Fit the transformer of a feature and encode its column.
+
+    Categorical features are kept compact as category codes of shape (N,);
+    they are only expanded to one-hot columns when they are written out.
+    Missing values are a category of their own, sorted last, as in a
+    `OneHotEncoder` fitted on the whole column.
+    """
+    # scikit-learn is imported on first use, not with the pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    column = np.asarray(dataset.column(feature.name))
+    if feature.type == "categorical":
+        codes, categories = pd.factorize(column, sort=True,
+                                         use_na_sentinel=False)
+        # fitting on the distinct values gives the same encoder as fitting
+        # on the whole column, at a fraction of the cost
+        encoder = OneHotEncoder()
+        encoder.fit(np.asarray(categories, dtype=column.dtype).reshape(-1, 1))
+        aritfact = {"type": "OneHotEncoder", "transformer": encoder}
+        return codes.astype(np.int32, copy=False), aritfact
+    scaler = StandardScaler()
+    data = scaler.fit_transform(column.reshape(-1, 1))
+    artifact = {"type": "StandardScaler", "transformer": scaler}
+    return data, artifact
+
+
+def _encoded(features: List[Feature], dataset: Dataset,
+             cache: PreprocessingCache = None
+             ) -> List[Tuple[str, np.ndarray, dict]]:
+    """Encode features, using the cache when given, sorted by name."""
+    results = []
+    # Only the requested columns are read; for a memory-mapped dataset the
+    # other columns are never paged in.
+    for feature in features:
+        if feature.type not in _TRANSFORMS:
+            continue
+        key = PreprocessingCache.key(
+            dataset, feature, _TRANSFORMS[feature.type])
+        entry = cache.get(key) if cache is not None else None
+        if entry is None:
+            entry = _encode(feature, dataset)
+            if cache is not None:
+                cache.put(key, entry)
+        data, artifact = entry
+        results.append((feature.name, data, artifact))
+    # Sort for consistency
+    return list(sorted(results, key=lambda x: x[0]))
+
+
+def _width(artifact: dict) -> int:
+    """Number of columns a feature takes in the design matrix."""
+    if artifact["type"] == "OneHotEncoder":
+        return len(artifact["transformer"].categories_[0])
+    return 1
+
+
+def preprocess_features(features: List[Feature], dataset: Dataset,
+                        cache: PreprocessingCache = None
+                        ) -> List[Tuple[str, np.ndarray, dict]]:
     """Preprocess features.
     Args:
         features (List[Feature]): List of features.
         dataset (Dataset): Dataset object.
+        cache (PreprocessingCache): Cache of encoded features; features
+            found in it are neither read nor encoded again.
     Returns:
         List[str, Tuple[np.ndarray, dict]]: List of preprocessed features. Each ndarray of shape (N, ...)
     """
     results = []
-    raw = dataset.read()
-    for feature in features:
-        if feature.type == "categorical":
-            encoder = OneHotEncoder()
-            data = encoder.fit_transform(raw[feature.name].values.reshape(-1, 1)).toarray()
-            aritfact = {"type": "OneHotEncoder", "encoder": encoder.get_params()}
-            results.append((feature.name, data, aritfact))
-        if feature.type == "numerical":
-            scaler = StandardScaler()
-            data = scaler.fit_transform(raw[feature.name].values.reshape(-1, 1))
-            artifact = {"type": "StandardScaler", "scaler": scaler.get_params()}
-            results.append((feature.name, data, artifact))
-    # Sort for consistency
-    results = list(sorted(results, key=lambda x: x[0]))
+    for name, data, artifact in _encoded(features, dataset, cache):
+        if artifact["type"] == "OneHotEncoder":
+            _check_codes(name, data)
+            one_hot = np.zeros((len(data), _width(artifact)))
+            one_hot[np.arange(len(data)), data] = 1
+            data = one_hot
+        results.append((name, data, artifact))
     return results
+
+
+def build_design_matrix(features: List[Feature], dataset: Dataset,
+                        cache: PreprocessingCache = None,
+                        sparse: Union[bool, str] = "auto",
+                        ) -> Tuple[DesignMatrix, Layout]:
+    """Preprocess features straight into one preallocated matrix.
+
+    Unlike `preprocess_features`, no per-feature blocks are materialised
+    and concatenated: every feature is written into its columns of a single
+    matrix. When one-hot columns dominate, the matrix is built as CSR with
+    exactly one stored entry per feature and row.
+    Args:
+        features (List[Feature]): List of features.
+        dataset (Dataset): Dataset object.
+        cache (PreprocessingCache): Cache of encoded features.
+        sparse (Union[bool, str]): True for CSR, False for dense, or "auto"
+            to decide from the width and density of the matrix.
+    Returns:
+        Tuple[DesignMatrix, Layout]: The matrix of shape (N, width) and,
+            per feature sorted by name, its columns in the matrix and its
+            artifact.
+    """
+    return _assemble(_encoded(features, dataset, cache), sparse)
+
+
+def fit_transformers(features: List[Feature],
+                     chunks: Iterable[pd.DataFrame]) -> List[Tuple[str, dict]]:
+    """Fit the transformers of features in a single pass over chunks.
+
+    Scalers are updated with `partial_fit` and the categories seen so far
+    are kept per feature, so only one chunk is in memory at a time. The
+    fitted transformers equal those `preprocess_features` fits on the
+    whole dataset.
+    Args:
+        features (List[Feature]): List of features.
+        chunks (Iterable[pd.DataFrame]): Chunks of rows holding at least
+            the columns of the features, see `Dataset.iter_chunks`.
+    Returns:
+        List[Tuple[str, dict]]: Per feature sorted by name, its artifact.
+    """
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    features = [feature for feature in features
+                if feature.type in _TRANSFORMS]
+    scalers = {feature.name: StandardScaler() for feature in features
+               if feature.type == "numerical"}
+    categories = {feature.name: None for feature in features
+                  if feature.type == "categorical"}
+    for chunk in chunks:
+        for name, scaler in scalers.items():
+            scaler.partial_fit(np.asarray(chunk[name]).reshape(-1, 1))
+        for name, seen in categories.items():
+            values = pd.unique(np.asarray(chunk[name]))
+            if seen is not None:
+                values = pd.unique(np.concatenate([seen, values]))
+            categories[name] = values
+    artifacts = []
+    for name, scaler in scalers.items():
+        artifacts.append((name, {"type": "StandardScaler",
+                                 "transformer": scaler}))
+    for name, seen in categories.items():
+        if seen is None:
+            raise ValueError("Cannot fit transformers without any rows")
+        _, uniques = pd.factorize(seen, sort=True, use_na_sentinel=False)
+        encoder = OneHotEncoder()
+        encoder.fit(np.asarray(uniques, dtype=seen.dtype).reshape(-1, 1))
+        artifacts.append((name, {"type": "OneHotEncoder",
+                                 "transformer": encoder}))
+    return sorted(artifacts, key=lambda x: x[0])
+
+
+def transform_features(data: pd.DataFrame,
+                       artifacts: List[Tuple[str, dict]],
+                       sparse: Union[bool, str] = "auto",
+                       ) -> Tuple[DesignMatrix, Layout]:
+    """Encode rows with already fitted transformers.
+
+    Used to encode a dataset chunk by chunk, or new observations, exactly
+    like the data the transformers were fitted on. With the same artifacts
+    and `sparse`, every call yields the same layout.
+    Args:
+        data (pd.DataFrame): Rows holding the columns of the features.
+        artifacts (List[Tuple[str, dict]]): Per feature sorted by name,
+            its fitted artifact.
+        sparse (Union[bool, str]): See `build_design_matrix`.
+    Returns:
+        Tuple[DesignMatrix, Layout]: See `build_design_matrix`.
+    """
+    encoded = []
+    for name, artifact in artifacts:
+        column = np.asarray(data[name])
+        transformer = artifact["transformer"]
+        if artifact["type"] == "OneHotEncoder":
+            codes = pd.Index(transformer.categories_[0]).get_indexer(column)
+            if (codes < 0).any():
+                raise ValueError(f"Unknown category in feature {name}")
+            encoded.append((name, codes.astype(np.int32), artifact))
+        else:
+            encoded.append(
+                (name, transformer.transform(column.reshape(-1, 1)), artifact))
+    return _assemble(encoded, sparse)
+
+
+def _check_codes(name: str, codes: np.ndarray) -> None:
+    """Refuse negative category codes, which would index another column."""
+    if len(codes) and codes.min() < 0:
+        raise ValueError(f"Feature {name} has values without a category")
+
+
+def _assemble(encoded: List[Tuple[str, np.ndarray, dict]],
+              sparse: Union[bool, str]) -> Tuple[DesignMatrix, Layout]:
+    """Write encoded features, sorted by name, into one matrix."""
+    if not encoded:
+        raise ValueError("At least one feature is required")
+    rows = len(encoded[0][1])
+    for name, data, artifact in encoded:
+        if artifact["type"] == "OneHotEncoder":
+            _check_codes(name, data)
+    layout = []
+    offset = 0
+    for name, _, artifact in encoded:
+        width = _width(artifact)
+        layout.append((name, slice(offset, offset + width), artifact))
+        offset += width
+    width = offset
+    if sparse == "auto":
+        sparse = (width >= SPARSE_MIN_WIDTH
+                  and len(encoded) <= SPARSE_MAX_DENSITY * width)
+    if sparse:
+        per_row = len(encoded)
+        index_type = np.int32 if width < 2**31 else np.int64
+        indices = np.empty((rows, per_row), dtype=index_type)
+        values = np.empty((rows, per_row))
+        for j, ((_, data, artifact), (_, columns, _)) in enumerate(
+                zip(encoded, layout)):
+            if artifact["type"] == "OneHotEncoder":
+                indices[:, j] = columns.start + data
+                values[:, j] = 1
+            else:
+                indices[:, j] = columns.start
+                values[:, j] = data[:, 0]
+        indptr = np.arange(0, rows * per_row + 1, per_row, dtype=index_type)
+        matrix = csr_matrix((values.reshape(-1), indices.reshape(-1), indptr),
+                            shape=(rows, width))
+        return matrix, layout
+    matrix = np.zeros((rows, width))
+    row_index = np.arange(rows)
+    for (_, data, artifact), (_, columns, _) in zip(encoded, layout):
+        if artifact["type"] == "OneHotEncoder":
+            matrix[row_index, columns.start + data] = 1
+        else:
+            matrix[:, columns.start] = data[:, 0]
+    return matrix, layout
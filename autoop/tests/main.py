@@ -1,9 +1,26 @@
 
 import unittest
 from autoop.tests.test_database import TestDatabase
-from autoop.tests.test_storage import TestStorage
+from autoop.tests.test_storage import TestStorage, TestContentAddressedStorage
 from autoop.tests.test_features import TestFeatures
 from autoop.tests.test_pipeline import TestPipeline
+from autoop.tests.test_dataset import TestDataset
+from autoop.tests.test_cache import TestCache
+from autoop.tests.test_metric import TestMetric
+from autoop.tests.test_model import TestModel
+from autoop.tests.test_sweep import TestSweep
+from autoop.tests.test_preprocessing import TestPreprocessing
+from autoop.tests.test_streaming import TestStreaming
+from autoop.tests.test_serving import TestServing
+from autoop.tests.test_fitted_state import TestFittedState
+from autoop.tests.test_statistics import TestStatistics
+from autoop.tests.test_slicing import TestSlicing
+from autoop.tests.test_search import TestSearch
+from autoop.tests.test_cross_validation import TestCrossValidation
+from autoop.tests.test_benchmarks import TestBenchmarks
+from autoop.tests.test_profiling import TestProfiling
+from autoop.tests.test_imports import TestImports
+from autoop.tests.test_async_storage import TestAsyncStorage
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
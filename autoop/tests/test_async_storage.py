@@ -0,0 +1,82 @@
+import tempfile
+import time
+import unittest
+
+from app.core.system import ArtifactRegistry
+from autoop.core.async_storage import AsyncLocalStorage, ThreadedStorage, run
+from autoop.core.database import Database
+from autoop.core.ml.artifact import Artifact
+from autoop.core.storage import LatencyStorage, LocalStorage, NotFoundError
+
+LATENCY = 0.02
+
+
+class TestAsyncStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.local = LocalStorage(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_bulk(self):
+        storage = AsyncLocalStorage(self.directory.name, max_concurrency=4)
+        items = {f"a/{i}": str(i).encode() for i in range(20)}
+        run(storage.save_many(items))
+        self.assertEqual(run(storage.load_many(list(items))),
+                         list(items.values()))
+        run(storage.delete("a/0"))
+        self.assertEqual(run(storage.load_many(["a/0", "a/1"],
+                                               missing_ok=True)),
+                         [None, b"1"])
+        with self.assertRaises(NotFoundError):
+            run(storage.load_many(["a/0", "a/1"]))
+        with self.assertRaises(ValueError):
+            ThreadedStorage(self.local, max_concurrency=0)
+
+    def test_latency_overlaps(self):
+        for i in range(32):
+            self.local.save(b"x", f"k/{i}")
+        keys = [f"k/{i}" for i in range(32)]
+        remote = LatencyStorage(self.local, latency=LATENCY)
+        start = time.perf_counter()
+        run(ThreadedStorage(remote, max_concurrency=16).load_many(keys))
+        concurrent = time.perf_counter() - start
+        # 32 sequential round trips take at least 32 * LATENCY
+        self.assertLess(concurrent, 16 * LATENCY)
+
+    def test_database_cold_load(self):
+        database = Database(self.local)
+        with database.transaction():
+            for i in range(32):
+                database.set("collection", str(i), {"value": i})
+        remote = LatencyStorage(self.local, latency=LATENCY)
+        start = time.perf_counter()
+        loaded = Database(remote, max_concurrency=32)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(sorted(loaded.list("collection")),
+                         sorted(database.list("collection")))
+        # the listing, the generation and one batch of reads
+        self.assertLess(elapsed, 16 * LATENCY)
+
+    def test_database_refresh(self):
+        reader = Database(self.local)
+        writer = Database(self.local)
+        writer.set("collection", "a", {"value": 1})
+        writer.set("collection", "b", {"value": 2})
+        writer.delete("collection", "a")
+        reader.refresh()
+        self.assertEqual(reader.list("collection"), [("b", {"value": 2})])
+
+    def test_registry_load(self):
+        registry = ArtifactRegistry(
+            Database(LocalStorage(f"{self.directory.name}/db")),
+            LocalStorage(f"{self.directory.name}/objects"))
+        for i in range(5):
+            registry.register(Artifact(name=str(i), asset_path=f"{i}.bin",
+                                       data=str(i).encode()))
+        artifacts = registry.list(load=True)
+        self.assertTrue(all(artifact.is_loaded for artifact in artifacts))
+        self.assertEqual(sorted(artifact.data for artifact in artifacts),
+                         [str(i).encode() for i in range(5)])
@@ -0,0 +1,49 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from autoop.benchmarks.generators import synthetic_features, synthetic_table
+from autoop.benchmarks.suite import (
+    BENCHMARKS,
+    compare,
+    read_results,
+    run_suite,
+    write_results,
+)
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_synthetic_table(self):
+        table = synthetic_table(1000, numerical=3, categorical=2,
+                                cardinality=5)
+        self.assertEqual(list(table.columns),
+                         ["x0", "x1", "x2", "c0", "c1", "y", "label"])
+        self.assertEqual(table["c1"].nunique(), 5)
+        self.assertEqual(sorted(table["label"].value_counts()),
+                         [333, 333, 334])
+        self.assertEqual([f.type for f in synthetic_features(table)],
+                         ["numerical"] * 3 + ["categorical"] * 2)
+        self.assertTrue(synthetic_table(10, seed=1).equals(
+            synthetic_table(10, seed=1)))
+
+    def test_run_and_compare(self):
+        results = run_suite(repeat=1)
+        self.assertEqual([r["benchmark"] for r in results["results"]],
+                         list(BENCHMARKS))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+            write_results(results, path)
+            baseline = read_results(path)
+        self.assertEqual(compare(baseline, baseline), [])
+        slower = copy.deepcopy(baseline)
+        slower["results"][0]["seconds"]["min"] *= 2
+        regressions = compare(baseline, slower)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]["measure"], "seconds")
+        self.assertAlmostEqual(regressions[0]["ratio"], 2)
+
+    def test_unknown_benchmark(self):
+        with self.assertRaises(ValueError):
+            run_suite(benchmarks=["unknown"])
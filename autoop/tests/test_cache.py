@@ -0,0 +1,51 @@
+import unittest
+
+from autoop.core.cache import LRUCache
+from autoop.core.ml.artifact import Artifact
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = LRUCache(10)
+
+    def test_get_put(self):
+        self.cache.put("a", b"1234")
+        self.assertEqual(self.cache.get("a"), b"1234")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.size, 4)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put("a", b"1234")
+        self.cache.put("b", b"1234")
+        self.cache.get("a")
+        self.cache.put("c", b"1234")
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertIn("c", self.cache)
+        self.assertLessEqual(self.cache.size, self.cache.max_size)
+
+    def test_oversized_values_are_not_cached(self):
+        self.cache.put("a", b"x" * 11)
+        self.assertNotIn("a", self.cache)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_invalidate(self):
+        self.cache.put("a", b"1234")
+        self.cache.invalidate("a")
+        self.assertNotIn("a", self.cache)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_lazy_artifact(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return b"data"
+
+        artifact = Artifact(name="lazy", loader=loader)
+        self.assertFalse(artifact.is_loaded)
+        self.assertEqual(artifact.data, b"data")
+        self.assertEqual(artifact.data, b"data")
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(artifact.is_loaded)
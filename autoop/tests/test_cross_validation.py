@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+from sklearn.preprocessing import StandardScaler
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import Accuracy, MeanSquaredError, RSquared
+from autoop.core.ml.model import get_model
+from autoop.core.ml.pipeline import Pipeline, _refit_scaling
+
+
+class TestCrossValidation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "x": rng.normal(5, 2, size=400),
+            "c": rng.choice(["a", "b", "c"], size=400),
+        })
+        df["y"] = 3 * df["x"] + (df["c"] == "a") + rng.normal(size=400) / 10
+        df["label"] = np.where(df["x"] > 5, "high", "low")
+        self.dataset = Dataset.from_dataframe(
+            df, name="cv", asset_path="cv.bin")
+        self.inputs = [Feature(name="x", type="numerical"),
+                       Feature(name="c", type="categorical")]
+
+    def test_refit_scaling(self):
+        rng = np.random.default_rng(1)
+        raw = rng.normal(3, 2, size=(50, 1))
+        scaled = StandardScaler().fit_transform(raw)
+        train, test = np.arange(0, 30), np.arange(30, 50)
+        expected = StandardScaler().fit(raw[train])
+        for sparse in (False, True):
+            matrix = np.hstack([scaled, np.ones((50, 1))])
+            if sparse:
+                matrix = sp.csr_matrix(matrix)
+            train_X, test_X = matrix[train], matrix[test]
+            _refit_scaling(train_X, test_X, np.array([0]))
+            if sparse:
+                train_X, test_X = train_X.toarray(), test_X.toarray()
+            np.testing.assert_allclose(
+                train_X[:, 0], expected.transform(raw[train])[:, 0])
+            np.testing.assert_allclose(
+                test_X[:, 0], expected.transform(raw[test])[:, 0])
+            np.testing.assert_array_equal(test_X[:, 1], 1)
+
+    def test_regression(self):
+        pipeline = Pipeline(
+            [MeanSquaredError(), RSquared()], self.dataset,
+            get_model("multiple_linear_regression"), self.inputs,
+            Feature(name="y", type="numerical"))
+        result = pipeline.cross_validate(folds=4, n_workers=2)
+        self.assertEqual(len(result["folds"]), 4)
+        r2 = [fold[1][1] for fold in result["folds"]]
+        self.assertAlmostEqual(result["metrics"][1][1], np.mean(r2))
+        self.assertAlmostEqual(result["metrics_std"][1][1], np.std(r2))
+        self.assertGreater(result["metrics"][1][1], 0.99)
+
+    def test_classification_without_shuffle(self):
+        pipeline = Pipeline(
+            [Accuracy()], self.dataset,
+            get_model("logistic_regression"), self.inputs,
+            Feature(name="label", type="categorical"), sparse=True)
+        result = pipeline.cross_validate(folds=3, shuffle=False,
+                                         fold_safe=False)
+        self.assertGreater(result["metrics"][0][1], 0.9)
+
+    def test_invalid_folds(self):
+        pipeline = Pipeline(
+            [MeanSquaredError()], self.dataset,
+            get_model("multiple_linear_regression"), self.inputs,
+            Feature(name="y", type="numerical"))
+        with self.assertRaises(ValueError):
+            pipeline.cross_validate(folds=1)
@@ -1,7 +1,12 @@
 import unittest
+from unittest import mock
 
+from app.core.system import ArtifactRegistry
 from autoop.core.database import Database
+from autoop.core.ml.artifact import Artifact
+from autoop.core.ml.dataset import Dataset
 from autoop.core.storage import LocalStorage
+import pandas as pd
 import random
 import tempfile
 
@@ -36,6 +41,13 @@ class TestDatabase(unittest.TestCase):
         other_db = Database(self.storage)
         self.assertEqual(other_db.get("collection", id)["key"], value["key"])
 
+    def test_stray_files(self):
+        self.db.set("collection", "a", {"key": 1})
+        self.storage.save(b"notes", "notes.txt")
+        self.storage.save(b"{}", "collection/nested/b")
+        other_db = Database(self.storage)
+        self.assertEqual(other_db.list("collection"), [("a", {"key": 1})])
+
     def test_refresh(self):
         key = str(random.randint(0, 100))
         value = {"key": random.randint(0, 100)}
@@ -49,4 +61,182 @@ class TestDatabase(unittest.TestCase):
         value = {"key": random.randint(0, 100)}
         self.db.set("collection", key, value)
         # collection should now contain the key
-        self.assertIn((key, value), self.db.list("collection"))
\ No newline at end of file
+        self.assertIn((key, value), self.db.list("collection"))
+
+    def test_persist_only_changes(self):
+        self.db.set("collection", "a", {"key": 1})
+        self.storage.delete("collection/a")
+        # writing another key must not rewrite unchanged entries
+        self.db.set("collection", "b", {"key": 2})
+        self.assertEqual(Database(self.storage).list("collection"),
+                         [("b", {"key": 2})])
+
+    def test_transaction(self):
+        with self.db.transaction():
+            for i in range(10):
+                self.db.set("collection", str(i), {"key": i})
+            self.db.delete("collection", "0")
+            self.assertEqual(Database(self.storage).list("collection"), [])
+        other_db = Database(self.storage)
+        self.assertEqual(len(other_db.list("collection")), 9)
+        self.assertIsNone(other_db.get("collection", "0"))
+
+    def test_transaction_rollback(self):
+        self.db.set("collection", "a", {"key": 1})
+        with self.assertRaises(ValueError):
+            with self.db.transaction():
+                self.db.set("collection", "a", {"key": 2})
+                self.db.set("collection", "b", {"key": 3})
+                raise ValueError()
+        self.assertEqual(self.db.get("collection", "a"), {"key": 1})
+        self.assertIsNone(self.db.get("collection", "b"))
+        self.db.refresh()
+        self.assertEqual(self.db.list("collection"), [("a", {"key": 1})])
+
+    def test_refresh_is_incremental(self):
+        self.db.set("collection", "a", {"key": 1})
+        self.db.set("collection", "b", {"key": 2})
+        other_db = Database(self.storage)
+        self.db.set("collection", "a", {"key": 3})
+        self.db.delete("collection", "b")
+        loaded = []
+        load = self.storage.load
+        self.storage.load = lambda key: loaded.append(key) or load(key)
+        other_db.refresh()
+        self.assertEqual(other_db.list("collection"), [("a", {"key": 3})])
+        self.assertNotIn("collection/b", loaded)
+        loaded.clear()
+        other_db.refresh()
+        self.assertEqual(loaded, [".meta/generation"])
+
+    def test_query(self):
+        self.db.create_index("collection", "type")
+        self.db.create_index("collection", "tags")
+        with self.db.transaction():
+            self.db.set("collection", "a", {"type": "x", "tags": ["t", "u"]})
+            self.db.set("collection", "b", {"type": "y", "tags": ["t"]})
+            self.db.set("collection", "c", {"type": "x", "size": 1})
+        self.assertEqual(self.db.query("collection", type="x"), ["a", "c"])
+        self.assertEqual(self.db.query("collection", tags="t", type="y"),
+                         ["b"])
+        # unindexed fields are checked on the entries the indexes leave
+        self.assertEqual(self.db.query("collection", type="x", size=1),
+                         ["c"])
+        self.assertEqual(self.db.query("collection", size=1), ["c"])
+        self.assertEqual(self.db.query("collection", type="z"), [])
+        self.assertEqual(self.db.query("missing", type="x"), [])
+        self.db.set("collection", "a", {"type": "y", "tags": []})
+        self.db.delete("collection", "c")
+        self.assertEqual(self.db.query("collection", type="x"), [])
+        self.assertEqual(self.db.query("collection", tags="t"), ["b"])
+
+    def test_index_matches_scan(self):
+        entries = {
+            "a": {"v": 1.0, "tags": ["t", 2]},
+            "b": {"v": True, "tags": [["t", 2]]},
+            "c": {"v": {"k": [1, 2]}, "tags": [{"k": 1}]},
+            "d": {"v": "1", "tags": []},
+        }
+        queries = [{"v": 1}, {"v": 1.0}, {"v": True}, {"v": "1"},
+                   {"v": {"k": [1.0, 2]}}, {"v": [1, 2]}, {"tags": 2.0},
+                   {"tags": ["t", 2]}, {"tags": {"k": True}}, {"tags": "t"}]
+        for id, entry in entries.items():
+            self.db.set("collection", id, entry)
+        scanned = [self.db.query("collection", **query) for query in queries]
+        self.db.create_index("collection", "v")
+        self.db.create_index("collection", "tags")
+        indexed = [self.db.query("collection", **query) for query in queries]
+        self.assertEqual(indexed, scanned)
+        self.assertEqual(scanned[0], ["a", "b"])
+        self.assertEqual(scanned[7], ["b"])
+
+    def test_index_rollback(self):
+        self.db.create_index("collection", "type")
+        self.db.set("collection", "a", {"type": "x"})
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.set("collection", "a", {"type": "y"})
+                self.db.set("collection", "b", {"type": "y"})
+                raise RuntimeError()
+        self.assertEqual(self.db.query("collection", type="x"), ["a"])
+        self.assertEqual(self.db.query("collection", type="y"), [])
+
+    def test_index_persisted(self):
+        self.db.create_index("collection", "type")
+        self.db.set("collection", "a", {"type": "x"})
+        # the declaration is persisted, the index is rebuilt on load
+        other_db = Database(self.storage)
+        self.assertEqual(other_db.query("collection", type="x"), ["a"])
+        reloaded = Database(self.storage, indexes={"collection": ["name"]})
+        self.db.set("collection", "b", {"type": "x", "name": "n"})
+        reloaded.refresh()
+        self.assertEqual(sorted(reloaded.query("collection", type="x")),
+                         ["a", "b"])
+        self.assertEqual(reloaded.query("collection", name="n"), ["b"])
+        # and kept up to date on refresh
+        self.db.delete("collection", "a")
+        other_db.refresh()
+        self.assertEqual(other_db.query("collection", type="x"), ["b"])
+
+    def test_index_not_rewritten(self):
+        self.db.create_index("collection", "type")
+        saved = []
+        save = self.storage.save
+        self.storage.save = lambda data, key: saved.append(key) or save(
+            data, key)
+        self.db.set("collection", "a", {"type": "x"})
+        self.assertNotIn(".meta/indexes", saved)
+
+    def test_registry_filters(self):
+        registry = ArtifactRegistry(self.db, LocalStorage(tempfile.mkdtemp()))
+        for name, type, tags in [("a", "dataset", ["public"]),
+                                 ("b", "model", ["public"]),
+                                 ("c", "dataset", [])]:
+            registry.register(Artifact(name=name, type=type, tags=tags,
+                                       asset_path=f"{name}.bin", data=b""))
+        self.assertEqual([a.name for a in registry.list(type="dataset")],
+                         ["a", "c"])
+        self.assertEqual([a.name for a in registry.list(tag="public")],
+                         ["a", "b"])
+        self.assertEqual([a.name for a in registry.list(
+            type="dataset", tag="public", version="1.0.0")], ["a"])
+        self.assertEqual(len(registry.list()), 3)
+
+    def test_registry_on_change(self):
+        changed = []
+        registry = ArtifactRegistry(self.db, LocalStorage(tempfile.mkdtemp()),
+                                    on_change=changed.append)
+        dataset = Dataset.from_dataframe(
+            pd.DataFrame({"x": [1.0, 2.0]}), name="d", asset_path="d.bin")
+        registry.register(dataset)
+        handle = registry.get(dataset.id)
+        self.assertEqual(handle.fingerprint, dataset.fingerprint)
+        registry.delete(dataset.id)
+        self.assertEqual(changed, [dataset.id, dataset.id])
+
+    def test_registry_maps_datasets(self):
+        registry = ArtifactRegistry(self.db, LocalStorage(tempfile.mkdtemp()))
+        data = pd.DataFrame({"x": [1.0, 2.0], "y": ["a", "b"]})
+        dataset = Dataset.from_dataframe(data, name="d", asset_path="d.bin")
+        registry.register(dataset)
+        [handle] = registry.list(type="dataset", load=True)
+        pd.testing.assert_frame_equal(handle.read(["x"]), data[["x"]])
+        # read through the mapping, not loaded into the byte cache
+        self.assertIsInstance(handle._raw(), memoryview)
+        self.assertFalse(handle.is_loaded)
+        self.assertIsNone(registry._cache.get(dataset.id))
+        self.assertEqual(handle.data, dataset.data)
+
+    def test_concurrent_writers(self):
+        reader = Database(self.storage)
+        first = Database(self.storage)
+        second = Database(self.storage)
+        # both writers read the same counter before writing
+        with mock.patch.object(second, "_read_generation", return_value=0):
+            first.set("collection", "a", {"key": 1})
+            second.set("collection", "b", {"key": 2})
+        self.assertEqual(sorted(self.storage.list(".meta")),
+                         [".meta/1", ".meta/2", ".meta/generation"])
+        reader.refresh()
+        self.assertEqual(sorted(reader.list("collection")),
+                         [("a", {"key": 1}), ("b", {"key": 2})])
@@ -0,0 +1,109 @@
+import unittest
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.columnar import is_columnar
+from autoop.core.storage import LocalStorage
+
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "int": np.arange(6, dtype=np.int32),
+            "float": np.linspace(0, 1, 6),
+            "text": ["a", "b", None, "a", "é", "b"],
+            "object": pd.Series(list("xyxyxy"), dtype=object),
+            "category": pd.Categorical(list("uvuuvv"), ordered=True),
+            "nullable": pd.array([1, None, 3, 4, 5, 6], dtype="Int64"),
+            "date": pd.date_range("2020-01-01", periods=6),
+            "flag": [True, False, True, True, False, False],
+        })
+        self.dataset = Dataset.from_dataframe(
+            name="test",
+            asset_path="test.bin",
+            data=self.df,
+        )
+
+    def test_init(self):
+        self.assertIsInstance(self.dataset, Dataset)
+        self.assertEqual(self.dataset.type, "dataset")
+        self.assertTrue(is_columnar(self.dataset.data))
+
+    def test_read_keeps_dtypes(self):
+        pd.testing.assert_frame_equal(self.dataset.read(), self.df)
+
+    def test_save(self):
+        other = self.df.iloc[:3]
+        self.dataset.save(other)
+        pd.testing.assert_frame_equal(
+            self.dataset.read(), other.reset_index(drop=True))
+
+    def test_csv_round_trip(self):
+        numeric = self.df[["int", "float"]]
+        dataset = Dataset.from_csv(
+            numeric.to_csv(index=False), name="csv", asset_path="csv.bin")
+        self.assertTrue(is_columnar(dataset.data))
+        self.assertEqual(dataset.to_csv(),
+                         numeric.to_csv(index=False).encode())
+
+    def test_read_legacy_csv(self):
+        numeric = self.df[["int", "float"]]
+        dataset = Dataset(
+            name="legacy",
+            asset_path="legacy.csv",
+            data=numeric.to_csv(index=False).encode(),
+        )
+        np.testing.assert_allclose(dataset.read().values, numeric.values)
+
+    def test_iter_chunks_legacy_csv(self):
+        numeric = self.df[["int", "float"]]
+        dataset = Dataset(
+            name="legacy",
+            asset_path="legacy.csv",
+            data=numeric.to_csv(index=False).encode(),
+        )
+        calls = []
+        read_csv = pd.read_csv
+        with mock.patch("pandas.read_csv",
+                        lambda *args, **kwargs: calls.append(kwargs)
+                        or read_csv(*args, **kwargs)):
+            chunks = list(dataset.iter_chunks(2, ["float"], start=1, stop=6))
+        # one streaming parse, not one parse of the whole CSV per chunk
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        np.testing.assert_allclose(pd.concat(chunks)["float"],
+                                   numeric["float"].iloc[1:])
+        self.assertEqual(list(chunks[1].index), [3, 4])
+
+    def test_column_is_view(self):
+        column = self.dataset.column("float")
+        self.assertFalse(column.flags.owndata)
+        np.testing.assert_array_equal(column, self.df["float"].values)
+
+    def test_from_storage(self):
+        storage = LocalStorage(tempfile.mkdtemp())
+        storage.save(self.dataset.data, self.dataset.asset_path)
+        dataset = Dataset.from_storage(storage, self.dataset.asset_path)
+        self.assertEqual(dataset.columns, list(self.df.columns))
+        pd.testing.assert_frame_equal(
+            dataset.read(["int", "text"]), self.df[["int", "text"]])
+        # overwriting the asset must not invalidate the open mapping
+        storage.save(b"", self.dataset.asset_path)
+        np.testing.assert_array_equal(
+            dataset.column("int"), self.df["int"].values)
+
+    def test_read_rows(self):
+        part = self.dataset.read(rows=slice(2, 5))
+        pd.testing.assert_frame_equal(part, self.df.iloc[2:5])
+        self.assertEqual(self.dataset.num_rows, 6)
+
+    def test_iter_chunks(self):
+        chunks = list(self.dataset.iter_chunks(4, ["text", "int"], start=1))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 1])
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks), self.df[["text", "int"]].iloc[1:])
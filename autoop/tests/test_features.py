@@ -1,5 +1,7 @@
 import unittest
+from unittest import mock
 from sklearn.datasets import load_iris, fetch_openml
+import numpy as np
 import pandas as pd
 import os
 import sys
@@ -11,7 +13,10 @@ sys.path.insert(0, root_dir)
 
 from autoop.core.ml.dataset import Dataset  # noqa : E402
 from autoop.core.ml.feature import Feature  # noqa : E402
-from autoop.functional.feature import detect_feature_types  # noqa : E402
+from autoop.functional.feature import (  # noqa : E402
+    detect_feature_types,
+    profile_columns,
+)
 
 class TestFeatures(unittest.TestCase):
 
@@ -80,6 +85,32 @@ class TestFeatures(unittest.TestCase):
                                        features):
             self.assertEqual(detected_feature.type, "categorical")
 
+    def test_profile_from_sample(self):
+        df = pd.DataFrame({
+            "number": np.arange(50_000, dtype=float),
+            "numeric_text": [str(i % 7) for i in range(50_000)],
+            "text": ["a", "b"] * 25_000,
+            "flag": [True, False] * 25_000,
+        })
+        dataset = Dataset.from_dataframe(
+            name="wide", asset_path="wide.bin", data=df)
+        profile = profile_columns(dataset, sample_size=1000)
+        self.assertEqual(
+            [column["type"] for column in profile.values()],
+            ["numerical", "numerical", "categorical", "categorical"])
+        self.assertEqual(profile["text"]["sample_size"], 1000)
+        self.assertEqual(profile["numeric_text"]["distinct"], 7)
+
+    def test_detect_features_uses_stored_profile(self):
+        dataset = Dataset.from_dataframe(
+            name="small", asset_path="small.bin",
+            data=pd.DataFrame({"x": [1.0, 2.0]}))
+        dataset.metadata["profile"] = {"x": {"type": "categorical"}}
+        with mock.patch.object(Dataset, "read") as read:
+            features = detect_feature_types(dataset)
+            read.assert_not_called()
+        self.assertEqual(features, [Feature(name="x", type="categorical")])
+
 
 if __name__ == "__main__":
     unittest.main()
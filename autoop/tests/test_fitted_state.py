@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.columnar import pack
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.fitted_state import pack_transformer, unpack_transformer
+from autoop.core.ml.metric import MeanSquaredError
+from autoop.core.ml.model import get_model
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.storage import LocalStorage
+
+
+class TestFittedState(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "x": rng.normal(10, 3, size=200),
+            "c": rng.choice(["a", "b", "c"], size=200),
+            "n": rng.integers(0, 4, size=200),
+        })
+        df["y"] = 2 * df["x"] + df["n"] + (df["c"] == "b")
+        self.df = df
+        self.pipeline = Pipeline(
+            [MeanSquaredError()],
+            Dataset.from_dataframe(df, name="test", asset_path="test.bin"),
+            get_model("multiple_linear_regression"),
+            [Feature(name="x", type="numerical"),
+             Feature(name="c", type="categorical"),
+             Feature(name="n", type="categorical")],
+            Feature(name="y", type="numerical"))
+        self.pipeline.execute()
+
+    def test_transformer_round_trip(self):
+        for artifact in self.pipeline._artifacts.values():
+            restored = unpack_transformer(pack_transformer(artifact))
+            self.assertEqual(restored["type"], artifact["type"])
+            original = artifact["transformer"]
+            if artifact["type"] == "OneHotEncoder":
+                np.testing.assert_array_equal(restored["transformer"]
+                                              .categories_[0],
+                                              original.categories_[0])
+            else:
+                np.testing.assert_allclose(restored["transformer"].mean_,
+                                           original.mean_)
+
+    def test_pipeline_from_storage(self):
+        storage = LocalStorage(tempfile.mkdtemp())
+        artifact = self.pipeline.to_artifact("test")
+        storage.save(artifact.data, artifact.asset_path)
+        restored = Pipeline.from_storage(storage, artifact.asset_path)
+        rows = self.df.head(20)
+        np.testing.assert_allclose(restored.predict(rows),
+                                   self.pipeline.predict(rows))
+        coefficients = restored.model.parameters["coefficients"]
+        np.testing.assert_allclose(
+            coefficients, self.pipeline.model.parameters["coefficients"])
+        restored_scaler = restored._artifacts["x"]["transformer"]
+        self.assertFalse(restored_scaler.mean_.flags.owndata)
+
+    def test_rejects_other_versions(self):
+        data = pack({}, {"kind": "pipeline", "state_version": 99})
+        with self.assertRaises(ValueError):
+            Pipeline._from_state(data)
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+# Import times are tracked by the startup benchmarks of
+# `autoop.benchmarks`; these tests only check what gets imported.
+
+
+def _import(module: str) -> subprocess.CompletedProcess:
+    """Import a module in a fresh interpreter and list heavy modules."""
+    code = (f"import sys, {module}; "
+            "print(*sorted(m for m in ('sklearn', 'pandas', 'scipy') "
+            "if m in sys.modules))")
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+
+
+class TestImports(unittest.TestCase):
+
+    def test_lazy_dependencies(self):
+        self.assertEqual(_import("app.core.system").stdout.split(), [])
+        self.assertNotIn("sklearn",
+                         _import("autoop.core.ml.pipeline").stdout.split())
+        self.assertNotIn("sklearn",
+                         _import("autoop.core.ml.model").stdout.split())
+
+    def test_lazy_models(self):
+        from autoop.core.ml import model
+        from autoop.core.ml.model.regression import Lasso
+        self.assertIs(model.Lasso, Lasso)
+        self.assertIn("Lasso", dir(model))
+        self.assertIsInstance(model.get_model("lasso"), Lasso)
+        with self.assertRaises(AttributeError):
+            model.Unknown
@@ -0,0 +1,131 @@
+import unittest
+
+import numpy as np
+from sklearn.metrics import (
+    accuracy_score,
+    mean_absolute_error,
+    mean_squared_error,
+    precision_score,
+    r2_score,
+    recall_score,
+)
+
+from autoop.core.ml.metric import (
+    METRICS,
+    MetricAccumulator,
+    evaluate_batch,
+    evaluate_metrics,
+    get_metric,
+)
+
+
+class TestMetric(unittest.TestCase):
+
+    def setUp(self):
+        self.truth = np.array([0, 1, 2, 2, 1, 0])
+        self.predictions = np.array([0, 2, 2, 2, 1, 1])
+
+    def test_get_metric(self):
+        for name in METRICS:
+            self.assertEqual(str(get_metric(name)), name)
+        with self.assertRaises(ValueError):
+            get_metric("unknown")
+
+    def test_accuracy(self):
+        accuracy = get_metric("accuracy")
+        self.assertAlmostEqual(accuracy(self.predictions, self.truth), 4 / 6)
+        # one-hot encoded ground truth is reduced to class indices
+        one_hot = np.eye(3)[self.truth]
+        self.assertAlmostEqual(accuracy(self.predictions, one_hot), 4 / 6)
+
+    def test_macro_precision_and_recall(self):
+        precision = get_metric("macro_precision")
+        recall = get_metric("macro_recall")
+        self.assertAlmostEqual(precision(self.predictions, self.truth),
+                               np.mean([1, 1 / 2, 2 / 3]))
+        self.assertAlmostEqual(recall(self.predictions, self.truth),
+                               np.mean([1 / 2, 1 / 2, 1]))
+
+    def test_regression_metrics(self):
+        truth = np.array([1.0, 2.0, 3.0, 4.0])
+        predictions = np.array([1.5, 2.0, 2.0, 4.0])
+        self.assertAlmostEqual(
+            get_metric("mean_squared_error")(predictions, truth), 1.25 / 4)
+        self.assertAlmostEqual(
+            get_metric("mean_absolute_error")(predictions, truth), 1.5 / 4)
+        self.assertAlmostEqual(
+            get_metric("r_squared")(predictions, truth.reshape(-1, 1)),
+            1 - 1.25 / 5)
+
+    def test_evaluate_batch(self):
+        rng = np.random.default_rng(0)
+        truth = rng.integers(0, 4, size=100)
+        stacked = rng.integers(0, 5, size=(6, 100))
+        metrics = [get_metric(name) for name in
+                   ["accuracy", "macro_precision", "macro_recall"]]
+        values = evaluate_batch(metrics, stacked, truth)
+        self.assertEqual(values.shape, (6, 3))
+        # classes never predicted, or never true, are left out of the
+        # macro averages like with zero_division=nan
+        for predictions, row in zip(stacked, values):
+            np.testing.assert_allclose(row, [
+                accuracy_score(truth, predictions),
+                precision_score(truth, predictions, average="macro",
+                                zero_division=np.nan),
+                recall_score(truth, predictions, average="macro",
+                             zero_division=np.nan),
+            ])
+        labels = np.array(["x", "y", "z"])
+        np.testing.assert_allclose(
+            evaluate_batch(metrics, labels[stacked % 3], labels[truth % 3]),
+            evaluate_batch(metrics, stacked % 3, truth % 3))
+
+    def test_evaluate_batch_regression(self):
+        rng = np.random.default_rng(0)
+        truth = rng.normal(size=100)
+        stacked = truth + rng.normal(size=(4, 100))
+        metrics = [get_metric(name) for name in
+                   ["mean_squared_error", "mean_absolute_error",
+                    "r_squared"]]
+        values = evaluate_batch(metrics, stacked, truth)
+        for predictions, row in zip(stacked, values):
+            np.testing.assert_allclose(row, [
+                mean_squared_error(truth, predictions),
+                mean_absolute_error(truth, predictions),
+                r2_score(truth, predictions),
+            ])
+
+    def test_evaluate_metrics_mixed(self):
+        truth = np.array([1.0, 2.0, 3.0, 4.0])
+        predictions = np.array([1.5, 2.0, 2.0, 4.0])
+        metrics = [get_metric(name) for name in
+                   ["mean_squared_error", "r_squared", "mean_absolute_error"]]
+        results = evaluate_metrics(metrics, predictions, truth)
+        self.assertEqual([metric for metric, _ in results], metrics)
+        np.testing.assert_allclose([value for _, value in results],
+                                   [1.25 / 4, 1 - 1.25 / 5, 1.5 / 4])
+
+    def test_accumulator_matches_full_evaluation(self):
+        rng = np.random.default_rng(0)
+        labels = np.array(list("abcde"))
+        cases = [
+            ("regression", rng.normal(size=500), rng.normal(size=500)),
+            ("classification", labels[rng.integers(0, 5, 500)],
+             labels[rng.integers(0, 4, 500)]),
+        ]
+        for metric_type, predictions, truth in cases:
+            metrics = [get_metric(name) for name in METRICS
+                       if get_metric(name).type == metric_type]
+            shards = [MetricAccumulator(metrics) for _ in range(3)]
+            for i, (p, t) in enumerate(zip(np.array_split(predictions, 7),
+                                           np.array_split(truth, 7))):
+                shards[i % 3].update(p, t)
+            merged = shards[0].merge(shards[1]).merge(shards[2])
+            for metric, value in merged.finalize():
+                self.assertAlmostEqual(value, metric(predictions, truth))
+
+    def test_accumulator_empty_and_mismatch(self):
+        accumulator = get_metric("accuracy").accumulator()
+        self.assertTrue(np.isnan(accumulator.finalize()[0][1]))
+        with self.assertRaises(ValueError):
+            accumulator.merge(get_metric("r_squared").accumulator())
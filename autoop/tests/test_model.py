@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from autoop.core.ml.model import (
+    CLASSIFICATION_MODELS,
+    REGRESSION_MODELS,
+    Model,
+    get_model,
+)
+
+
+class TestModel(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(200, 3))
+        self.y = self.X @ np.array([1.0, -2.0, 0.5]) + 3
+        self.labels = (self.X[:, 0] > 0).astype(int)
+
+    def test_regression_models(self):
+        for name in REGRESSION_MODELS:
+            model = get_model(name)
+            self.assertIsInstance(model, Model)
+            self.assertEqual(model.type, "regression")
+            model.fit(self.X, self.y.reshape(-1, 1))
+            self.assertEqual(model.predict(self.X).shape, (200,))
+            self.assertIsNotNone(model.parameters)
+
+    def test_classification_models(self):
+        one_hot = np.eye(2)[self.labels]
+        for name in CLASSIFICATION_MODELS:
+            model = get_model(name)
+            self.assertEqual(model.type, "classification")
+            model.fit(self.X, one_hot)
+            predictions = model.predict(self.X)
+            self.assertGreater(np.mean(predictions == self.labels), 0.9)
+
+    def test_linear_regression_parameters(self):
+        model = get_model("multiple_linear_regression")
+        model.fit(self.X, self.y)
+        np.testing.assert_allclose(
+            model.parameters["coefficients"], [1.0, -2.0, 0.5])
+        self.assertAlmostEqual(model.parameters["intercept"], 3)
+
+    def test_hyperparameters(self):
+        model = get_model("lasso", alpha=0.5)
+        self.assertEqual(model.hyperparameters, {"alpha": 0.5})
+        with self.assertRaises(ValueError):
+            get_model("unknown")
+
+    def test_partial_fit(self):
+        model = get_model("multiple_linear_regression")
+        for rows in np.array_split(np.arange(200), 4):
+            model.partial_fit(self.X[rows], self.y[rows])
+        np.testing.assert_allclose(
+            model.parameters["coefficients"], [1.0, -2.0, 0.5])
+        one_hot = np.eye(2)[self.labels]
+        model = get_model("sgd_classification", random_state=1)
+        self.assertTrue(model.supports_partial_fit)
+        for _ in range(5):
+            for rows in np.array_split(np.arange(200), 4):
+                model.partial_fit(self.X[rows], one_hot[rows])
+        predictions = model.predict(self.X)
+        self.assertGreater(np.mean(predictions == self.labels), 0.9)
+        with self.assertRaises(NotImplementedError):
+            get_model("k_nearest_neighbors").partial_fit(self.X, one_hot)
@@ -0,0 +1,162 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import issparse
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.preprocessing_cache import PreprocessingCache
+from autoop.core.storage import LocalStorage
+from autoop.functional.preprocessing import (
+    build_design_matrix,
+    fit_transformers,
+    preprocess_features,
+    transform_features,
+)
+
+
+class TestPreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        df = pd.DataFrame({
+            "x": np.arange(10, dtype=float),
+            "c": list("abcabcabca"),
+        })
+        self.dataset = Dataset.from_dataframe(
+            name="test", asset_path="test.bin", data=df)
+        self.features = [
+            Feature(name="x", type="numerical"),
+            Feature(name="c", type="categorical"),
+        ]
+
+    def test_preprocess_features(self):
+        results = preprocess_features(self.features, self.dataset)
+        self.assertEqual([name for name, _, _ in results], ["c", "x"])
+        self.assertEqual(results[0][1].shape, (10, 3))
+        self.assertAlmostEqual(results[1][1].mean(), 0)
+        self.assertEqual(results[0][2]["type"], "OneHotEncoder")
+
+    def test_cache_skips_encoding(self):
+        cache = PreprocessingCache()
+        first = preprocess_features(self.features, self.dataset, cache)
+        with mock.patch.object(Dataset, "column") as column:
+            second = preprocess_features(self.features, self.dataset, cache)
+            column.assert_not_called()
+        for (_, a, _), (_, b, _) in zip(first, second):
+            np.testing.assert_array_equal(a, b)
+
+    def test_cache_disk_tier(self):
+        storage = LocalStorage(tempfile.mkdtemp())
+        cache = PreprocessingCache(storage=storage)
+        first = preprocess_features(self.features, self.dataset, cache)
+        reopened = PreprocessingCache(storage=storage)
+        with mock.patch.object(Dataset, "column") as column:
+            second = preprocess_features(
+                self.features, self.dataset, reopened)
+            column.assert_not_called()
+        for (_, a, _), (_, b, _) in zip(first, second):
+            np.testing.assert_array_equal(a, b)
+
+    def test_cache_eviction(self):
+        cache = PreprocessingCache(max_memory=2000)
+        preprocess_features(self.features, self.dataset, cache)
+        key = PreprocessingCache.key(
+            self.dataset, self.features[0], "StandardScaler")
+        self.assertIsNone(cache.get(key))
+
+    def test_cache_oversize_entries(self):
+        storage = LocalStorage(tempfile.mkdtemp())
+        cache = PreprocessingCache(storage=storage, max_disk=100)
+        preprocess_features(self.features, self.dataset, cache)
+        # too large for the disk tier, so never written to storage
+        self.assertEqual(storage.list(""), [])
+        key = PreprocessingCache.key(
+            self.dataset, self.features[0], "StandardScaler")
+        self.assertIsNotNone(cache.get(key))
+
+    def test_design_matrix(self):
+        expected = np.concatenate(
+            [data for _, data, _ in
+             preprocess_features(self.features, self.dataset)], axis=1)
+        dense, layout = build_design_matrix(
+            self.features, self.dataset, sparse=False)
+        np.testing.assert_allclose(dense, expected)
+        self.assertEqual([(name, columns) for name, columns, _ in layout],
+                         [("c", slice(0, 3)), ("x", slice(3, 4))])
+        sparse, _ = build_design_matrix(
+            self.features, self.dataset, sparse=True)
+        self.assertTrue(issparse(sparse))
+        self.assertEqual(sparse.nnz, 2 * 10)
+        np.testing.assert_allclose(sparse.toarray(), expected)
+
+    def test_design_matrix_auto_sparse(self):
+        df = pd.DataFrame({
+            "x": np.arange(100, dtype=float),
+            "c": [f"category {i % 50}" for i in range(100)],
+        })
+        dataset = Dataset.from_dataframe(
+            name="wide", asset_path="wide.bin", data=df)
+        matrix, _ = build_design_matrix(self.features, dataset)
+        self.assertTrue(issparse(matrix))
+        self.assertEqual(matrix.shape, (100, 51))
+
+    def test_fit_transformers_in_chunks(self):
+        expected, _ = build_design_matrix(
+            self.features, self.dataset, sparse=False)
+        artifacts = fit_transformers(
+            self.features, self.dataset.iter_chunks(3))
+        self.assertEqual([name for name, _ in artifacts], ["c", "x"])
+        chunks = [transform_features(chunk, artifacts, sparse=False)[0]
+                  for chunk in self.dataset.iter_chunks(4)]
+        np.testing.assert_allclose(np.concatenate(chunks), expected)
+        unknown = pd.DataFrame({"x": [1.0], "c": ["z"]})
+        with self.assertRaises(ValueError):
+            transform_features(unknown, artifacts)
+
+    def test_missing_categories(self):
+        from sklearn.preprocessing import OneHotEncoder
+        df = pd.DataFrame({"b": ["x", None, "y", "x"],
+                           "c": ["a", None, "b", "a"]})
+        dataset = Dataset.from_dataframe(
+            name="missing", asset_path="missing.bin", data=df)
+        features = [Feature(name="b", type="categorical"),
+                    Feature(name="c", type="categorical")]
+        column = np.asarray(df["c"], dtype=object).reshape(-1, 1)
+        reference = OneHotEncoder().fit_transform(column).toarray()
+        expected = np.concatenate([reference, reference], axis=1)
+        np.testing.assert_array_equal(
+            preprocess_features(features, dataset)[1][1], reference)
+        dense, _ = build_design_matrix(features, dataset, sparse=False)
+        np.testing.assert_array_equal(dense, expected)
+        sparse, _ = build_design_matrix(features, dataset, sparse=True)
+        np.testing.assert_array_equal(sparse.toarray(), expected)
+        artifacts = fit_transformers(features, dataset.iter_chunks(2))
+        encoded, _ = transform_features(df, artifacts, sparse=False)
+        np.testing.assert_array_equal(encoded, expected)
+
+    def test_cache_replaced_data(self):
+        storage = LocalStorage(tempfile.mkdtemp())
+        data = LocalStorage(tempfile.mkdtemp())
+        feature = [Feature(name="x", type="numerical")]
+        cache = PreprocessingCache(storage=storage)
+        for rows in (3, 4):
+            df = pd.DataFrame({"x": np.arange(1, rows + 1, dtype=float)})
+            data.save(Dataset.from_dataframe(df, "d", "d.bin").data, "d.bin")
+            dataset = Dataset.from_storage(data, "d.bin")
+            # same path and version, but the content changed
+            result = preprocess_features(
+                feature, dataset, PreprocessingCache(storage=storage))
+            self.assertEqual(result[0][1].shape, (rows, 1))
+            self.assertEqual(result[0][2]["transformer"].mean_,
+                             [(rows + 1) / 2])
+        dataset.save(pd.DataFrame({"x": [1.0, 2.0]}))
+        result = preprocess_features(feature, dataset, cache)
+        self.assertEqual(result[0][1].shape, (2, 1))
+        cache.invalidate(dataset.id)
+        self.assertEqual(PreprocessingCache(storage=storage)._disk.keys(),
+                         [])
+        key = PreprocessingCache.key(dataset, feature[0], "StandardScaler")
+        self.assertIsNone(cache.get(key))
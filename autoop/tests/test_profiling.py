@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+
+from autoop.core.database import Database
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import MeanSquaredError
+from autoop.core.ml.model import get_model
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.profiling import Profiler, array_info, summarize
+from autoop.core.storage import LocalStorage
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = LocalStorage(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stage(self):
+        records = []
+        profiler = Profiler(sinks=[records.append], trace_memory=True)
+        with profiler.stage("allocate") as record:
+            data = np.ones(1_000_000)
+            record["arrays"]["data"] = array_info(data)
+        self.assertEqual(records, profiler.records)
+        self.assertEqual(records[0]["stage"], "allocate")
+        self.assertGreaterEqual(records[0]["wall_time"], 0)
+        self.assertGreaterEqual(records[0]["peak_memory"], data.nbytes)
+        self.assertEqual(records[0]["arrays"]["data"],
+                         {"shape": [1_000_000], "dtype": "float64",
+                          "nbytes": 8_000_000})
+
+    def test_array_info_sparse(self):
+        matrix = sp.csr_matrix(np.eye(4))
+        self.assertEqual(array_info(matrix)["nbytes"],
+                         matrix.data.nbytes + matrix.indices.nbytes
+                         + matrix.indptr.nbytes)
+
+    def test_io(self):
+        profiler = Profiler()
+        self.storage.save(b"outside", "outside")
+        with profiler.stage("io"):
+            self.storage.save(b"abc", "a")
+            self.storage.load("a")
+            database = Database(LocalStorage(f"{self.directory.name}/db"))
+            database.set("collection", "id", {"key": "value"})
+        io = profiler.records[0]["io"]
+        self.assertEqual(io["storage.load"]["bytes"], 3)
+        self.assertEqual(io["database.flush"]["count"], 1)
+        self.assertEqual(io["database.load"]["count"], 1)
+        # the save of "a", then the change record and generation of the
+        # flush, whose entry is written in one batch
+        self.assertEqual(io["storage.save"]["count"], 3)
+        self.assertEqual(io["storage.save_many"]["count"], 1)
+
+    def test_pipeline_profile(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({"x": rng.normal(size=100)})
+        df["y"] = 2 * df["x"]
+        self.storage.save(Dataset.from_dataframe(
+            df, name="data", asset_path="data.bin").data, "data.bin")
+        profiler = Profiler()
+        pipeline = Pipeline(
+            [MeanSquaredError()], Dataset.from_storage(self.storage,
+                                                       "data.bin"),
+            get_model("multiple_linear_regression"),
+            [Feature(name="x", type="numerical")],
+            Feature(name="y", type="numerical"), profiler=profiler)
+        for _ in range(2):
+            profile = pipeline.execute()["profile"]
+            self.assertEqual([record["stage"] for record in profile],
+                             ["preprocess_features", "split_data",
+                              "compact_vectors", "train", "evaluate"])
+        self.assertEqual(profile[2]["arrays"]["train_X"]["shape"], [80, 1])
+        self.assertEqual(summarize(profiler.records)["train"]["count"], 2)
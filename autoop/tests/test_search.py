@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy.stats import loguniform
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import MeanSquaredError
+from autoop.core.ml.search import HyperparameterSearch
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "x": rng.normal(size=900),
+            "c": rng.choice(["a", "b"], size=900),
+        })
+        df["y"] = 2 * df["x"] + (df["c"] == "a") + rng.normal(size=900) / 10
+        self.dataset = Dataset.from_dataframe(
+            name="search", asset_path="search.bin", data=df)
+
+    def _search(self, space, **kwargs):
+        return HyperparameterSearch(
+            metrics=[MeanSquaredError()],
+            dataset=self.dataset,
+            model="lasso",
+            space=space,
+            input_features=[Feature(name="x", type="numerical"),
+                            Feature(name="c", type="categorical")],
+            target_feature=Feature(name="y", type="numerical"),
+            n_workers=2,
+            **kwargs,
+        )
+
+    def test_grid(self):
+        results = self._search({"alpha": [10.0, 0.001, 0.5]}).run()
+        self.assertEqual([r["hyperparameters"]["alpha"] for r in results],
+                         [0.001, 0.5, 10.0])
+        self.assertTrue(all(r["train_rows"] == 720 for r in results))
+
+    def test_halving(self):
+        space = {"alpha": [0.001, 0.01, 0.1, 1.0, 2.0, 3.0, 4.0, 5.0, 10.0]}
+        results = self._search(space, early_stopping="halving").run()
+        self.assertEqual(len(results), 9)
+        # 9 candidates on 80 rows, 3 on 240 and the best on all 720
+        self.assertEqual([r["train_rows"] for r in results],
+                         [720, 240, 240, 80, 80, 80, 80, 80, 80])
+        self.assertEqual(results[0]["hyperparameters"]["alpha"], 0.001)
+        self.assertEqual(results[0]["rank"], 1)
+
+    def test_hyperband(self):
+        search = self._search({"alpha": loguniform(1e-3, 10)},
+                              search="random", early_stopping="hyperband",
+                              min_fraction=1 / 9)
+        results = search.run()
+        # brackets of 9, 5 and 3 candidates starting on 1/9, 1/3 and all
+        self.assertEqual(len(results), 17)
+        self.assertEqual(results[0]["train_rows"], 720)
+        self.assertLess(results[0]["metrics"][0][1], 0.1)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self._search({"alpha": [1.0]}, search="bayesian")
+        with self.assertRaises(ValueError):
+            self._search({"alpha": [1.0]}, early_stopping="hyperband")
@@ -0,0 +1,105 @@
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import Accuracy
+from autoop.core.ml.model import get_model
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.ml.serving import (
+    PredictionService,
+    ServiceClosed,
+    _Batcher,
+    make_server,
+)
+
+
+class TestServing(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=300)
+        c = rng.choice(["red", "green"], size=300)
+        label = np.where((x > 0) ^ (c == "red"), "yes", "no")
+        df = pd.DataFrame({"x": x, "c": c, "label": label})
+        dataset = Dataset.from_dataframe(
+            df, name="test", asset_path="test.bin")
+        pipeline = Pipeline(
+            [Accuracy()], dataset,
+            get_model("decision_tree_classification"),
+            [Feature(name="x", type="numerical"),
+             Feature(name="c", type="categorical")],
+            Feature(name="label", type="categorical"))
+        pipeline.execute()
+        self.artifact = pipeline.to_artifact("test")
+        self.loads = []
+        self.service = PredictionService(self._load, max_latency=0.01)
+
+    def tearDown(self):
+        self.service.close()
+
+    def _load(self, pipeline_id):
+        if pipeline_id == "broken":
+            raise RuntimeError("Storage unavailable")
+        if pipeline_id != "test":
+            raise KeyError(pipeline_id)
+        self.loads.append(pipeline_id)
+        return self.artifact
+
+    def test_restored_pipeline_predicts(self):
+        pipeline = Pipeline.from_artifact(self.artifact)
+        rows = pd.DataFrame({"x": [1.0, -1.0], "c": ["green", "green"]})
+        self.assertEqual(list(pipeline.predict(rows)), ["yes", "no"])
+
+    def test_batches_concurrent_requests(self):
+        futures = [self.service.submit("test", {"x": x, "c": "red"})
+                   for x in np.linspace(-1, 1, 50)]
+        results = [future.result(5) for future in futures]
+        self.assertEqual(results[0], ["yes"])
+        self.assertEqual(results[-1], ["no"])
+        self.assertEqual(self.loads, ["test"])
+        with self.assertRaises(KeyError):
+            self.service.predict("unknown", {"x": 0.0, "c": "red"})
+
+    def test_http_endpoint(self):
+        server = make_server(self.service, port=0)
+        Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}"
+            body = json.dumps({"rows": [{"x": 1.0, "c": "green"}]}).encode()
+            with urlopen(Request(f"{url}/pipelines/test/predict",
+                                 data=body)) as response:
+                self.assertEqual(json.load(response),
+                                 {"predictions": ["yes"]})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_load_error(self):
+        with self.assertRaisesRegex(RuntimeError, "Storage unavailable"):
+            self.service.predict("broken", {"x": 0.0, "c": "red"})
+        # the next request loads normally
+        self.assertEqual(self.service.predict("test", {"x": 1.0,
+                                                       "c": "green"}, 5),
+                         ["yes"])
+
+    def test_closed(self):
+        self.service.predict("test", {"x": 1.0, "c": "green"}, 5)
+        self.service.close()
+        with self.assertRaises(ServiceClosed):
+            self.service.submit("test", {"x": 1.0, "c": "green"})
+
+    def test_batcher_thread_failure(self):
+        executor = ThreadPoolExecutor(1)
+        executor.shutdown()
+        batcher = _Batcher(Pipeline.from_artifact(self.artifact), executor,
+                           max_batch_size=8, max_latency=0.01)
+        future = batcher.submit([{"x": 1.0, "c": "green"}])
+        with self.assertRaises(RuntimeError):
+            future.result(5)
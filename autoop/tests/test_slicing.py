@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import MeanSquaredError
+from autoop.core.ml.model import get_model
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.ml.slicing import parse_predicate, select_rows
+from autoop.core.ml.statistics import compute_statistics, statistics_path
+from autoop.core.storage import LocalStorage
+
+
+class TestSlicing(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            "age": np.arange(1000) % 100,
+            "time": np.arange(1000, dtype=float),
+            "sex": ["F", "M"] * 500,
+            "y": rng.normal(size=1000),
+        })
+        self.dataset = Dataset.from_dataframe(
+            self.df, name="test", asset_path="test.bin")
+
+    def test_parse_predicate(self):
+        self.assertEqual(
+            parse_predicate("age > 18 and sex == 'F'"),
+            [("age", ">", 18), ("sex", "==", "F")])
+        self.assertEqual(parse_predicate("`time (s)` <= 2.5"),
+                         [("time (s)", "<=", 2.5)])
+        self.assertEqual(parse_predicate(("age", "!=", 3)),
+                         [("age", "!=", 3)])
+        with self.assertRaises(ValueError):
+            parse_predicate("age ~ 3")
+
+    def test_where(self):
+        view = self.dataset.where("age > 18 and sex == 'F'")
+        expected = self.df[(self.df["age"] > 18) & (self.df["sex"] == "F")]
+        self.assertTrue(view.is_view)
+        self.assertEqual(view.num_rows, len(expected))
+        pd.testing.assert_frame_equal(
+            view.read(), expected.reset_index(drop=True))
+        np.testing.assert_array_equal(
+            view.column("time", slice(0, 3)), expected["time"][:3])
+
+    def test_views_compose(self):
+        train, test = self.dataset.split(0.8)
+        self.assertEqual((train.num_rows, test.num_rows), (800, 200))
+        subset = test.where(("age", "<", 10))
+        np.testing.assert_array_equal(
+            subset.column("time"), [800 + i for i in range(10)]
+            + [900 + i for i in range(10)])
+        self.assertNotEqual(train.id, test.id)
+        self.assertNotEqual(train.id, self.dataset.id)
+
+    def test_data_is_materialised(self):
+        view = self.dataset.where("sex == 'M'")
+        copy = Dataset(name="copy", data=view.data)
+        pd.testing.assert_frame_equal(copy.read(), view.read())
+
+    def test_pushdown_skips_blocks(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root)
+            storage.save(self.dataset.data, "test.bin")
+            storage.save(compute_statistics(self.dataset, block_size=100),
+                         statistics_path("test.bin"))
+            dataset = Dataset.from_storage(storage, "test.bin")
+            with mock.patch.object(Dataset, "read", autospec=True,
+                                   side_effect=Dataset.read) as read:
+                rows = select_rows(dataset, "time >= 250 and time < 420")
+            np.testing.assert_array_equal(rows, np.arange(250, 420))
+            # only the column of the predicate, in blocks 2 to 4
+            self.assertEqual([call.args[1:] for call in read.call_args_list],
+                             [(["time"], slice(200, 500))])
+
+    def test_pipeline_on_view(self):
+        train = self.dataset.where("age >= 50")
+        result = Pipeline(
+            [MeanSquaredError()], train,
+            get_model("multiple_linear_regression"),
+            [Feature(name="age", type="numerical")],
+            Feature(name="y", type="numerical")).execute()
+        self.assertEqual(len(result["predictions"]), 100)
@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.statistics import (
+    DatasetStatistics,
+    compute_statistics,
+    statistics_path,
+)
+from autoop.core.storage import LocalStorage
+
+
+class TestStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "x": np.arange(1000, dtype=float),
+            "n": pd.array([None] + list(range(999)), dtype="Int64"),
+            "c": ["a", "b", "b", "c"] * 250,
+        })
+        self.dataset = Dataset.from_dataframe(
+            self.df, name="test", asset_path="test.bin")
+        self.statistics = DatasetStatistics(
+            compute_statistics(self.dataset, block_size=100))
+
+    def test_summaries(self):
+        x = self.statistics.summary("x")
+        self.assertEqual((x["min"], x["max"], x["nulls"]), (0, 999, 0))
+        self.assertEqual(x["distinct"], 1000)
+        self.assertEqual(sum(x["histogram"]["counts"]), 1000)
+        self.assertEqual(self.statistics.summary("n")["nulls"], 1)
+        c = self.statistics.summary("c")
+        self.assertEqual(c["kind"], "values")
+        self.assertEqual(c["top"][0], ["b", 500])
+        self.assertIsNone(self.statistics.zone_map("c"))
+
+    def test_zone_maps(self):
+        self.assertEqual(self.statistics.num_blocks, 10)
+        mins, maxs, nulls = self.statistics.zone_map("x")
+        np.testing.assert_array_equal(mins, np.arange(0, 1000, 100))
+        candidates = self.statistics.candidate_blocks("x", 250, 420)
+        np.testing.assert_array_equal(np.flatnonzero(candidates), [2, 3, 4])
+        self.assertEqual(self.statistics.block_rows(9), slice(900, 1000))
+        # integer bounds are widened, never narrowed
+        mins, maxs, nulls = self.statistics.zone_map("n")
+        self.assertLessEqual(maxs[0], 99)
+        self.assertGreaterEqual(maxs[0], 98)
+        self.assertEqual(nulls[0], 1)
+
+    def test_loaded_from_storage(self):
+        storage = LocalStorage(tempfile.mkdtemp())
+        storage.save(self.dataset.data, "test.bin")
+        self.assertIsNone(
+            Dataset.from_storage(storage, "test.bin").statistics)
+        storage.save(compute_statistics(self.dataset),
+                     statistics_path("test.bin"))
+        statistics = Dataset.from_storage(storage, "test.bin").statistics
+        self.assertEqual(statistics.columns, ["x", "n", "c"])
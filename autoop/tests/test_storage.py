@@ -1,7 +1,11 @@
 
+import os
 import unittest
+from unittest import mock
 
-from autoop.core.storage import LocalStorage, NotFoundError
+from autoop.core.storage import (
+    ContentAddressedStorage, LocalStorage, NotFoundError
+)
 import random
 import tempfile
 
@@ -47,4 +51,97 @@ class TestStorage(unittest.TestCase):
         keys = self.storage.list("test")
         keys = ["/".join(key.split("/")[-2:]) for key in keys]
         self.assertEqual(set(keys), set(random_keys))
-            
\ No newline at end of file
+
+    def test_scan(self):
+        self.storage.save(b"abc", "a/b/c")
+        self.storage.save(b"d", "a/d")
+        self.storage.save(b"hidden", ".meta/1")
+        self.assertEqual(sorted(self.storage.list("")), ["a/b/c", "a/d"])
+        self.assertEqual(sorted(self.storage.list("a/")), ["a/b/c", "a/d"])
+        entries = {entry.key: entry for entry in self.storage.scan(
+            "a", stat=True)}
+        self.assertEqual(entries["a/b/c"].size, 3)
+        self.assertGreater(entries["a/d"].mtime, 0)
+        self.assertIsNone(next(self.storage.scan("a/b")).size)
+        with self.assertRaises(NotFoundError):
+            self.storage.list("missing")
+
+    def test_bulk(self):
+        items = {f"bulk/{i % 3}/{i}": bytes([i]) for i in range(10)}
+        self.storage.save_many(items)
+        self.assertEqual(self.storage.load_many(list(items)),
+                         list(items.values()))
+        self.storage.delete_many(["bulk/0/0", "bulk/1/1"])
+        self.assertEqual(self.storage.load_many(["bulk/0/0", "bulk/2/2"],
+                                                missing_ok=True),
+                         [None, bytes([2])])
+        with self.assertRaises(NotFoundError):
+            self.storage.load_many(["bulk/0/0"])
+        with self.assertRaises(NotFoundError):
+            self.storage.delete_many(["bulk/0/0"])
+        self.storage.delete_many(["bulk/0/0"], missing_ok=True)
+        self.assertEqual(len(self.storage.list("bulk")), 8)
+
+
+class TestContentAddressedStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(
+            self.temp_dir,
+            min_chunk_size=256,
+            avg_chunk_size=1024,
+            max_chunk_size=4096,
+        )
+        self.data = bytes(random.getrandbits(8) for _ in range(50000))
+
+    def _chunk_bytes(self):
+        chunk_dir = os.path.join(self.temp_dir, "chunks")
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(chunk_dir)
+                   for name in names)
+
+    def test_store(self):
+        self.storage.save(self.data, "test/path")
+        self.assertEqual(self.storage.load("test/path"), self.data)
+        with self.assertRaises(NotFoundError):
+            self.storage.load("test/otherpath")
+
+    def test_deduplicates(self):
+        edited = self.data[:1000] + b"edit" + self.data[1000:]
+        self.storage.save(self.data, "test/a")
+        self.storage.save(self.data, "test/b")
+        self.storage.save(edited, "test/c")
+        self.assertEqual(self.storage.load("test/c"), edited)
+        self.assertLess(self._chunk_bytes(), 1.5 * len(self.data))
+
+    def test_delete_collects_garbage(self):
+        self.storage.save(self.data, "test/a")
+        self.storage.save(self.data, "test/b")
+        self.storage.delete("test/a")
+        self.assertEqual(self.storage.load("test/b"), self.data)
+        self.storage.delete("test/b")
+        self.assertEqual(self._chunk_bytes(), 0)
+        reopened = ContentAddressedStorage(self.temp_dir)
+        self.assertEqual(reopened.list("test"), [])
+
+    def test_references_rebuilt(self):
+        self.storage.save(self.data, "test/a")
+        with mock.patch.object(LocalStorage, "save", autospec=True,
+                               side_effect=LocalStorage.save) as save:
+            self.storage.save(self.data, "test/b")
+        # the chunks are stored already, only the manifest is written
+        self.assertEqual(save.call_count, 1)
+        reopened = ContentAddressedStorage(self.temp_dir)
+        reopened.delete("test/a")
+        self.assertEqual(reopened.load("test/b"), self.data)
+        reopened.delete("test/b")
+        self.assertEqual(self._chunk_bytes(), 0)
+
+    def test_list(self):
+        random_keys = [f"test/{random.randint(0, 100)}" for _ in range(10)]
+        for key in random_keys:
+            self.storage.save(self.data[:100], key)
+        keys = self.storage.list("test")
+        keys = ["/".join(key.split("/")[-2:]) for key in keys]
+        self.assertEqual(set(keys), set(random_keys))
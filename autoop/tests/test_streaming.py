@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import Accuracy, MeanSquaredError, RSquared
+from autoop.core.ml.model import get_model
+from autoop.core.ml.pipeline import Pipeline
+from autoop.core.storage import LocalStorage
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=1000)
+        c = rng.choice(["a", "b", "c"], size=1000)
+        y = 2 * x + (c == "b") * 3 + rng.normal(scale=0.1, size=1000)
+        df = pd.DataFrame({"x": x, "c": c, "y": y, "label": c == "a"})
+        storage = LocalStorage(tempfile.mkdtemp())
+        storage.save(Dataset.from_dataframe(
+            df, name="test", asset_path="test.bin").data, "test.bin")
+        self.dataset = Dataset.from_storage(storage, "test.bin")
+        self.inputs = [
+            Feature(name="x", type="numerical"),
+            Feature(name="c", type="categorical"),
+        ]
+
+    def test_matches_in_memory(self):
+        results = []
+        for streaming in [False, True]:
+            pipeline = Pipeline(
+                [MeanSquaredError(), RSquared()], self.dataset,
+                get_model("multiple_linear_regression"), self.inputs,
+                Feature(name="y", type="numerical"))
+            if streaming:
+                results.append(pipeline.execute_streaming(chunk_size=128))
+            else:
+                results.append(pipeline.execute())
+        self.assertIsNone(results[1]["predictions"])
+        for (_, expected), (_, value) in zip(results[0]["metrics"],
+                                             results[1]["metrics"]):
+            self.assertAlmostEqual(value, expected)
+
+    def test_classification(self):
+        pipeline = Pipeline(
+            [Accuracy()], self.dataset,
+            get_model("sgd_classification", random_state=0),
+            [Feature(name="c", type="categorical")],
+            Feature(name="label", type="categorical"))
+        result = pipeline.execute_streaming(chunk_size=100)
+        self.assertGreater(result["metrics"][0][1], 0.95)
+
+    def test_requires_partial_fit(self):
+        pipeline = Pipeline(
+            [MeanSquaredError()], self.dataset,
+            get_model("decision_tree_regression"), self.inputs,
+            Feature(name="y", type="numerical"))
+        with self.assertRaises(ValueError):
+            pipeline.execute_streaming()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from autoop.core.ml.dataset import Dataset
+from autoop.core.ml.feature import Feature
+from autoop.core.ml.metric import MeanSquaredError, RSquared
+from autoop.core.ml.model import Model, get_model
+from autoop.core.ml.sweep import ModelSweep
+
+
+class SlowModel(Model):
+    _type = "regression"
+
+    def fit(self, observations, ground_truth):
+        time.sleep(30)
+
+    def predict(self, observations):
+        return np.zeros(len(observations))
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "x": rng.normal(size=500),
+            "c": rng.choice(["a", "b"], size=500),
+        })
+        df["y"] = 2 * df["x"] + (df["c"] == "a") + rng.normal(size=500) / 10
+        self.dataset = Dataset.from_dataframe(
+            name="sweep", asset_path="sweep.bin", data=df)
+        self.features = [
+            Feature(name="x", type="numerical"),
+            Feature(name="c", type="categorical"),
+        ]
+        self.target = Feature(name="y", type="numerical")
+
+    def _sweep(self, models, **kwargs):
+        return ModelSweep(
+            metrics=[MeanSquaredError(), RSquared()],
+            dataset=self.dataset,
+            models=models,
+            input_features=self.features,
+            target_feature=self.target,
+            **kwargs,
+        )
+
+    def test_leaderboard(self):
+        models = [get_model("lasso", alpha=1.0),
+                  get_model("multiple_linear_regression")]
+        leaderboard = self._sweep(models, n_workers=2).run()
+        self.assertEqual([result["rank"] for result in leaderboard], [1, 2])
+        self.assertTrue(all(r["status"] == "ok" for r in leaderboard))
+        self.assertEqual(type(leaderboard[0]["model"]).__name__,
+                         "MultipleLinearRegression")
+        self.assertLess(leaderboard[0]["metrics"][0][1],
+                        leaderboard[1]["metrics"][0][1])
+
+    def test_timeout(self):
+        models = [SlowModel(), get_model("multiple_linear_regression")]
+        leaderboard = self._sweep(models, n_workers=2, timeout=1).run()
+        statuses = [result["status"] for result in leaderboard]
+        self.assertEqual(statuses, ["ok", "timeout"])
+
+    def test_cancel(self):
+        sweep = self._sweep([SlowModel(), SlowModel()])
+        threading.Timer(0.5, sweep.cancel).start()
+        started = time.monotonic()
+        leaderboard = sweep.run()
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertTrue(all(r["status"] == "cancelled" for r in leaderboard))
+
+    def test_sparse_design_matrix(self):
+        sweep = ModelSweep(
+            metrics=[MeanSquaredError()],
+            dataset=self.dataset,
+            models=[get_model("multiple_linear_regression"),
+                    get_model("decision_tree_regression")],
+            input_features=self.features,
+            target_feature=self.target,
+            sparse=True,
+        )
+        leaderboard = sweep.run()
+        self.assertTrue(all(r["status"] == "ok" for r in leaderboard))
+        self.assertLess(leaderboard[0]["metrics"][0][1], 0.1)